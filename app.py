@@ -2,14 +2,29 @@
 
 import json
 import os
+import threading
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import APIConnectionError, InternalServerError, OpenAI, RateLimitError
 
 from core.agent import STAGE_0, GoalSettingAgent, SYSTEM_PROMPT
+from core.context_window import (
+    DEFAULT_KEEP_TURNS,
+    DEFAULT_MAX_TOKENS,
+    ContextWindow,
+    extractive_summary,
+)
+from core.llm_cache import DEFAULT_CACHE_PATH, LLMResponseCache, cached_create
+from core.llm_router import AttemptAborted, ModelRouter, RouteFailed
+from core.llm_stream import StreamedReply
+from core.storage import dispose_all
+from core.tool_dispatch import ToolCall, ToolDispatcher
+from core.tool_schema import TOOL_NAMES, TOOL_SCHEMAS
+from core.usage_log import UsageLogWriter
 
 STAGE_LABELS = {
     STAGE_0: "Stage 0 – Spark Awakening",
@@ -18,40 +33,81 @@ STAGE_LABELS = {
 
 DEFAULT_CHAT_MODEL = "gpt-5-mini"
 # Task-specific model plan (see docs/LLM_USAGE_GUIDE.md for details)
+# "cache": serve identical requests from the on-disk response cache.
 LLM_MODEL_PLAN = {
     "goal_planning": {
-        "primary": "gpt-5-mini",
+        "primary": DEFAULT_CHAT_MODEL,
         "fallback": "gpt-4o-mini",
+        "cache": False,
     },
     "summaries": {
         "primary": "gpt-4o-mini",
         "fallback": "gpt-5-mini",
+        "cache": True,
     },
     "reflection_reports": {
         "primary": "gpt-5-mini",
         "fallback": "gpt-4o-mini",
+        "cache": True,
     },
 }
+CACHE_HIT_USAGE = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+# Transient API errors worth another attempt (APITimeoutError is a connection error).
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
 
 USAGE_LOG_PATH = Path("logs/llm_usage.log")
+_USAGE_WRITERS: dict[Path, UsageLogWriter] = {}
+_USAGE_WRITERS_LOCK = threading.Lock()
+
+
+def _usage_writer() -> UsageLogWriter:
+    """Return the background writer for the current ``USAGE_LOG_PATH``."""
+
+    with _USAGE_WRITERS_LOCK:
+        writer = _USAGE_WRITERS.get(USAGE_LOG_PATH)
+        if writer is None or writer.closed:
+            writer = _USAGE_WRITERS[USAGE_LOG_PATH] = UsageLogWriter(
+                USAGE_LOG_PATH,
+                max_bytes=_env_int("GOALER_USAGE_LOG_MAX_MB", 10) * 1024 * 1024,
+            )
+        return writer
+
+
+def _close_usage_writers() -> None:
+    """Drain and close every usage-log writer."""
 
+    with _USAGE_WRITERS_LOCK:
+        writers = list(_USAGE_WRITERS.values())
+        _USAGE_WRITERS.clear()
+    for writer in writers:
+        writer.close()
 
-def _log_llm_usage(model: str, usage: dict | None) -> None:
-    """Append token usage information to a local log for cost monitoring."""
 
-    if not usage:
+def _log_llm_usage(model: str, usage: dict | None, context: dict | None = None) -> None:
+    """Queue token usage information for the local cost-monitoring log.
+
+    ``context`` adds the conversation id, the prompt-window estimates (tokens
+    saved by summarizing) and the routing decision with its ``latency_ms``;
+    failed requests are logged with an ``error``. The record is written by a
+    background thread, off the request's critical path.
+    """
+
+    if not usage and not (context or {}).get("error"):
         return
+    usage = usage or {}
 
-    USAGE_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
     record = {
         "timestamp": datetime.utcnow().isoformat(),
         "model": model,
         "prompt_tokens": usage.get("prompt_tokens"),
         "completion_tokens": usage.get("completion_tokens"),
         "total_tokens": usage.get("total_tokens"),
+        "latency_ms": None,
+        "error": None,
+        "conversation_id": None,
+        **(context or {}),
     }
-    with USAGE_LOG_PATH.open("a", encoding="utf-8") as fh:
-        fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+    _usage_writer().write(record)
 
 
 def _usage_to_dict(usage_obj: object) -> dict | None:
@@ -79,6 +135,170 @@ def _use_mock_mode() -> bool:
     return flag.strip().lower() not in {"0", "false", "no"}
 
 
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    return int(raw) if raw and raw.strip() else default
+
+
+def _llm_cache() -> LLMResponseCache | None:
+    """Open the response cache unless ``GOALER_LLM_CACHE`` turns it off."""
+
+    flag = os.getenv("GOALER_LLM_CACHE")
+    if flag is not None and flag.strip().lower() in {"0", "false", "no"}:
+        return None
+    return LLMResponseCache(
+        os.getenv("GOALER_LLM_CACHE_PATH") or DEFAULT_CACHE_PATH,
+        ttl_seconds=_env_int("GOALER_LLM_CACHE_TTL_HOURS", 24 * 7) * 3600,
+        max_bytes=_env_int("GOALER_LLM_CACHE_MAX_MB", 64) * 1024 * 1024,
+    )
+
+
+def _llm_router() -> ModelRouter:
+    """Build the model router from ``LLM_MODEL_PLAN`` and ``GOALER_LLM_*`` settings."""
+
+    hedge_ms = _env_int("GOALER_LLM_HEDGE_MS", 0)
+    p95_ms = _env_int("GOALER_LLM_P95_MS", 20000)
+    return ModelRouter(
+        LLM_MODEL_PLAN,
+        deadline_seconds=_env_int("GOALER_LLM_DEADLINE_MS", 60000) / 1000,
+        max_retries=_env_int("GOALER_LLM_MAX_RETRIES", 2),
+        hedge_after_seconds=hedge_ms / 1000 if hedge_ms > 0 else None,
+        latency_p95_seconds=p95_ms / 1000 if p95_ms > 0 else None,
+        retry_on=RETRYABLE_ERRORS,
+    )
+
+
+def _routed(
+    router: ModelRouter,
+    task: str,
+    send,
+    context: dict | None = None,
+    *,
+    hedge: bool = True,
+):
+    """Run ``send(model, timeout)`` through ``router``; log and re-raise a failure."""
+
+    try:
+        return router.call(task, send, hedge=hedge)
+    except RouteFailed as exc:
+        error = exc.__cause__ or exc
+        _log_llm_usage(
+            exc.route["model"],
+            None,
+            {**exc.route, **(context or {}), "error": f"{type(error).__name__}: {error}"},
+        )
+        raise
+
+
+def _completion(
+    client: OpenAI,
+    router: ModelRouter,
+    cache: LLMResponseCache | None,
+    task: str,
+    context: dict | None = None,
+    **request,
+):
+    """Create a non-streamed completion for ``task`` and log its usage.
+
+    The router picks the model and retries; the request goes through
+    ``cache`` when the task's plan enables it, and a hit is logged with zero
+    tokens and ``cache_hit: true``.
+    """
+
+    task_cache = cache if LLM_MODEL_PLAN[task].get("cache") else None
+    (response, hit), route = _routed(
+        router,
+        task,
+        lambda model, timeout: cached_create(
+            client, task_cache, model=model, timeout=timeout, **request
+        ),
+        context,
+    )
+    usage = CACHE_HIT_USAGE if hit else _usage_to_dict(getattr(response, "usage", None))
+    extra = {**route, **(context or {})}
+    if task_cache is not None:
+        extra["cache_hit"] = hit
+    _log_llm_usage(route["model"], usage, extra)
+    return response
+
+
+def _llm_summarizer(
+    client: OpenAI,
+    cache: LLMResponseCache | None = None,
+    router: ModelRouter | None = None,
+    conversation_id: str | None = None,
+):
+    """Fold old turns with the ``summaries`` model, or extractively on failure."""
+
+    router = router or ModelRouter(LLM_MODEL_PLAN, retry_on=RETRYABLE_ERRORS)
+
+    def _summarize(previous: str | None, turns: list[list[dict]]) -> str:
+        draft = extractive_summary(previous, turns)
+        try:
+            response = _completion(
+                client,
+                router,
+                cache,
+                "summaries",
+                {"conversation_id": conversation_id},
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "아래 목표 설정 대화 기록을 한국어 글머리표 10개 이내로 요약하세요."
+                        " 확정된 목표, 지표, 동기, 보스 단계, 선택한 퀘스트와 id는 빠짐없이 남기세요.",
+                    },
+                    {"role": "user", "content": draft},
+                ],
+            )
+        except Exception as exc:  # noqa: BLE001 - summarizing must never break the chat
+            print(f"--- 요약 모델 호출 실패, 추출 요약을 사용합니다: {exc} ---", flush=True)
+            return draft
+        return response.choices[0].message.content or draft
+
+    return _summarize
+
+
+def _use_streaming() -> bool:
+    """Stream replies token by token unless ``GOALER_STREAM`` turns it off."""
+
+    flag = os.getenv("GOALER_STREAM")
+    if flag is None:
+        return True
+    return flag.strip().lower() not in {"0", "false", "no"}
+
+
+def _stream_completion(client: OpenAI, **request) -> StreamedReply:
+    """Request a streamed completion and print content deltas as they arrive.
+
+    A stream that breaks after printing is raised as :class:`AttemptAborted`:
+    retrying it would print the reply a second time.
+    """
+
+    printed = False
+
+    def _print_delta(text: str) -> None:
+        nonlocal printed
+        if not printed:
+            print("Goaler: ", end="")
+            printed = True
+        print(text, end="", flush=True)
+
+    started = time.perf_counter()
+    stream = client.chat.completions.create(
+        **request, stream=True, stream_options={"include_usage": True}
+    )
+    try:
+        reply = StreamedReply.consume(stream, _print_delta, started_at=started)
+    except RETRYABLE_ERRORS as exc:
+        if not printed:
+            raise
+        print(flush=True)
+        raise AttemptAborted(f"stream broke after output: {exc}") from exc
+    if printed:
+        print(flush=True)
+    return reply
+
+
 def _run_mock_conversation():
     """Fallback loop that emulates the agent without external API calls."""
 
@@ -132,6 +352,119 @@ def _run_mock_conversation():
         )
 
 
+def _run_turn(
+    client: OpenAI,
+    router: ModelRouter,
+    cache: LLMResponseCache | None,
+    history: ContextWindow,
+    agent_tools: dict,
+    dispatcher: ToolDispatcher,
+    conversation_id: str,
+    *,
+    streaming: bool,
+) -> None:
+    """Answer the last user message, dispatching tool calls until the model replies in text."""
+
+    while True:
+        request = {
+            "messages": history.messages(),
+            "tools": TOOL_SCHEMAS,
+            "tool_choice": "auto",
+        }
+        context = {"conversation_id": history.conversation_id, **history.stats()}
+        try:
+            if streaming:
+                # Streamed replies are printed as they arrive, so they are
+                # never hedged (two streams would interleave) or cached.
+                reply, route = _routed(
+                    router,
+                    "goal_planning",
+                    lambda model, timeout: _stream_completion(
+                        client, model=model, timeout=timeout, **request
+                    ),
+                    context,
+                    hedge=False,
+                )
+                _log_llm_usage(route["model"], _usage_to_dict(reply.usage), {**route, **context})
+                response_message = reply
+                history_message = reply.to_message()
+            else:
+                response = _completion(
+                    client, router, cache, "goal_planning", context, **request
+                )
+                response_message = history_message = response.choices[0].message
+        except RouteFailed as exc:
+            print(
+                f"오류: 모델 응답을 받지 못했습니다({exc.__cause__}). 잠시 후 다시 입력해주세요.",
+                flush=True,
+            )
+            return
+
+        if not response_message.tool_calls:
+            final_text = response_message.content
+            if final_text:
+                if not streaming:
+                    print(f"Goaler: {final_text}", flush=True)
+                history.append({"role": "assistant", "content": final_text})
+            return
+
+        history.append(history_message)
+        prepared: list[tuple[str, ToolCall]] = []
+        for tool_call in response_message.tool_calls:
+            function_name = tool_call.function.name
+            agent_method = agent_tools.get(function_name)
+
+            if not agent_method:
+                print(
+                    f"오류: 알 수 없는 함수({function_name}) 호출을 시도했습니다.",
+                    flush=True,
+                )
+                continue
+
+            function_args = json.loads(tool_call.function.arguments or "{}")
+            function_args["conversation_id"] = conversation_id
+
+            if (
+                function_name == "add_metric"
+                and "metric_details" not in function_args
+                and {"metric_name", "metric_type", "target_value", "unit"}.issubset(
+                    function_args.keys()
+                )
+            ):
+                function_args["metric_details"] = {
+                    key: function_args[key]
+                    for key in (
+                        "metric_name",
+                        "metric_type",
+                        "target_value",
+                        "unit",
+                        "initial_value",
+                    )
+                    if key in function_args
+                }
+
+            print(
+                f"--- TOOL CALL: {function_name}({function_args}) with conv_id: {conversation_id} ---",
+                flush=True,
+            )
+
+            prepared.append(
+                (tool_call.id, ToolCall(function_name, agent_method, function_args))
+            )
+
+        # Independent calls run concurrently; replies keep the model's order.
+        results = dispatcher.run([call for _, call in prepared])
+        for (tool_call_id, call), tool_response in zip(prepared, results):
+            history.append(
+                {
+                    "tool_call_id": tool_call_id,
+                    "role": "tool",
+                    "name": call.name,
+                    "content": json.dumps(tool_response),
+                }
+            )
+
+
 def _run_openai_conversation():
     """Runs the main conversational loop using the OpenAI API."""
 
@@ -145,209 +478,28 @@ def _run_openai_conversation():
         )
         return
 
+    cache = _llm_cache()
+    router = _llm_router()
     agent = GoalSettingAgent()
-    agent_tools = {
-        "create_goal": agent.create_goal,
-        "add_metric": agent.add_metric,
-        "set_motivation": agent.set_motivation,
-        "finalize_goal": agent.finalize_goal,
-        "define_boss_stages": agent.define_boss_stages,
-        "propose_weekly_plan": agent.propose_weekly_plan,
-        "propose_daily_tasks": agent.propose_daily_tasks,
-        "choose_quest": agent.choose_quest,
-        "propose_quests": agent.propose_quests,
-        "log_quest_outcome": agent.log_quest_outcome,
-    }
-
-    model_name = DEFAULT_CHAT_MODEL
-
-    tools_json_schema = [
-        {
-            "type": "function",
-            "function": {
-                "name": "create_goal",
-                "description": "Creates a new goal. This should be the first step.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "title": {
-                            "type": "string",
-                            "description": "A short, descriptive title for the goal.",
-                        }
-                    },
-                    "required": ["title"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "add_metric",
-                "description": "Adds a new measurable metric to the current goal.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "metric_details": {
-                            "type": "object",
-                            "description": "Full metric payload to append to the goal.",
-                            "properties": {
-                                "metric_name": {"type": "string"},
-                                "metric_type": {"type": "string"},
-                                "target_value": {"type": "number"},
-                                "unit": {"type": "string"},
-                                "initial_value": {"type": "number"},
-                            },
-                            "required": [
-                                "metric_name",
-                                "metric_type",
-                                "target_value",
-                                "unit",
-                            ],
-                        },
-                        "metric_name": {"type": "string"},
-                        "metric_type": {"type": "string"},
-                        "target_value": {"type": "number"},
-                        "unit": {"type": "string"},
-                        "initial_value": {"type": "number"},
-                    },
-                    "required": [],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "define_boss_stages",
-                "description": "Persists boss stage candidates for the goal.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "boss_candidates": {
-                            "type": "array",
-                            "items": {"type": "object"},
-                        },
-                        "goal_id": {"type": "string"},
-                    },
-                    "required": ["boss_candidates", "goal_id"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "propose_weekly_plan",
-                "description": "Registers weekly plan steps for a boss stage.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "goal_id": {"type": "string"},
-                        "boss_id": {"type": "string"},
-                        "weekly_plan": {"type": "array", "items": {"type": "object"}},
-                    },
-                    "required": ["goal_id", "boss_id", "weekly_plan"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "propose_daily_tasks",
-                "description": "Suggests daily tasks for the selected weekly step.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "goal_id": {"type": "string"},
-                        "weekly_step": {"type": "object"},
-                        "daily_tasks": {"type": "array", "items": {"type": "object"}},
-                    },
-                    "required": ["goal_id", "weekly_step", "daily_tasks"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "propose_quests",
-                "description": "Offers quest variations for user choice.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "goal_id": {"type": "string"},
-                        "candidate_pool": {
-                            "type": "array",
-                            "items": {"type": "object"},
-                        },
-                    },
-                    "required": ["goal_id", "candidate_pool"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "choose_quest",
-                "description": "Locks in a quest variation for execution.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "goal_id": {"type": "string"},
-                        "quest_choice": {"type": "object"},
-                    },
-                    "required": ["goal_id", "quest_choice"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "log_quest_outcome",
-                "description": "Logs the result of a quest execution.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "goal_id": {"type": "string"},
-                        "quest_id": {"type": "string"},
-                        "occurred_at": {"type": "string"},
-                        "outcome": {"type": "string"},
-                        "energy_status": {"type": "string"},
-                        "loot_type": {"type": "string"},
-                        "perceived_difficulty": {"type": "string"},
-                        "mood_note": {"type": "string"},
-                        "llm_variation_seed": {"type": "string"},
-                    },
-                    "required": ["goal_id", "quest_id", "occurred_at", "outcome"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "set_motivation",
-                "description": "Sets the user's motivation for the goal.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "text": {
-                            "type": "string",
-                            "description": "The user's motivation.",
-                        }
-                    },
-                    "required": ["text"],
-                },
-            },
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "finalize_goal",
-                "description": "Finalizes the goal-setting process.",
-                "parameters": {"type": "object", "properties": {}},
-            },
-        },
-    ]
+    agent_tools = {name: getattr(agent, name) for name in TOOL_NAMES}
+    dispatcher = ToolDispatcher.for_agent(agent)
+    streaming = _use_streaming()
 
     conversation_id = f"conv_{uuid.uuid4()}"
-    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    storage = getattr(agent, "storage", None)
+    history = ContextWindow(
+        SYSTEM_PROMPT,
+        conversation_id=conversation_id,
+        max_tokens=_env_int("GOALER_CONTEXT_TOKENS", DEFAULT_MAX_TOKENS),
+        keep_turns=_env_int("GOALER_CONTEXT_KEEP_TURNS", DEFAULT_KEEP_TURNS),
+        summarizer=_llm_summarizer(client, cache, router, conversation_id),
+        # Resolved per call: the summary may be written from another thread.
+        on_summary=(
+            (lambda payload: storage.create_conversation_summary(payload))
+            if storage is not None
+            else None
+        ),
+    )
 
     print(
         "--- Goaler (OpenAI) 준비 완료. 대화를 시작하세요. (종료하려면 'exit' 입력) ---",
@@ -358,87 +510,38 @@ def _run_openai_conversation():
         user_input = input("> ")
         if user_input.lower() == "exit":
             print("대화를 종료합니다.")
+            dispatcher.close()
+            router.close()
+            if cache is not None:
+                cache.close()
             break
 
-        messages.append({"role": "user", "content": user_input})
-
-        while True:
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                tools=tools_json_schema,
-                tool_choice="auto",
-            )
-            usage_dict = _usage_to_dict(getattr(response, "usage", None))
-            _log_llm_usage(model_name, usage_dict)
-            response_message = response.choices[0].message
-
-            if not response_message.tool_calls:
-                final_text = response_message.content
-                if final_text:
-                    print(f"Goaler: {final_text}", flush=True)
-                    messages.append({"role": "assistant", "content": final_text})
-                break
-
-            messages.append(response_message)
-            for tool_call in response_message.tool_calls:
-                function_name = tool_call.function.name
-                agent_method = agent_tools.get(function_name)
-
-                if not agent_method:
-                    print(
-                        f"오류: 알 수 없는 함수({function_name}) 호출을 시도했습니다.",
-                        flush=True,
-                    )
-                    continue
-
-                function_args = json.loads(tool_call.function.arguments or "{}")
-                function_args["conversation_id"] = conversation_id
-
-                if (
-                    function_name == "add_metric"
-                    and "metric_details" not in function_args
-                    and {"metric_name", "metric_type", "target_value", "unit"}.issubset(
-                        function_args.keys()
-                    )
-                ):
-                    function_args["metric_details"] = {
-                        key: function_args[key]
-                        for key in (
-                            "metric_name",
-                            "metric_type",
-                            "target_value",
-                            "unit",
-                            "initial_value",
-                        )
-                        if key in function_args
-                    }
-
-                print(
-                    f"--- TOOL CALL: {function_name}({function_args}) with conv_id: {conversation_id} ---",
-                    flush=True,
-                )
-
-                tool_response = agent_method(**function_args)
-
-                messages.append(
-                    {
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": json.dumps(tool_response),
-                    }
-                )
+        history.append({"role": "user", "content": user_input})
+
+        _run_turn(
+            client,
+            router,
+            cache,
+            history,
+            agent_tools,
+            dispatcher,
+            conversation_id,
+            streaming=streaming,
+        )
 
 
 def run_conversation():
     """Entry point that selects mock or OpenAI-backed chat loop."""
 
     load_dotenv()
-    if _use_mock_mode():
-        _run_mock_conversation()
-    else:
-        _run_openai_conversation()
+    try:
+        if _use_mock_mode():
+            _run_mock_conversation()
+        else:
+            _run_openai_conversation()
+    finally:
+        _close_usage_writers()
+        dispose_all()
 
 
 if __name__ == "__main__":
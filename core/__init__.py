@@ -3,6 +3,17 @@
 __all__ = [
     "agent",
     "state_manager",
+    "state_backends",
+    "conversation_state",
+    "context_window",
+    "llm_cache",
     "llm_prompt",
+    "llm_router",
+    "llm_stream",
     "storage",
+    "storage_cache",
+    "tool_dispatch",
+    "tool_schema",
+    "usage_log",
+    "write_behind",
 ]
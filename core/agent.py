@@ -2,14 +2,22 @@
 
 from __future__ import annotations
 
+import time
 from datetime import datetime, timezone
 from textwrap import dedent
-from typing import Any, Iterable
+from typing import TYPE_CHECKING, Any, Iterable
 
-from .storage import SQLAlchemyStorage, create_session
+from sqlalchemy.exc import IntegrityError
 
+from .storage import SQLAlchemyStorage, ThreadLocalStorage
+
+from .conversation_state import ConversationState
 from .state_manager import StateManager
 
+if TYPE_CHECKING:
+    from .storage_cache import CachedStorage
+    from .write_behind import WriteBehindStorage
+
 STAGE_0 = "STAGE_0_ONBOARDING"
 
 
@@ -27,22 +35,30 @@ def _coerce_metric_details(
     metric_details: dict | None,
     metric_kwargs: dict,
 ) -> dict | None:
-    """Normalize metric payloads coming from the LLM tool call."""
-
-    if metric_details is not None:
-        return metric_details
-
-    if not metric_kwargs:
-        return None
+    """Normalize metric payloads coming from the LLM tool call.
 
-    allowed = {"metric_name", "metric_type", "target_value", "unit", "initial_value"}
-    filtered = {key: value for key, value in metric_kwargs.items() if key in allowed}
-    required = {"metric_name", "metric_type", "target_value", "unit"}
+    Raises ``ValueError`` for a metric that ``finalize_goal`` could not
+    store: one without a ``metric_name`` or with non-numeric values.
+    """
 
-    if required.issubset(filtered):
-        return filtered
+    if metric_details is None:
+        if not metric_kwargs:
+            return None
+        allowed = {"metric_name", "metric_type", "target_value", "unit", "initial_value"}
+        filtered = {key: value for key, value in metric_kwargs.items() if key in allowed}
+        required = {"metric_name", "metric_type", "target_value", "unit"}
+        if not required.issubset(filtered):
+            return None
+        metric_details = filtered
 
-    return None
+    name = metric_details.get("metric_name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("metric_name is required")
+    for key in ("target_value", "initial_value"):
+        value = metric_details.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f"{key} must be a number")
+    return metric_details
 
 
 SYSTEM_PROMPT = dedent(
@@ -93,26 +109,34 @@ SYSTEM_PROMPT = dedent(
 class GoalSettingAgent:
     """Manage the conversation state while responding to tool calls."""
 
-    def __init__(self, *, storage: SQLAlchemyStorage | None = None) -> None:
-        self.state_manager = StateManager()
-        self.storage = storage or SQLAlchemyStorage(create_session())
+    def __init__(
+        self,
+        *,
+        storage: (
+            SQLAlchemyStorage | ThreadLocalStorage | CachedStorage | WriteBehindStorage | None
+        ) = None,
+        state_manager: StateManager | None = None,
+    ) -> None:
+        self.state_manager = state_manager or StateManager()
+        # Per-thread sessions let ToolDispatcher run tools concurrently.
+        self.storage = storage or ThreadLocalStorage()
 
     def create_goal(self, conversation_id: str, title: str) -> dict | None:
         """Initialise a new goal in the state manager."""
 
         goal_record = self.storage.create_goal({"title": title})
-        initial_state: dict[str, Any] = {
-            "goal_id": goal_record["goal_id"],
-            "goal_title": goal_record["title"],
-            "metrics": [],
-            "motivation": None,
-            "onboarding_stage": STAGE_0,
-            "feature_flags": _default_feature_flags(),
-            "boss_stage_ids": [],
-            "weekly_plan": {},
-            "current_variations": [],
-            "accepted_quests": [],
-        }
+        initial_state = ConversationState(
+            goal_id=goal_record["goal_id"],
+            goal_title=goal_record["title"],
+            metrics=[],
+            motivation=None,
+            onboarding_stage=STAGE_0,
+            feature_flags=_default_feature_flags(),
+            boss_stage_ids=(),
+            weekly_plan={},
+            current_variations=[],
+            accepted_quests=(),
+        )
         self.state_manager.new_conversation(conversation_id, initial_state)
         return self.state_manager.get_state(conversation_id)
 
@@ -124,40 +148,56 @@ class GoalSettingAgent:
     ) -> dict | None:
         """Append a metric to the goal state if enough information is provided."""
 
-        current_state = self.state_manager.get_state(conversation_id)
-        if not current_state:
-            return None
-
-        normalized = _coerce_metric_details(metric_details, metric_kwargs)
-        if normalized is None:
-            # Nothing to add yet; keep the snapshot so the LLM can recover.
-            return current_state
-
-        current_state.setdefault("metrics", []).append(normalized)
-        self.state_manager.update_state(conversation_id, current_state)
-        return current_state
+        try:
+            normalized = _coerce_metric_details(metric_details, metric_kwargs)
+        except ValueError as exc:
+            return {"status": "error", "conversation_id": conversation_id, "error": str(exc)}
+        if normalized is not None:
+            self.state_manager.append(conversation_id, "metrics", normalized)
+        # Without a metric the unchanged snapshot lets the LLM recover.
+        return self.state_manager.get_state(conversation_id)
 
     def set_motivation(self, conversation_id: str, text: str) -> dict | None:
         """Record the motivation associated with the current goal."""
 
-        current_state = self.state_manager.get_state(conversation_id)
-        if not current_state:
+        if not self.state_manager.set(conversation_id, "motivation", text):
             return None
+        return self.state_manager.get_state(conversation_id)
 
-        current_state["motivation"] = text
-        self.state_manager.update_state(conversation_id, current_state)
-        return current_state
-
-    def finalize_goal(self, conversation_id: str) -> bool:
-        """Log the final state and clear the conversation cache."""
-
-        final_state = self.state_manager.get_state(conversation_id)
-        print(
-            "--- DB: Saving final state for"
-            f" {conversation_id} to database: {final_state} ---"
-        )
-        self.state_manager.end_conversation(conversation_id)
-        return True
+    def finalize_goal(self, conversation_id: str) -> dict:
+        """Flush the conversation draft in one transaction and clear it.
+
+        Motivation, metrics and the weekly plan are written together. A retry
+        after a successful finalize finds no draft and writes nothing; a
+        retry after a failed one rewrites the same rows. A draft the storage
+        rejects is kept and reported as an ``error`` result for the model.
+        """
+
+        with self.state_manager.locked(conversation_id):
+            state = self.state_manager.get_state(conversation_id)
+            if state is None:
+                return {"status": "noop", "conversation_id": conversation_id}
+            result: dict[str, Any] = {"status": "ok", "conversation_id": conversation_id}
+            if state.get("goal_id"):
+                started = time.perf_counter()
+                try:
+                    result.update(
+                        self.storage.finalize_goal(
+                            state["goal_id"],
+                            motivation=state.get("motivation"),
+                            metrics=state.get("metrics") or [],
+                            weekly_plan=state.get("weekly_plan") or {},
+                        )
+                    )
+                except (ValueError, IntegrityError) as exc:
+                    return {"status": "error", "conversation_id": conversation_id, "error": str(exc)}
+                result["write_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                print(
+                    f"--- DB: Finalized goal {state['goal_id']} for {conversation_id}"
+                    f" in {result['write_ms']:.1f} ms ---"
+                )
+            self.state_manager.end_conversation(conversation_id)
+        return result
 
     def get_onboarding_context(self, conversation_id: str) -> dict[str, Any]:
         """Expose onboarding stage and feature flags for UI/adapters."""
@@ -187,21 +227,25 @@ class GoalSettingAgent:
     ) -> dict:
         """Persist boss stages and update conversational snapshot."""
 
-        current_state = self.state_manager.get_state(conversation_id) or {}
-        existing = current_state.setdefault("boss_stage_ids", [])
-
-        goal_id = current_state.get("goal_id", goal_id)
-        created: list[dict] = []
-        next_order = len(existing) + 1
-        for candidate in boss_candidates:
-            payload = {**candidate}
-            payload.setdefault("stage_order", next_order)
-            next_order += 1
-            stage_dict = self.storage.create_boss_stage(goal_id, payload)
-            created.append(stage_dict)
-
-        existing.extend(stage_dict["boss_id"] for stage_dict in created)
-        self.state_manager.update_state(conversation_id, current_state)
+        # Stage order is derived from the stages already recorded, so concurrent
+        # calls for this conversation must not interleave.
+        with self.state_manager.locked(conversation_id):
+            goal_id = self.state_manager.get(conversation_id, "goal_id", goal_id)
+            existing = self.state_manager.get(conversation_id, "boss_stage_ids") or []
+            payloads: list[dict] = []
+            next_order = len(existing) + 1
+            for candidate in boss_candidates:
+                payload = {**candidate}
+                payload.setdefault("stage_order", next_order)
+                next_order += 1
+                payloads.append(payload)
+            created = self.storage.create_boss_stages(goal_id, payloads)
+
+            self.state_manager.extend(
+                conversation_id,
+                "boss_stage_ids",
+                (stage_dict["boss_id"] for stage_dict in created),
+            )
         return {"status": "ok", "boss_stages": created}
 
     def propose_weekly_plan(
@@ -213,11 +257,8 @@ class GoalSettingAgent:
     ) -> dict:
         """Attach weekly plan entries to the current boss preparation."""
 
-        current_state = self.state_manager.get_state(conversation_id) or {}
-        weekly_map = current_state.setdefault("weekly_plan", {})
         entries = list(weekly_plan)
-        weekly_map[boss_id] = entries
-        self.state_manager.update_state(conversation_id, current_state)
+        self.state_manager.set(conversation_id, ("weekly_plan", boss_id), entries)
         return {
             "status": "ok",
             "weekly_plan": entries,
@@ -232,11 +273,10 @@ class GoalSettingAgent:
     ) -> dict:
         """Store pending daily variations for user confirmation."""
 
-        current_state = self.state_manager.get_state(conversation_id) or {}
         entries = list(daily_tasks)
-        current_state["current_variations"] = entries
-        current_state["last_weekly_step"] = weekly_step
-        self.state_manager.update_state(conversation_id, current_state)
+        with self.state_manager.mutate(conversation_id) as draft:
+            draft["current_variations"] = entries
+            draft["last_weekly_step"] = weekly_step
         return {
             "status": "ok",
             "daily_tasks": entries,
@@ -250,12 +290,11 @@ class GoalSettingAgent:
     ) -> dict:
         """Confirm quest selection and persist via storage."""
 
-        current_state = self.state_manager.get_state(conversation_id) or {}
-        goal_id = current_state.get("goal_id", goal_id)
+        goal_id = self.state_manager.get(conversation_id, "goal_id", goal_id)
         quest = self.storage.create_quest(goal_id, quest_choice)
-        current_state.setdefault("accepted_quests", []).append(quest["quest_id"])
-        current_state["current_variations"] = []
-        self.state_manager.update_state(conversation_id, current_state)
+        with self.state_manager.locked(conversation_id):
+            self.state_manager.append(conversation_id, "accepted_quests", quest["quest_id"])
+            self.state_manager.set(conversation_id, "current_variations", [])
         return {
             "status": "ok",
             "quest": quest,
@@ -264,16 +303,19 @@ class GoalSettingAgent:
     def log_quest_outcome(
         self,
         conversation_id: str,
-        payload: dict,
+        payload: dict | None = None,
+        **fields: Any,
     ) -> dict:
-        """Record quest execution outcome in storage and update state."""
+        """Record quest execution outcome in storage and update state.
 
-        payload = dict(payload)
+        The tool schema sends the log fields as top-level arguments; callers
+        may also pass them as one ``payload`` dict.
+        """
+
+        payload = {**(payload or {}), **fields}
         payload.setdefault("occurred_at", datetime.now(timezone.utc))
         log = self.storage.log_quest_event(payload)
-        current_state = self.state_manager.get_state(conversation_id) or {}
-        current_state.setdefault("quest_logs", []).append(log["log_id"])
-        self.state_manager.update_state(conversation_id, current_state)
+        self.state_manager.append(conversation_id, "quest_logs", log["log_id"])
         return {
             "status": "ok",
             "log": log,
@@ -302,9 +344,7 @@ class GoalSettingAgent:
             variation.setdefault("difficulty_tier", "NORMAL")
             variations.append(variation)
 
-        current_state = self.state_manager.get_state(conversation_id) or {}
-        current_state["current_variations"] = variations
-        self.state_manager.update_state(conversation_id, current_state)
+        self.state_manager.set(conversation_id, "current_variations", variations)
         return {
             "status": "ok",
             "variations": variations,
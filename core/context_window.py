@@ -0,0 +1,235 @@
+"""Token-budgeted message history for the chat loop."""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+DEFAULT_MAX_TOKENS = 6000
+DEFAULT_KEEP_TURNS = 6
+# Per-message framing the chat format adds on top of the content.
+_MESSAGE_OVERHEAD = 4
+_SUMMARY_PREFIX = "지금까지의 대화 요약 (오래된 턴은 요약으로 대체됨):\n"
+_SNIPPET_CHARS = 160
+
+Summarizer = Callable[[str | None, list[list[dict]]], str]
+SummaryHook = Callable[[dict], None]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough tokenizer-free estimate: ~4 ASCII chars or 1 non-ASCII char per token."""
+
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return math.ceil((len(text) - non_ascii) / 4) + non_ascii
+
+
+def _as_dict(message: Any) -> dict:
+    if isinstance(message, dict):
+        return message
+    dump = getattr(message, "model_dump", None)
+    if callable(dump):
+        return dump(exclude_none=True)
+    # Any other message-like object: keep what the chat format needs.
+    result: dict[str, Any] = {
+        "role": getattr(message, "role", "assistant"),
+        "content": getattr(message, "content", None),
+    }
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        result["tool_calls"] = [
+            {
+                "id": call.id,
+                "type": "function",
+                "function": {"name": call.function.name, "arguments": call.function.arguments},
+            }
+            for call in tool_calls
+        ]
+    return result
+
+
+def message_tokens(message: dict, counter: Callable[[str], int] = estimate_tokens) -> int:
+    tokens = _MESSAGE_OVERHEAD + counter(str(message.get("content") or ""))
+    for call in message.get("tool_calls") or ():
+        function = call.get("function") or {}
+        tokens += counter(function.get("name") or "") + counter(function.get("arguments") or "")
+    return tokens
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= _SNIPPET_CHARS else text[: _SNIPPET_CHARS - 1] + "…"
+
+
+def extractive_summary(previous: str | None, turns: list[list[dict]]) -> str:
+    """Summarize without an LLM: one clipped line per user/assistant/tool step."""
+
+    lines = [previous] if previous else []
+    for turn in turns:
+        for message in turn:
+            role = message.get("role")
+            if role == "user":
+                lines.append(f"- 사용자: {_snippet(str(message.get('content') or ''))}")
+            elif role == "assistant":
+                if message.get("content"):
+                    lines.append(f"- Goaler: {_snippet(str(message['content']))}")
+                for call in message.get("tool_calls") or ():
+                    function = call.get("function") or {}
+                    arguments = _snippet(function.get("arguments") or "")
+                    lines.append(f"- 도구 {function.get('name')}({arguments})")
+    return "\n".join(lines)
+
+
+class _Turn:
+    __slots__ = ("messages", "tokens", "started_at")
+
+    def __init__(self, started_at: datetime) -> None:
+        self.messages: list[dict] = []
+        self.tokens = 0
+        self.started_at = started_at
+
+
+class ContextWindow:
+    """Keep the system prompt, a rolling summary and the last ``keep_turns`` turns.
+
+    A turn starts at a user message and holds the assistant replies, tool
+    calls and tool results that follow, so a tool result is never separated
+    from the call it answers. When the estimated prompt exceeds ``max_tokens``
+    the oldest turns outside the last ``keep_turns`` are folded into the
+    summary with ``summarizer(previous_summary, turns)``, whose oldest lines
+    are dropped beyond ``summary_tokens`` (a quarter of the budget by
+    default); ``on_summary`` receives each new summary as a
+    ``conversation_summaries`` payload.
+    Recent turns are never dropped, so the prompt can still exceed the
+    budget when they alone do.
+
+    :meth:`stats` reports the estimated tokens of the last prompt and of the
+    full unbounded history, and the difference (tokens saved) for the last
+    request and in total.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        *,
+        conversation_id: str | None = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        keep_turns: int = DEFAULT_KEEP_TURNS,
+        summary_tokens: int | None = None,
+        summarizer: Summarizer = extractive_summary,
+        on_summary: SummaryHook | None = None,
+        token_counter: Callable[[str], int] = estimate_tokens,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be positive")
+        if keep_turns < 1:
+            raise ValueError("keep_turns must be positive")
+        self.conversation_id = conversation_id
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summary_tokens = max_tokens // 4 if summary_tokens is None else summary_tokens
+        self._summarizer = summarizer
+        self._on_summary = on_summary
+        self._count = token_counter
+        self._clock = clock
+        self._system = {"role": "system", "content": system_prompt}
+        self._system_tokens = message_tokens(self._system, token_counter)
+        self._turns: list[_Turn] = []
+        self.summary: str | None = None
+        self._summary_tokens = 0
+        self._summary_start: datetime | None = None
+        self._full_tokens = self._system_tokens
+        self.total_saved = 0
+        self.summaries = 0
+        self.last_prompt_tokens = self._system_tokens
+        self.last_saved = 0
+
+    def append(self, message: Any) -> None:
+        """Add a message; SDK and other message objects become plain dicts."""
+
+        message = _as_dict(message)
+        if message.get("role") == "user" or not self._turns:
+            self._turns.append(_Turn(self._clock()))
+        tokens = message_tokens(message, self._count)
+        turn = self._turns[-1]
+        turn.messages.append(message)
+        turn.tokens += tokens
+        self._full_tokens += tokens
+
+    def _prompt_tokens(self) -> int:
+        return self._system_tokens + self._summary_tokens + sum(turn.tokens for turn in self._turns)
+
+    def _fold(self) -> None:
+        if self._prompt_tokens() <= self.max_tokens:
+            return
+        # Leave room for the summary that replaces the folded turns.
+        tokens = self._system_tokens + self.summary_tokens + sum(turn.tokens for turn in self._turns)
+        folded: list[_Turn] = []
+        while tokens > self.max_tokens and len(self._turns) > self.keep_turns:
+            turn = self._turns.pop(0)
+            tokens -= turn.tokens
+            folded.append(turn)
+        if not folded:
+            return
+        summary = self._summarizer(self.summary, [turn.messages for turn in folded])
+        self.summary = self._clip_summary(summary)
+        self._summary_tokens = message_tokens(self._summary_message(), self._count)
+        self._summary_start = self._summary_start or folded[0].started_at
+        self.summaries += 1
+        if self._on_summary is not None:
+            self._on_summary(
+                {
+                    "conversation_id": self.conversation_id,
+                    "period_start": self._summary_start,
+                    "period_end": self._turns[0].started_at if self._turns else self._clock(),
+                    "summary_text": self.summary,
+                }
+            )
+
+    def _clip_summary(self, summary: str) -> str:
+        """Drop the oldest summary lines until it fits ``summary_tokens``."""
+
+        lines = summary.splitlines()
+        while len(lines) > 1 and message_tokens(
+            {"content": _SUMMARY_PREFIX + "\n".join(lines)}, self._count
+        ) > self.summary_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def _summary_message(self) -> dict:
+        return {"role": "system", "content": _SUMMARY_PREFIX + (self.summary or "")}
+
+    def messages(self) -> list[dict]:
+        """Return the prompt for the next request, folding old turns if needed."""
+
+        self._fold()
+        prompt = [self._system]
+        if self.summary:
+            prompt.append(self._summary_message())
+        for turn in self._turns:
+            prompt.extend(turn.messages)
+        self.last_prompt_tokens = self._prompt_tokens()
+        self.last_saved = self._full_tokens - self.last_prompt_tokens
+        self.total_saved += self.last_saved
+        return prompt
+
+    def stats(self) -> dict:
+        return {
+            "prompt_tokens_estimate": self.last_prompt_tokens,
+            "full_history_tokens_estimate": self._full_tokens,
+            "tokens_saved": self.last_saved,
+            "tokens_saved_total": self.total_saved,
+            "summaries": self.summaries,
+            "turns_kept": len(self._turns),
+        }
+
+
+__all__ = [
+    "DEFAULT_KEEP_TURNS",
+    "DEFAULT_MAX_TOKENS",
+    "ContextWindow",
+    "estimate_tokens",
+    "extractive_summary",
+    "message_tokens",
+]
@@ -0,0 +1,156 @@
+"""Compact in-memory representation of one conversation's goal draft."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Iterator
+
+
+class _Unset:
+    """Marks a field the conversation never set, so ``to_dict`` can omit it."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<unset>"
+
+
+_UNSET: Any = _Unset()
+
+
+class ConversationState(Mapping):
+    """``__slots__`` record for the keys the agent tools read and write.
+
+    The id lists (``boss_stage_ids``, ``accepted_quests``, ``quest_logs``)
+    are stored as tuples. Keys outside :attr:`FIELDS` go to a lazily created
+    ``extras`` dict. It is a ``Mapping`` with item assignment and deletion,
+    which is all :class:`~core.state_manager.StateManager` needs.
+    ``to_dict``/``from_dict`` round-trip losslessly apart from key order:
+    known fields always come first, in :attr:`FIELDS` order.
+    """
+
+    FIELDS = (
+        "goal_id",
+        "goal_title",
+        "metrics",
+        "motivation",
+        "onboarding_stage",
+        "feature_flags",
+        "boss_stage_ids",
+        "weekly_plan",
+        "current_variations",
+        "accepted_quests",
+        "last_weekly_step",
+        "quest_logs",
+    )
+    ID_LIST_FIELDS = frozenset({"boss_stage_ids", "accepted_quests", "quest_logs"})
+    _FIELD_SET = frozenset(FIELDS)
+
+    __slots__ = FIELDS + ("extras",)
+
+    # Slot types for checkers; a field the conversation never set holds ``_UNSET``.
+    goal_id: Any
+    goal_title: Any
+    metrics: Any
+    motivation: Any
+    onboarding_stage: Any
+    feature_flags: Any
+    boss_stage_ids: tuple[str, ...]
+    weekly_plan: Any
+    current_variations: Any
+    accepted_quests: tuple[str, ...]
+    last_weekly_step: Any
+    quest_logs: tuple[str, ...]
+
+    def __init__(self, **values: Any) -> None:
+        for name in self.FIELDS:
+            setattr(self, name, _UNSET)
+        self.extras: dict[str, Any] | None = None
+        for key, value in values.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "ConversationState":
+        return cls(**data)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a plain dict (id tuples become lists) for JSON and callers."""
+        result: dict[str, Any] = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is _UNSET:
+                continue
+            if name in self.ID_LIST_FIELDS and isinstance(value, tuple):
+                value = list(value)
+            result[name] = value
+        if self.extras:
+            result.update(self.extras)
+        return result
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is _UNSET:
+                raise KeyError(key)
+            return value
+        if self.extras is None:
+            raise KeyError(key)
+        return self.extras[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self._FIELD_SET:
+            if key in self.ID_LIST_FIELDS and isinstance(value, list):
+                value = tuple(value)
+            setattr(self, key, value)
+            return
+        if self.extras is None:
+            self.extras = {}
+        self.extras[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        self[key]  # raises KeyError when missing
+        if key in self._FIELD_SET:
+            setattr(self, key, _UNSET)
+        else:
+            assert self.extras is not None
+            del self.extras[key]
+            if not self.extras:
+                self.extras = None
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._FIELD_SET:
+            return getattr(self, key) is not _UNSET  # type: ignore[arg-type]
+        return self.extras is not None and key in self.extras
+
+    def __iter__(self) -> Iterator[str]:
+        for name in self.FIELDS:
+            if getattr(self, name) is not _UNSET:
+                yield name
+        if self.extras:
+            yield from self.extras
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ConversationState):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ConversationState({self.to_dict()!r})"
+
+    def pop(self, key: str, *default: Any) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+
+__all__ = ["ConversationState"]
@@ -0,0 +1,199 @@
+"""On-disk cache for deterministic Chat Completions requests."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+
+DEFAULT_CACHE_PATH = Path("data/llm_cache.db")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600.0
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Bump when the key layout changes so old entries stop matching.
+_KEY_VERSION = 1
+# Request options that change how a reply is delivered, not what it says.
+_TRANSPORT_OPTIONS = frozenset(
+    {"stream", "stream_options", "timeout", "extra_headers", "extra_query", "user", "metadata", "store"}
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used_at ON llm_cache (last_used_at);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_created_at ON llm_cache (created_at);
+"""
+
+
+def _jsonable(value: Any) -> Any:
+    dump = getattr(value, "model_dump", None)
+    if callable(dump):
+        return dump(exclude_none=True)
+    if isinstance(value, SimpleNamespace):
+        return vars(value)
+    raise TypeError(f"cannot hash {type(value).__name__} in a request")
+
+
+def request_key(request: dict) -> str:
+    """Stable SHA-256 of model, messages, tools and sampling parameters.
+
+    Keys are sorted and whitespace is fixed, so the same request hashes
+    the same across processes; delivery options such as ``stream`` and
+    ``timeout`` are left out.
+    """
+
+    payload = {key: value for key, value in request.items() if key not in _TRANSPORT_OPTIONS}
+    canonical = json.dumps(
+        [_KEY_VERSION, payload],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=_jsonable,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with age and size eviction.
+
+    Entries older than ``ttl_seconds`` are never returned and are deleted on
+    the next write; once the stored responses exceed ``max_bytes`` the least
+    recently used ones are deleted first. Responses are kept as JSON dicts
+    (``model_dump(mode="json")`` of the SDK object), so a hit can be rebuilt
+    without a network round trip. The connection is shared between threads
+    behind a lock; WAL mode lets several processes use the same file.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_CACHE_PATH,
+        *,
+        ttl_seconds: float | None = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _fresh_after(self, now: float) -> float:
+        return float("-inf") if self.ttl_seconds is None else now - self.ttl_seconds
+
+    def get(self, key: str) -> dict | None:
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE cache_key = ? AND created_at > ?",
+                (key, self._fresh_after(now)),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_used_at = ?, hits = hits + 1 WHERE cache_key = ?",
+                (now, key),
+            )
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, response: dict) -> None:
+        body = json.dumps(response, ensure_ascii=False, separators=(",", ":"))
+        now = self._clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache"
+                " (cache_key, model, response, size, created_at, last_used_at, hits)"
+                " VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model, body, len(body.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        removed = self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at <= ?", (self._fresh_after(now),)
+        ).rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total > self.max_bytes:
+            victims = []
+            for key, size in self._conn.execute(
+                "SELECT cache_key, size FROM llm_cache ORDER BY last_used_at, created_at"
+            ):
+                if total <= self.max_bytes:
+                    break
+                victims.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM llm_cache WHERE cache_key = ?", victims)
+            removed += len(victims)
+        self.evictions += removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def cached_create(client: Any, cache: LLMResponseCache | None, **request: Any) -> tuple[Any, bool]:
+    """Call ``client.chat.completions.create`` through ``cache``.
+
+    Returns ``(response, hit)``. Streamed requests and responses that are not
+    SDK objects bypass the cache; a hit is rebuilt as a ``ChatCompletion``.
+    """
+
+    if cache is None or request.get("stream"):
+        return client.chat.completions.create(**request), False
+    key = request_key(request)
+    cached = cache.get(key)
+    if cached is not None:
+        from openai.types.chat import ChatCompletion
+
+        return ChatCompletion.model_validate(cached), True
+    response = client.chat.completions.create(**request)
+    dump = getattr(response, "model_dump", None)
+    if callable(dump):
+        cache.put(key, request.get("model", ""), dump(mode="json"))
+    return response, False
+
+
+__all__ = [
+    "DEFAULT_CACHE_PATH",
+    "DEFAULT_MAX_BYTES",
+    "DEFAULT_TTL_SECONDS",
+    "LLMResponseCache",
+    "cached_create",
+    "request_key",
+]
@@ -1,49 +1,98 @@
-"""Lightweight function schemas presented to the LLM tooling interface."""
+"""Lightweight function schemas presented to the LLM tooling interface.
 
+Each stub's signature is the tool's parameter list: the docstring becomes
+the tool description, ``Annotated`` metadata a parameter description,
+``Literal`` an enum, and parameters without a default are required.
+:mod:`core.tool_schema` turns them into JSON Schema, in the order of
+``__all__`` and of each signature.
+"""
 
-def create_goal(title: str) -> None:
-    """Schema stub for the `create_goal` tool."""
+from typing import Annotated, Literal, NotRequired, TypedDict
 
+MetricType = Literal["INCREMENTAL", "DECREMENTAL", "THRESHOLD"]
 
-def add_metric(
-    metric_name: str,
-    target_value: float,
-    unit: str,
-    metric_type: str = "INCREMENTAL",
-    initial_value: float | None = None,
-) -> None:
-    """Schema stub for the `add_metric` tool."""
 
+class MetricDetails(TypedDict):
+    metric_name: str
+    metric_type: MetricType
+    target_value: float
+    unit: str
+    initial_value: NotRequired[float]
 
-def set_motivation(text: str) -> None:
-    """Schema stub for the `set_motivation` tool."""
 
+def create_goal(
+    title: Annotated[str, "A short, descriptive title for the goal."],
+) -> None:
+    """Creates a new goal. This should be the first step."""
 
-def finalize_goal() -> None:
-    """Schema stub for the `finalize_goal` tool."""
+
+def add_metric(
+    metric_details: Annotated[MetricDetails, "Full metric payload to append to the goal."] | None = None,
+    metric_name: str | None = None,
+    metric_type: MetricType | None = None,
+    target_value: float | None = None,
+    unit: str | None = None,
+    initial_value: float | None = None,
+) -> None:
+    """Adds a new measurable metric to the current goal."""
 
 
-def define_boss_stages(goal_id: str, boss_candidates: list[dict]) -> None:
-    """Schema stub for the `define_boss_stages` tool."""
+def define_boss_stages(boss_candidates: list[dict], goal_id: str) -> None:
+    """Persists boss stage candidates for the goal."""
 
 
 def propose_weekly_plan(goal_id: str, boss_id: str, weekly_plan: list[dict]) -> None:
-    """Schema stub for the `propose_weekly_plan` tool."""
+    """Registers weekly plan steps for a boss stage."""
 
 
 def propose_daily_tasks(
     goal_id: str, weekly_step: dict, daily_tasks: list[dict]
 ) -> None:
-    """Schema stub for the `propose_daily_tasks` tool."""
+    """Suggests daily tasks for the selected weekly step."""
 
 
 def propose_quests(goal_id: str, candidate_pool: list[dict]) -> None:
-    """Schema stub for the `propose_quests` tool."""
+    """Offers quest variations for user choice."""
 
 
 def choose_quest(goal_id: str, quest_choice: dict) -> None:
-    """Schema stub for the `choose_quest` tool."""
+    """Locks in a quest variation for execution."""
+
+
+def log_quest_outcome(
+    goal_id: str,
+    quest_id: str,
+    outcome: Literal["COMPLETED", "SKIPPED", "FAILED", "DEFERRED"],
+    occurred_at: Annotated[str, "ISO-8601 timestamp; defaults to now."] | None = None,
+    energy_status: Literal["READY_FOR_BOSS", "NEEDS_POTION", "KEEPING_PACE"] | None = None,
+    loot_type: Literal["ACHIEVEMENT", "INSIGHT", "EMOTION"] | None = None,
+    perceived_difficulty: Literal["TOO_EASY", "JUST_RIGHT", "TOO_HARD"] | None = None,
+    mood_note: str | None = None,
+    llm_variation_seed: str | None = None,
+) -> None:
+    """Logs the result of a quest execution."""
 
 
-def log_quest_outcome(goal_id: str, quest_id: str, outcome: str) -> None:
-    """Schema stub for the `log_quest_outcome` tool."""
+def set_motivation(
+    text: Annotated[str, "The user's motivation."],
+) -> None:
+    """Sets the user's motivation for the goal."""
+
+
+def finalize_goal() -> None:
+    """Finalizes the goal-setting process."""
+
+
+# Tool order sent to the model; keep it stable so prompt-prefix caching hits.
+__all__ = [
+    "create_goal",
+    "add_metric",
+    "define_boss_stages",
+    "propose_weekly_plan",
+    "propose_daily_tasks",
+    "propose_quests",
+    "choose_quest",
+    "log_quest_outcome",
+    "set_motivation",
+    "finalize_goal",
+]
@@ -0,0 +1,324 @@
+"""Per-task model routing with deadlines, retries, a circuit breaker and hedging."""
+
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Mapping, TypeVar
+
+T = TypeVar("T")
+# ``request(model, timeout_seconds)`` performs one attempt against ``model``.
+Request = Callable[[str, float], T]
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request deadline passed before any attempt succeeded."""
+
+
+class AttemptAborted(Exception):
+    """A failed attempt that must not be retried; the error is its ``__cause__``."""
+
+
+class RouteFailed(Exception):
+    """Every attempt failed; ``route`` is the decision record, the cause the last error."""
+
+    def __init__(self, route: dict) -> None:
+        super().__init__(f"{route['task']}: {route['attempts']} attempt(s) failed on {route['model']}")
+        self.route = route
+
+
+class CircuitBreaker:
+    """Track one model's health from errors and recent latencies.
+
+    The breaker opens after ``failure_threshold`` consecutive failures, or
+    when the p95 of the last ``latency_window`` successful latencies exceeds
+    ``latency_p95_seconds`` (once ``min_latency_samples`` are collected).
+    After ``cooldown_seconds`` it is half-open: one probe request is let
+    through, and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 2,
+        latency_p95_seconds: float | None = None,
+        latency_window: int = 20,
+        min_latency_samples: int = 5,
+        cooldown_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be positive")
+        self.failure_threshold = failure_threshold
+        self.latency_p95_seconds = latency_p95_seconds
+        self.min_latency_samples = min_latency_samples
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self.trips = 0
+        self.trip_reason: str | None = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if self._clock() - self._opened_at >= self.cooldown_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> bool:
+        """Return whether a request may go to this model now."""
+
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                self._opened_at = None
+                self._probing = False
+                self.trip_reason = None
+            self._failures = 0
+            self._latencies.append(latency)
+            if self.latency_p95_seconds is not None and len(self._latencies) >= self.min_latency_samples:
+                if self.p95() > self.latency_p95_seconds:
+                    self._trip("latency")
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._trip("errors")
+
+    def release_probe(self) -> None:
+        """End a half-open probe without an outcome, letting the next request probe."""
+
+        with self._lock:
+            self._probing = False
+
+    def p95(self) -> float:
+        ordered = sorted(self._latencies)
+        return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def _trip(self, reason: str) -> None:
+        self._opened_at = self._clock()
+        self._probing = False
+        self._failures = 0
+        self._latencies.clear()
+        self.trips += 1
+        self.trip_reason = reason
+
+
+class ModelRouter:
+    """Route each task to its ``primary`` or ``fallback`` model from a plan.
+
+    ``plan`` has the shape of ``LLM_MODEL_PLAN``. A call gets one
+    ``deadline_seconds`` budget; every attempt receives the time left as its
+    timeout. Errors listed in ``retry_on`` are retried up to ``max_retries``
+    times with full-jitter exponential backoff, and each model has a
+    :class:`CircuitBreaker`, so once the primary trips the remaining
+    attempts and later calls go to the fallback until a probe succeeds.
+    :class:`AttemptAborted` counts against the model but fails the call at
+    once. Other errors propagate at once and do not count against the model.
+
+    With ``hedge_after_seconds`` set, a hedged call also sends the request
+    to the fallback (or again to the same model) when the first attempt has
+    not finished in time, and takes whichever succeeds first. Only hedge
+    requests that are safe to send twice.
+
+    :meth:`call` returns the result and a decision record for the usage log:
+    task, model, route (``primary``/``fallback``), attempts, hedged, the
+    primary's breaker state and the elapsed ``latency_ms``.
+    """
+
+    def __init__(
+        self,
+        plan: Mapping[str, Mapping[str, Any]],
+        *,
+        deadline_seconds: float = 30.0,
+        max_retries: int = 2,
+        backoff_base_seconds: float = 0.25,
+        backoff_max_seconds: float = 4.0,
+        hedge_after_seconds: float | None = None,
+        retry_on: tuple[type[BaseException], ...] = (Exception,),
+        failure_threshold: int = 2,
+        latency_p95_seconds: float | None = None,
+        cooldown_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        if deadline_seconds <= 0:
+            raise ValueError("deadline_seconds must be positive")
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+        self.plan = plan
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self._retry_on: tuple[type[BaseException], ...] = (
+            DeadlineExceeded, AttemptAborted, *retry_on
+        )
+        self.failure_threshold = failure_threshold
+        self.latency_p95_seconds = latency_p95_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(
+                    failure_threshold=self.failure_threshold,
+                    latency_p95_seconds=self.latency_p95_seconds,
+                    cooldown_seconds=self.cooldown_seconds,
+                    clock=self._clock,
+                )
+            return self._breakers[model]
+
+    def _choose(self, task: str) -> tuple[str, str]:
+        primary = self.plan[task]["primary"]
+        fallback = self.plan[task].get("fallback")
+        if self.breaker(primary).allow() or not fallback:
+            return primary, "primary"
+        return fallback, "fallback"
+
+    def call(self, task: str, request: Request[T], *, hedge: bool = True) -> tuple[T, dict]:
+        """Run ``request`` for ``task``; raise :class:`RouteFailed` when all attempts fail."""
+
+        started = self._clock()
+        deadline = started + self.deadline_seconds
+        attempts = 0
+        hedged = False
+        model, route = self.plan[task]["primary"], "primary"
+        last_error: BaseException | None = None
+        while True:
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                last_error = last_error or DeadlineExceeded(f"{task}: deadline exceeded")
+                break
+            model, route = self._choose(task)
+            attempts += 1
+            try:
+                if hedge and self.hedge_after_seconds is not None:
+                    result, model, hedged = self._hedged(task, model, request, deadline)
+                else:
+                    result = self._timed(model, request, remaining)
+            except self._retry_on as exc:
+                last_error = exc
+                if isinstance(exc, AttemptAborted):
+                    last_error = exc.__cause__ or exc
+                    break
+                if attempts > self.max_retries:
+                    break
+                cap = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (attempts - 1))
+                delay = self._rng() * cap
+                if self._clock() + delay >= deadline:
+                    break
+                self._sleep(delay)
+                continue
+            return result, self._decision(task, model, route, attempts, hedged, started)
+        decision = self._decision(task, model, route, attempts, hedged, started)
+        raise RouteFailed(decision) from last_error
+
+    def _decision(
+        self, task: str, model: str, route: str, attempts: int, hedged: bool, started: float
+    ) -> dict:
+        return {
+            "task": task,
+            "model": model,
+            "route": route,
+            "attempts": attempts,
+            "hedged": hedged,
+            "breaker": self.breaker(self.plan[task]["primary"]).state,
+            "latency_ms": round((self._clock() - started) * 1000, 1),
+        }
+
+    def _timed(self, model: str, request: Request[T], timeout: float) -> T:
+        breaker = self.breaker(model)
+        started = self._clock()
+        try:
+            result = request(model, timeout)
+        except self._retry_on:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Not the model's fault, but a half-open probe must not stay in flight.
+            breaker.release_probe()
+            raise
+        breaker.record_success(self._clock() - started)
+        return result
+
+    def _hedged(self, task: str, model: str, request: Request[T], deadline: float) -> tuple[T, str, bool]:
+        pool = self._executor()
+        pending: dict[Future, str] = {
+            pool.submit(self._timed, model, request, deadline - self._clock()): model
+        }
+        done, _ = wait(pending, timeout=min(self.hedge_after_seconds or 0.0, deadline - self._clock()))
+        hedged = not done
+        if hedged:
+            fallback = self.plan[task].get("fallback")
+            backup = fallback if fallback and model == self.plan[task]["primary"] else model
+            pending[pool.submit(self._timed, backup, request, deadline - self._clock())] = backup
+        error: BaseException | None = None
+        while pending:
+            done, _ = wait(pending, timeout=max(0.0, deadline - self._clock()), return_when=FIRST_COMPLETED)
+            if not done:
+                # The losers keep running in the pool; their outcome still feeds the breakers.
+                raise DeadlineExceeded(f"{task}: deadline exceeded")
+            for future in done:
+                winner = pending.pop(future)
+                try:
+                    return future.result(), winner, hedged
+                except self._retry_on as exc:
+                    error = exc
+        assert error is not None
+        raise error
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-hedge")
+            return self._pool
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+__all__ = [
+    "CLOSED",
+    "HALF_OPEN",
+    "OPEN",
+    "AttemptAborted",
+    "CircuitBreaker",
+    "DeadlineExceeded",
+    "ModelRouter",
+    "RouteFailed",
+]
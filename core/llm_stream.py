@@ -0,0 +1,129 @@
+"""Assemble streamed Chat Completions chunks into one assistant message."""
+
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Iterable
+
+
+def _field(obj: Any, name: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+class StreamedReply:
+    """Collect content deltas, tool-call fragments and usage from a stream.
+
+    ``on_text`` receives every content delta as soon as its chunk arrives.
+    Once the stream is consumed the reply quacks like the SDK's message:
+    ``content`` is the joined text and ``tool_calls`` holds objects with
+    ``id`` and ``function.name``/``function.arguments``, where the argument
+    fragments of each call index are concatenated in arrival order. ``usage``
+    is the SDK object from the final chunk (``stream_options.include_usage``).
+    """
+
+    def __init__(
+        self,
+        on_text: Callable[[str], None] | None = None,
+        *,
+        started_at: float | None = None,
+    ) -> None:
+        self._on_text = on_text
+        self._parts: list[str] = []
+        self._calls: dict[int, dict[str, Any]] = {}
+        self.usage: Any = None
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.first_token_at: float | None = None
+        self.finished_at: float | None = None
+
+    @classmethod
+    def consume(
+        cls,
+        stream: Iterable[Any],
+        on_text: Callable[[str], None] | None = None,
+        *,
+        started_at: float | None = None,
+    ) -> "StreamedReply":
+        """Drain ``stream``; ``started_at`` is the ``perf_counter`` of the request."""
+
+        reply = cls(on_text, started_at=started_at)
+        for chunk in stream:
+            reply.feed(chunk)
+        reply.finished_at = time.perf_counter()
+        return reply
+
+    def feed(self, chunk: Any) -> None:
+        usage = _field(chunk, "usage")
+        if usage is not None:
+            self.usage = usage
+        for choice in _field(chunk, "choices") or ():
+            delta = _field(choice, "delta")
+            if delta is None:
+                continue
+            text = _field(delta, "content")
+            if text:
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+                self._parts.append(text)
+                if self._on_text is not None:
+                    self._on_text(text)
+            for fragment in _field(delta, "tool_calls") or ():
+                self._add_tool_fragment(fragment)
+
+    def _add_tool_fragment(self, fragment: Any) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        call = self._calls.setdefault(
+            _field(fragment, "index") or 0, {"id": None, "name": "", "arguments": []}
+        )
+        if _field(fragment, "id"):
+            call["id"] = _field(fragment, "id")
+        function = _field(fragment, "function")
+        if function is not None:
+            if _field(function, "name"):
+                call["name"] += _field(function, "name")
+            if _field(function, "arguments"):
+                call["arguments"].append(_field(function, "arguments"))
+
+    @property
+    def content(self) -> str | None:
+        return "".join(self._parts) or None
+
+    @property
+    def tool_calls(self) -> list[SimpleNamespace]:
+        return [
+            SimpleNamespace(
+                id=call["id"],
+                type="function",
+                function=SimpleNamespace(name=call["name"], arguments="".join(call["arguments"])),
+            )
+            for _, call in sorted(self._calls.items())
+        ]
+
+    @property
+    def ttft(self) -> float | None:
+        """Seconds from the request to the first content or tool-call delta."""
+
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    def to_message(self) -> dict:
+        """Return the assistant message to append to the request history."""
+
+        message: dict[str, Any] = {"role": "assistant", "content": self.content}
+        if self._calls:
+            message["tool_calls"] = [
+                {
+                    "id": call.id,
+                    "type": "function",
+                    "function": {"name": call.function.name, "arguments": call.function.arguments},
+                }
+                for call in self.tool_calls
+            ]
+        return message
+
+
+__all__ = ["StreamedReply"]
@@ -5,7 +5,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -34,10 +34,21 @@ class Goal(Base):
     quests: Mapped[list["Quest"]] = relationship(
         "Quest", cascade="all, delete-orphan", back_populates="goal"
     )
+    metrics: Mapped[list["Metric"]] = relationship(
+        "Metric", cascade="all, delete-orphan", back_populates="goal"
+    )
 
 
 class BossStage(Base):
     __tablename__ = "boss_stages"
+    __table_args__ = (
+        Index(
+            "ix_boss_stages_goal_id_stage_order_created_at",
+            "goal_id",
+            "stage_order",
+            "created_at",
+        ),
+    )
 
     boss_id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
     goal_id: Mapped[str] = mapped_column(
@@ -56,8 +67,58 @@ class BossStage(Base):
     goal: Mapped[Goal] = relationship("Goal", back_populates="boss_stages")
 
 
+class Metric(Base):
+    __tablename__ = "metrics"
+    __table_args__ = (Index("ix_metrics_goal_id", "goal_id"),)
+
+    metric_id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
+    goal_id: Mapped[str] = mapped_column(
+        ForeignKey("goals.goal_id", ondelete="CASCADE"), nullable=False
+    )
+    metric_name: Mapped[str] = mapped_column(String, nullable=False)
+    metric_type: Mapped[str | None] = mapped_column(String, nullable=True)
+    target_value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    unit: Mapped[str | None] = mapped_column(String, nullable=True)
+    initial_value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    progress: Mapped[float | None] = mapped_column(Float, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    goal: Mapped[Goal] = relationship("Goal", back_populates="metrics")
+
+
+class WeeklyStep(Base):
+    """One entry of the weekly plan the agent proposed for a boss stage."""
+
+    __tablename__ = "weekly_steps"
+    __table_args__ = (
+        Index("ix_weekly_steps_goal_id_boss_id_step_order", "goal_id", "boss_id", "step_order"),
+    )
+
+    step_id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
+    goal_id: Mapped[str] = mapped_column(
+        ForeignKey("goals.goal_id", ondelete="CASCADE"), nullable=False
+    )
+    # Not a foreign key: the plan is keyed by whatever boss id the LLM echoed.
+    boss_id: Mapped[str] = mapped_column(String, nullable=False)
+    week_index: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    title: Mapped[str | None] = mapped_column(String, nullable=True)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    step_order: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
 class Quest(Base):
     __tablename__ = "quests"
+    __table_args__ = (Index("ix_quests_goal_id", "goal_id"),)
 
     quest_id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
     goal_id: Mapped[str] = mapped_column(
@@ -82,10 +143,33 @@ class Quest(Base):
     logs: Mapped[list["QuestLog"]] = relationship(
         "QuestLog", cascade="all, delete-orphan", back_populates="quest"
     )
+    tag_links: Mapped[list["QuestTag"]] = relationship(
+        "QuestTag", cascade="all, delete-orphan", back_populates="quest"
+    )
+
+
+class QuestTag(Base):
+    """Normalised copy of ``Quest.variation_tags`` for indexed tag lookup."""
+
+    __tablename__ = "quest_tags"
+    __table_args__ = (Index("ix_quest_tags_tag_goal_id", "tag", "goal_id"),)
+
+    quest_id: Mapped[str] = mapped_column(
+        ForeignKey("quests.quest_id", ondelete="CASCADE"), primary_key=True
+    )
+    tag: Mapped[str] = mapped_column(String, primary_key=True)
+    goal_id: Mapped[str] = mapped_column(
+        ForeignKey("goals.goal_id", ondelete="CASCADE"), nullable=False
+    )
+
+    quest: Mapped[Quest] = relationship("Quest", back_populates="tag_links")
 
 
 class QuestLog(Base):
     __tablename__ = "quest_logs"
+    __table_args__ = (
+        Index("ix_quest_logs_goal_id_occurred_at", "goal_id", "occurred_at"),
+    )
 
     log_id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
     quest_id: Mapped[str] = mapped_column(
@@ -107,4 +191,62 @@ class QuestLog(Base):
     quest: Mapped[Quest] = relationship("Quest", back_populates="logs")
 
 
-__all__ = ["Base", "Goal", "BossStage", "Quest", "QuestLog"]
+class ConversationSummary(Base):
+    """Rolling summary of conversation turns folded out of the prompt."""
+
+    __tablename__ = "conversation_summaries"
+    __table_args__ = (
+        Index("ix_conversation_summaries_conversation_id_created_at", "conversation_id", "created_at"),
+    )
+
+    summary_id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
+    conversation_id: Mapped[str] = mapped_column(String, nullable=False)
+    period_start: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    period_end: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    summary_text: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class ConversationStateSnapshot(Base):
+    """Compacted conversation state; journal rows after ``last_seq`` apply on top."""
+
+    __tablename__ = "conversation_state_snapshots"
+
+    conversation_id: Mapped[str] = mapped_column(String, primary_key=True)
+    state: Mapped[str] = mapped_column(Text, nullable=False)
+    last_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class ConversationStateJournal(Base):
+    """Append-only state deltas written between snapshots."""
+
+    __tablename__ = "conversation_state_journal"
+    __table_args__ = (
+        Index("ix_conversation_state_journal_conversation_id_seq", "conversation_id", "seq"),
+        # Sequence numbers must never be reused after compaction deletes rows.
+        {"sqlite_autoincrement": True},
+    )
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    conversation_id: Mapped[str] = mapped_column(String, nullable=False)
+    delta: Mapped[str] = mapped_column(Text, nullable=False)
+
+
+__all__ = [
+    "Base",
+    "Goal",
+    "BossStage",
+    "Metric",
+    "WeeklyStep",
+    "Quest",
+    "QuestLog",
+    "QuestTag",
+    "ConversationSummary",
+    "ConversationStateSnapshot",
+    "ConversationStateJournal",
+]
@@ -0,0 +1,232 @@
+"""Persistence backends behind :class:`core.state_manager.StateManager`."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Iterable, Mapping, Protocol
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from .models import ConversationStateJournal, ConversationStateSnapshot
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _make_delta(state: Mapping[str, Any], changed: Iterable[str] | None) -> dict:
+    """Describe a write as a full replacement or a set/unset of top-level keys."""
+
+    if changed is None:
+        return {"replace": state}
+    delta: dict[str, Any] = {"set": {}, "unset": []}
+    for key in changed:
+        if key in state:
+            delta["set"][key] = state[key]
+        else:
+            delta["unset"].append(key)
+    return delta
+
+
+def _apply_delta(state: dict | None, delta: dict) -> dict:
+    if "replace" in delta:
+        return dict(delta["replace"])
+    state = dict(state or {})
+    state.update(delta.get("set", {}))
+    for key in delta.get("unset", []):
+        state.pop(key, None)
+    return state
+
+
+class StateBackend(Protocol):
+    """Where :class:`StateManager` persists conversation state.
+
+    ``save`` receives the full state plus the top-level keys that changed
+    (``None`` when the whole state was replaced). ``shared`` backends are
+    visible to other processes, so the manager re-reads them instead of
+    trusting its in-process copy.
+    """
+
+    shared: bool
+
+    def load(self, conversation_id: str) -> dict | None: ...
+
+    def save(
+        self, conversation_id: str, state: Mapping[str, Any], changed: Iterable[str] | None = None
+    ) -> None: ...
+
+    def delete(self, conversation_id: str) -> None: ...
+
+
+class JournalStateBackend:
+    """Durable SQL backend: append-only delta journal plus periodic snapshots.
+
+    Every ``save`` appends one journal row. Once a conversation has
+    ``compact_every`` rows since its snapshot they are folded into the
+    snapshot, so ``load`` replays at most that many deltas. The count is read
+    from the journal in the saving transaction, so no per-conversation state
+    is kept in memory and every process sees the same length. Tables live in
+    the main schema (``conversation_state_snapshots`` and
+    ``conversation_state_journal``), so SQLite and PostgreSQL both work.
+
+    By default the backend is private to one process: the manager keeps
+    serving its in-memory copy and only loads after a restart or eviction.
+    Pass ``shared=True`` when several workers write the same conversations;
+    every lookup then replays the journal so no worker acts on a stale copy.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        compact_every: int = 50,
+        shared: bool = False,
+    ) -> None:
+        if compact_every < 1:
+            raise ValueError("compact_every must be positive")
+        self.compact_every = compact_every
+        self.shared = shared
+        self._session_factory = session_factory
+
+    def load(self, conversation_id: str) -> dict | None:
+        with self._session_factory() as session:
+            state, _, _ = self._replay(session, conversation_id)
+        return state
+
+    def save(
+        self, conversation_id: str, state: Mapping[str, Any], changed: Iterable[str] | None = None
+    ) -> None:
+        delta = _make_delta(state, changed)
+        with self._session_factory() as session:
+            session.add(
+                ConversationStateJournal(
+                    conversation_id=conversation_id, delta=_dumps(delta)
+                )
+            )
+            session.flush()
+            # Compaction deletes the rows it folds in, so every row left is pending.
+            length = session.scalar(
+                select(func.count()).where(
+                    ConversationStateJournal.conversation_id == conversation_id
+                )
+            ) or 0
+            session.commit()
+        if length >= self.compact_every:
+            self.compact(conversation_id)
+
+    def delete(self, conversation_id: str) -> None:
+        with self._session_factory() as session:
+            session.execute(
+                delete(ConversationStateJournal).where(
+                    ConversationStateJournal.conversation_id == conversation_id
+                )
+            )
+            session.execute(
+                delete(ConversationStateSnapshot).where(
+                    ConversationStateSnapshot.conversation_id == conversation_id
+                )
+            )
+            session.commit()
+
+    def compact(self, conversation_id: str) -> None:
+        """Fold the journal of ``conversation_id`` into its snapshot."""
+
+        with self._session_factory() as session:
+            state, last_seq, replayed = self._replay(session, conversation_id)
+            if replayed and state is not None:
+                snapshot = session.get(ConversationStateSnapshot, conversation_id)
+                if snapshot is None:
+                    snapshot = ConversationStateSnapshot(conversation_id=conversation_id)
+                    session.add(snapshot)
+                snapshot.state = _dumps(state)
+                snapshot.last_seq = last_seq
+                # Rows appended by other writers after ``last_seq`` survive.
+                session.execute(
+                    delete(ConversationStateJournal).where(
+                        ConversationStateJournal.conversation_id == conversation_id,
+                        ConversationStateJournal.seq <= last_seq,
+                    )
+                )
+                session.commit()
+
+    def compact_all(self) -> int:
+        """Compact every conversation with journal rows; return how many."""
+
+        with self._session_factory() as session:
+            conversation_ids = session.scalars(
+                select(ConversationStateJournal.conversation_id).distinct()
+            ).all()
+        for conversation_id in conversation_ids:
+            self.compact(conversation_id)
+        return len(conversation_ids)
+
+    def _replay(
+        self, session: Session, conversation_id: str
+    ) -> tuple[dict | None, int, int]:
+        snapshot = session.get(ConversationStateSnapshot, conversation_id)
+        state = json.loads(snapshot.state) if snapshot is not None else None
+        last_seq = snapshot.last_seq if snapshot is not None else 0
+        replayed = 0
+        for seq, raw in session.execute(
+            select(ConversationStateJournal.seq, ConversationStateJournal.delta)
+            .where(
+                ConversationStateJournal.conversation_id == conversation_id,
+                ConversationStateJournal.seq > last_seq,
+            )
+            .order_by(ConversationStateJournal.seq)
+        ):
+            state = _apply_delta(state, json.loads(raw))
+            last_seq = seq
+            replayed += 1
+        return state, last_seq, replayed
+
+
+class RedisStateBackend:
+    """Store each conversation as a Redis hash of JSON-encoded top-level keys.
+
+    ``client`` is anything with the ``redis.Redis`` hash API (``hset``,
+    ``hgetall``, ``hkeys``, ``hdel``, ``delete``); ``tools/fake_redis.py``
+    provides an in-memory server and client for local multi-process tests.
+    Partial saves only rewrite the changed fields.
+    """
+
+    shared = True
+
+    def __init__(self, client: Any, *, prefix: str = "goaler:state:") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    def load(self, conversation_id: str) -> dict | None:
+        fields = self.client.hgetall(self._key(conversation_id))
+        if not fields:
+            return None
+        return {_text(field): json.loads(value) for field, value in fields.items()}
+
+    def save(
+        self, conversation_id: str, state: Mapping[str, Any], changed: Iterable[str] | None = None
+    ) -> None:
+        key = self._key(conversation_id)
+        if changed is None:
+            stale = {_text(field) for field in self.client.hkeys(key)} - set(state)
+            changed = list(state) + sorted(stale)
+        delta = _make_delta(state, changed)
+        if delta["set"]:
+            self.client.hset(
+                key, mapping={field: _dumps(value) for field, value in delta["set"].items()}
+            )
+        if delta["unset"]:
+            self.client.hdel(key, *delta["unset"])
+
+    def delete(self, conversation_id: str) -> None:
+        self.client.delete(self._key(conversation_id))
+
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.prefix}{conversation_id}"
+
+
+def _text(value: str | bytes) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+__all__ = ["StateBackend", "JournalStateBackend", "RedisStateBackend"]
@@ -1,39 +1,513 @@
 """Manage in-memory conversation state for the goal-setting agent."""
 
-# For a production system we would use a persistent store (Redis, database, etc.).
-# The simple dictionary is enough for this prototype and keeps tests lightweight.
-_STATE_CACHE = {}
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Union
+
+from .conversation_state import ConversationState
+
+if TYPE_CHECKING:
+    from .state_backends import StateBackend
+
+# Called as ``on_evict(conversation_id, state, reason)`` with reason "lru",
+# "bytes" or "idle" once the state is dropped, e.g. to persist the draft.
+EvictionHook = Callable[[str, dict, str], None]
+_Eviction = tuple[str, dict, str]
+# A top-level key, or a tuple of keys into nested dicts ("weekly_plan", boss_id).
+StatePath = Union[str, tuple[str, ...]]
+
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_IDLE_TTL = 24 * 60 * 60.0
+DEFAULT_SHARDS = 16
+DEFAULT_LOCK_STRIPES = 64
+_POINTER_SIZE = 8
+
+
+def _approx_size(value: Any) -> int:
+    """Rough deep ``sys.getsizeof`` for the JSON-like values kept in state."""
+
+    size = sys.getsizeof(value)
+    if isinstance(value, ConversationState):
+        # Field names are interned slot names; only values and extras count.
+        size += sum(_approx_size(v) for _, v in value.items())
+        if value.extras is not None:
+            size += sys.getsizeof(value.extras) + sum(map(_approx_size, value.extras))
+    elif isinstance(value, dict):
+        size += sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_approx_size(item) for item in value)
+    return size
+
+
+def _copy_json(value: Any) -> Any:
+    """Deep-copy nested dicts/lists; cheaper than ``copy.deepcopy`` for JSON data."""
+
+    if isinstance(value, dict):
+        return {key: _copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(item) for item in value]
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+def _split_budget(budget: int | None, shards: int) -> int | None:
+    if budget is None:
+        return None
+    return max(1, -(-budget // shards))
+
+
+def _split_path(path: StatePath) -> tuple[str, tuple[str, ...]]:
+    if isinstance(path, str):
+        return path, ()
+    return path[0], tuple(path[1:])
+
+
+def _replace_in(container: Any, keys: tuple, update: Callable[[Any], Any]) -> Any:
+    """Return ``container`` with ``update`` applied at ``keys``, copying the path."""
+
+    if not keys:
+        return update(container)
+    head, rest = keys[0], keys[1:]
+    copied = dict(container or {})
+    copied[head] = _replace_in(copied.get(head), rest, update)
+    return copied
+
+
+class _StateDraft(MutableMapping):
+    """Copy-on-write view of a state used by :meth:`StateManager.mutate`."""
+
+    def __init__(self, base: Mapping[str, Any]) -> None:
+        self._base = base
+        self._copied: dict[str, Any] = {}
+        self._written: dict[str, Any] = {}
+        self._removed: set[str] = set()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._written:
+            return self._written[key]
+        if key in self._copied:
+            return self._copied[key]
+        if key in self._removed:
+            raise KeyError(key)
+        value = self._base[key]
+        if isinstance(value, tuple):
+            # Compact id lists are handed to the block as editable lists.
+            value = self._copied[key] = list(value)
+        elif isinstance(value, (dict, list, set)):
+            value = self._copied[key] = _copy_json(value)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._written[key] = value
+        self._copied.pop(key, None)
+        self._removed.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._written.pop(key, None)
+        self._copied.pop(key, None)
+        self._removed.add(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._base:
+            if key not in self._removed:
+                yield key
+        for key in self._written:
+            if key not in self._base:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def changes(self) -> tuple[dict[str, Any], set[str], set[str]]:
+        """Return changed values, which of them are draft-made copies, and removed keys."""
+        changes = dict(self._written)
+        copied = set()
+        for key, value in self._copied.items():
+            original = self._base.get(key)
+            if isinstance(original, tuple):
+                original = list(original)
+            if value != original:
+                changes[key] = value
+                copied.add(key)
+        return changes, copied, self._removed
+
+
+class _Entry:
+    """One cached conversation.
+
+    ``owned`` holds top-level keys whose list values were copied by the
+    manager and not handed out since, so they can be appended to in place.
+    """
+
+    __slots__ = ("state", "size", "last_access", "owned")
+
+    def __init__(self, state: ConversationState, size: int, last_access: float) -> None:
+        self.state = state
+        self.size = size
+        self.last_access = last_access
+        self.owned: set[str] = set()
+
+
+class _Shard:
+    """One LRU partition of the conversation map with its own lock."""
+
+    __slots__ = ("entries", "bytes", "evictions", "lock")
+
+    def __init__(self) -> None:
+        self.entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
 
 
 class StateManager:
-    """Manages the in-progress goal object for each conversation."""
+    """Manages the in-progress goal object for each conversation.
+
+    Conversations are kept in least-recently-used order and evicted when the
+    entry budget (``max_entries``), the approximate memory budget
+    (``max_bytes``) or the idle timeout (``idle_ttl`` seconds) is exceeded.
+    ``None`` disables a budget. ``on_evict`` runs after a state is dropped,
+    outside the shard lock, so it may call back into the manager.
+
+    With a ``backend`` (see :mod:`core.state_backends`) every write is also
+    persisted there and evicted or unknown conversations are reloaded from
+    it, so drafts survive restarts. Shared backends are always re-read so
+    that several worker processes see each other's writes.
+
+    The manager is thread-safe. Conversations are hashed onto ``shards``
+    independent LRU maps (budgets are split evenly between them) and onto
+    ``lock_stripes`` re-entrant locks; every call holds its conversation's
+    stripe, so calls for unrelated conversations rarely share a lock. Use
+    :meth:`update` or :meth:`locked` for read-modify-write sequences.
+    """
 
-    def new_conversation(self, conversation_id: str, initial_state: dict):
+    def __init__(
+        self,
+        backend: StateBackend | None = None,
+        *,
+        max_entries: int | None = DEFAULT_MAX_ENTRIES,
+        max_bytes: int | None = None,
+        idle_ttl: float | None = DEFAULT_IDLE_TTL,
+        on_evict: EvictionHook | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        shards: int = DEFAULT_SHARDS,
+        lock_stripes: int = DEFAULT_LOCK_STRIPES,
+    ) -> None:
+        if shards < 1 or lock_stripes < 1:
+            raise ValueError("shards and lock_stripes must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.backend = backend
+        self._clock = clock
+        self._shards = [_Shard() for _ in range(shards)]
+        self._stripes = [threading.RLock() for _ in range(lock_stripes)]
+        self._shard_max_entries = _split_budget(max_entries, shards)
+        self._shard_max_bytes = _split_budget(max_bytes, shards)
+
+    def new_conversation(
+        self, conversation_id: str, initial_state: dict | ConversationState
+    ):
         """Starts a new conversation with an initial state."""
         print(f"--- STATE: New conversation started: {conversation_id} ---")
-        _STATE_CACHE[conversation_id] = initial_state
+        with self.locked(conversation_id):
+            entry = self._store(conversation_id, initial_state)
+            if self.backend is not None:
+                self.backend.save(conversation_id, entry.state.to_dict())
         return True
 
     def get_state(self, conversation_id: str) -> dict | None:
         """Retrieves the current state for a given conversation."""
-        state = _STATE_CACHE.get(conversation_id)
-        return state.copy() if state else None
+        with self.locked(conversation_id):
+            entry = self._lookup(conversation_id)
+            if entry is None:
+                return None
+            # The shallow copy shares nested values, so none are owned any more.
+            entry.owned.clear()
+            return entry.state.to_dict() if entry.state else None
+
+    def get(self, conversation_id: str, key: str, default: Any = None) -> Any:
+        """Read one top-level value without copying the whole state.
+
+        Id lists (see ``ConversationState.ID_LIST_FIELDS``) come back as tuples.
+        """
+        with self.locked(conversation_id):
+            entry = self._lookup(conversation_id)
+            if entry is None:
+                return default
+            entry.owned.discard(key)
+            return entry.state.get(key, default)
 
     def update_state(self, conversation_id: str, new_state: dict):
         """Updates the state for a given conversation."""
-        if conversation_id not in _STATE_CACHE:
-            return False
-        print(f"--- STATE: State updated for {conversation_id} ---")
-        _STATE_CACHE[conversation_id] = new_state
-        return True
+        with self.locked(conversation_id):
+            if self._lookup(conversation_id) is None:
+                return False
+            print(f"--- STATE: State updated for {conversation_id} ---")
+            entry = self._store(conversation_id, new_state)
+            if self.backend is not None:
+                self.backend.save(conversation_id, entry.state.to_dict())
+            return True
+
+    # ------------------------------------------------------------------
+    # Patch API: only the touched top-level keys are rebuilt and persisted,
+    # and values already handed out by ``get_state`` are never mutated.
+    # ------------------------------------------------------------------
+    def set(self, conversation_id: str, path: StatePath, value: Any) -> bool:
+        """Set ``path`` (a key or a tuple of nested keys) to ``value``."""
+        with self.locked(conversation_id):
+            entry = self._lookup(conversation_id)
+            if entry is None:
+                return False
+            key, nested = _split_path(path)
+            old = entry.state.get(key)
+            if nested:
+                value = _replace_in(old, nested, lambda _: value)
+            self._replace_key(conversation_id, entry, key, value)
+            return True
+
+    def append(self, conversation_id: str, path: StatePath, value: Any) -> bool:
+        """Append ``value`` to the list at ``path``, creating it if missing."""
+        return self.extend(conversation_id, path, (value,))
+
+    def extend(self, conversation_id: str, path: StatePath, values: Iterable[Any]) -> bool:
+        """Append every item of ``values`` to the list at ``path``."""
+        values = list(values)
+        with self.locked(conversation_id):
+            entry = self._lookup(conversation_id)
+            if entry is None:
+                return False
+            key, nested = _split_path(path)
+            current = entry.state.get(key)
+            if not nested and key in entry.owned and isinstance(current, list):
+                # Nobody else holds this list: grow it without copying.
+                current.extend(values)
+                self._commit(
+                    conversation_id,
+                    entry,
+                    [key],
+                    sum(_approx_size(value) + _POINTER_SIZE for value in values),
+                )
+                return True
+            grow = lambda old: [*(old or ()), *values]  # noqa: E731
+            if nested:
+                self._replace_key(
+                    conversation_id, entry, key, _replace_in(current, nested, grow)
+                )
+                return True
+            existed = key in entry.state
+            # Id-list fields store the grown list as a tuple.
+            entry.state[key] = grow(current)
+            # Items are shared with the old list, so only the list shell and
+            # the new items change the footprint.
+            size_delta = sys.getsizeof(entry.state[key]) + sum(map(_approx_size, values))
+            if existed:
+                size_delta -= sys.getsizeof(current)
+            else:
+                size_delta += _approx_size(key)
+            entry.owned.add(key)
+            self._commit(conversation_id, entry, [key], size_delta)
+            return True
+
+    @contextmanager
+    def mutate(self, conversation_id: str) -> Iterator[MutableMapping[str, Any]]:
+        """Edit several keys at once and commit them when the block exits.
+
+        Mutable values are copied the first time they are read from the
+        draft, so in-place edits (``draft["metrics"].append(...)``) are safe.
+        Nothing is written if the block raises or the conversation is
+        unknown; in the latter case the draft starts empty. The
+        conversation stays locked for the whole block.
+        """
+        with self.locked(conversation_id):
+            entry = self._lookup(conversation_id)
+            draft = _StateDraft(entry.state if entry is not None else {})
+            yield draft
+            if entry is None:
+                return
+            changes, copied, dropped = draft.changes()
+            removed = [key for key in dropped if key in entry.state]
+            if not changes and not removed:
+                return
+            size_delta = 0
+            for key, value in changes.items():
+                size_delta += self._swap_value(entry, key, value)
+                entry.owned.discard(key)
+            entry.owned.update(copied)
+            for key in removed:
+                size_delta -= _approx_size(key) + _approx_size(entry.state.pop(key))
+                entry.owned.discard(key)
+            self._commit(conversation_id, entry, [*changes, *removed], size_delta)
+
+    def update(
+        self, conversation_id: str, update: Callable[[MutableMapping[str, Any]], Any]
+    ) -> Any:
+        """Atomically apply ``update(draft)`` to a conversation; return its result."""
+        with self.mutate(conversation_id) as draft:
+            return update(draft)
+
+    def locked(self, conversation_id: str) -> threading.RLock:
+        """The re-entrant lock guarding ``conversation_id``.
+
+        Hold it across a tool call that reads state, does I/O and writes the
+        result back, so concurrent calls for the same conversation serialise.
+        """
+        return self._stripes[hash(conversation_id) % len(self._stripes)]
 
     def end_conversation(self, conversation_id: str):
         """Clears the state for a finished or expired conversation."""
-        if conversation_id in _STATE_CACHE:
-            print(f"--- STATE: Conversation ended: {conversation_id} ---")
-            del _STATE_CACHE[conversation_id]
+        with self.locked(conversation_id):
+            shard = self._shard(conversation_id)
+            with shard.lock:
+                if conversation_id in shard.entries:
+                    print(f"--- STATE: Conversation ended: {conversation_id} ---")
+                    self._discard(shard, conversation_id)
+            if self.backend is not None:
+                self.backend.delete(conversation_id)
         return True
 
+    def stats(self) -> dict:
+        """Report conversation count, evictions and approximate bytes held."""
+        size = evictions = approx_bytes = 0
+        for shard in self._shards:
+            with shard.lock:
+                size += len(shard.entries)
+                evictions += shard.evictions
+                approx_bytes += shard.bytes
+        return {"size": size, "evictions": evictions, "approx_bytes": approx_bytes}
+
+    # Internal helpers below expect the caller to hold ``locked(conversation_id)``.
+
+    def _shard(self, conversation_id: str) -> _Shard:
+        return self._shards[hash(conversation_id) % len(self._shards)]
+
+    def _replace_key(self, conversation_id: str, entry: _Entry, key: str, value: Any) -> None:
+        size_delta = self._swap_value(entry, key, value)
+        entry.owned.discard(key)
+        self._commit(conversation_id, entry, [key], size_delta)
+
+    @staticmethod
+    def _swap_value(entry: _Entry, key: str, value: Any) -> int:
+        if key in entry.state:
+            size_delta = _approx_size(value) - _approx_size(entry.state[key])
+        else:
+            size_delta = _approx_size(key) + _approx_size(value)
+        entry.state[key] = value
+        return size_delta
+
+    def _commit(
+        self, conversation_id: str, entry: _Entry, changed: list[str], size_delta: int
+    ) -> None:
+        print(f"--- STATE: State updated for {conversation_id} ---")
+        shard = self._shard(conversation_id)
+        with shard.lock:
+            entry.size += size_delta
+            if shard.entries.get(conversation_id) is entry:
+                shard.bytes += size_delta
+                shard.entries.move_to_end(conversation_id)
+            else:
+                # Evicted by a budget sweep since the lookup: keep the write.
+                shard.entries[conversation_id] = entry
+                shard.bytes += entry.size
+            entry.last_access = self._clock()
+            evicted = self._enforce_budgets(shard)
+        self._notify_evicted(evicted)
+        if self.backend is not None:
+            self.backend.save(conversation_id, entry.state, changed)
+
+    def _lookup(self, conversation_id: str) -> _Entry | None:
+        """Return the cached entry, touching its LRU position."""
+        shard = self._shard(conversation_id)
+        shared = self.backend is not None and self.backend.shared
+        with shard.lock:
+            evicted = self._expire_idle(shard)
+            entry = shard.entries.get(conversation_id)
+            if entry is not None and not shared:
+                entry.last_access = self._clock()
+                shard.entries.move_to_end(conversation_id)
+            else:
+                entry = None
+        self._notify_evicted(evicted)
+        return entry if entry is not None else self._reload(conversation_id)
+
+    def _reload(self, conversation_id: str) -> _Entry | None:
+        if self.backend is None:
+            return None
+        state = self.backend.load(conversation_id)
+        if state is None:
+            shard = self._shard(conversation_id)
+            with shard.lock:
+                if conversation_id in shard.entries:
+                    self._discard(shard, conversation_id)
+            return None
+        return self._store(conversation_id, state)
+
+    def _store(self, conversation_id: str, state: dict | ConversationState) -> _Entry:
+        if not isinstance(state, ConversationState):
+            state = ConversationState.from_dict(state)
+        shard = self._shard(conversation_id)
+        entry = _Entry(state, _approx_size(state), self._clock())
+        with shard.lock:
+            if conversation_id in shard.entries:
+                self._discard(shard, conversation_id)
+            shard.entries[conversation_id] = entry
+            shard.bytes += entry.size
+            evicted = self._enforce_budgets(shard)
+        self._notify_evicted(evicted)
+        return entry
+
+    # The eviction helpers run under ``shard.lock`` and only collect what they
+    # dropped; ``_notify_evicted`` runs the hook once the lock is released.
+
+    def _enforce_budgets(self, shard: _Shard) -> list[_Eviction]:
+        evicted = self._expire_idle(shard)
+        max_entries, max_bytes = self._shard_max_entries, self._shard_max_bytes
+        while max_entries is not None and len(shard.entries) > max_entries:
+            self._evict_oldest(shard, "lru", evicted)
+        while max_bytes is not None and shard.bytes > max_bytes and len(shard.entries) > 1:
+            self._evict_oldest(shard, "bytes", evicted)
+        return evicted
+
+    def _expire_idle(self, shard: _Shard) -> list[_Eviction]:
+        evicted: list[_Eviction] = []
+        if self.idle_ttl is None:
+            return evicted
+        cutoff = self._clock() - self.idle_ttl
+        while shard.entries:
+            entry = next(iter(shard.entries.values()))
+            if entry.last_access > cutoff:
+                break
+            self._evict_oldest(shard, "idle", evicted)
+        return evicted
+
+    def _evict_oldest(self, shard: _Shard, reason: str, evicted: list[_Eviction]) -> None:
+        conversation_id, entry = next(iter(shard.entries.items()))
+        if self.on_evict is not None:
+            # Snapshot now: the entry may still be written once it is unlinked.
+            evicted.append((conversation_id, entry.state.to_dict(), reason))
+        self._discard(shard, conversation_id)
+        shard.evictions += 1
+
+    def _notify_evicted(self, evicted: list[_Eviction]) -> None:
+        if self.on_evict is not None:
+            for conversation_id, state, reason in evicted:
+                self.on_evict(conversation_id, state, reason)
+
+    @staticmethod
+    def _discard(shard: _Shard, conversation_id: str) -> None:
+        entry = shard.entries.pop(conversation_id)
+        shard.bytes -= entry.size
+
 
 # --- Example Usage (for demonstration) ---
 
@@ -59,3 +533,4 @@ if __name__ == "__main__":
 
     state_manager.end_conversation(conv_id)
     print("Final state:", state_manager.get_state(conv_id))
+    print("Stats:", state_manager.stats())
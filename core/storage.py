@@ -2,15 +2,35 @@
 
 from __future__ import annotations
 
+import functools
 import os
+import threading
 import uuid
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
-from typing import Iterable
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator
 
-from sqlalchemy import create_engine, select
+from sqlalchemy import Select, create_engine, delete, event, func, insert, or_, select
+from sqlalchemy.engine import Connection, Engine, RowMapping
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
 
-from .models import Base, BossStage, Goal, Quest, QuestLog
+from .models import (
+    Base,
+    BossStage,
+    ConversationSummary,
+    Goal,
+    Metric,
+    Quest,
+    QuestLog,
+    QuestTag,
+    WeeklyStep,
+)
 
 
 def _tags_to_string(tags: Iterable[str] | None) -> str | None:
@@ -25,6 +45,10 @@ def _tags_from_string(raw: str | None) -> list[str]:
     return [entry for entry in raw.split(",") if entry]
 
 
+def _unique_tags(tags: Iterable[str] | None) -> list[str]:
+    return list(dict.fromkeys(tag for tag in tags or () if tag))
+
+
 def _coerce_datetime(value: datetime | str) -> datetime:
     if isinstance(value, datetime):
         return value
@@ -33,31 +57,185 @@ def _coerce_datetime(value: datetime | str) -> datetime:
     raise TypeError("occurred_at must be datetime or ISO formatted string")
 
 
-class SQLAlchemyStorage:
-    """Lightweight CRUD wrapper around a SQLAlchemy session."""
+def _boss_stages_query(goal_id: str) -> Select:
+    return (
+        select(BossStage)
+        .where(BossStage.goal_id == goal_id)
+        .order_by(BossStage.stage_order, BossStage.created_at)
+    )
 
-    def __init__(self, session: Session):
-        self.session = session
 
-    # ------------------------------------------------------------------
-    # Goals
-    # ------------------------------------------------------------------
-    def create_goal(self, payload: dict) -> dict:
-        goal = Goal(
+def _quests_by_tags_query(goal_id: str, tags: Iterable[str], match: str) -> Select | None:
+    wanted = _unique_tags(tags)
+    if match not in {"any", "all"}:
+        raise ValueError("match must be 'any' or 'all'")
+    if not wanted:
+        return None
+    matching = select(QuestTag.quest_id).where(
+        QuestTag.goal_id == goal_id, QuestTag.tag.in_(wanted)
+    )
+    if match == "all":
+        matching = matching.group_by(QuestTag.quest_id).having(
+            func.count(QuestTag.tag) == len(wanted)
+        )
+    return (
+        select(Quest)
+        .where(Quest.quest_id.in_(matching))
+        .order_by(Quest.created_at, Quest.quest_id)
+    )
+
+
+def _recent_quest_logs_query(goal_id: str, limit: int) -> Select:
+    return (
+        select(QuestLog)
+        .where(QuestLog.goal_id == goal_id)
+        .order_by(QuestLog.occurred_at.desc())
+        .limit(limit)
+    )
+
+
+def _quest_log_window_query(
+    goal_id: str,
+    since: datetime | str | None,
+    until: datetime | str | None,
+    batch_size: int,
+) -> Select:
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    stmt = select(QuestLog).where(QuestLog.goal_id == goal_id)
+    if since is not None:
+        stmt = stmt.where(QuestLog.occurred_at >= _coerce_datetime(since))
+    if until is not None:
+        stmt = stmt.where(QuestLog.occurred_at < _coerce_datetime(until))
+    return stmt.order_by(QuestLog.occurred_at, QuestLog.log_id).limit(batch_size)
+
+
+def _after_quest_log_key(stmt: Select, last_key: tuple[datetime, str] | None) -> Select:
+    if last_key is None:
+        return stmt
+    last_occurred_at, last_log_id = last_key
+    # The redundant ``>=`` bound lets SQLite seek the (goal_id, occurred_at)
+    # index instead of scanning the goal's whole history per page.
+    return stmt.where(
+        QuestLog.occurred_at >= last_occurred_at,
+        or_(
+            QuestLog.occurred_at > last_occurred_at,
+            QuestLog.log_id > last_log_id,
+        ),
+    )
+
+
+# Column projections for the Core read path; order matches the dict helpers.
+_BOSS_STAGE_COLUMNS = (
+    BossStage.boss_id,
+    BossStage.goal_id,
+    BossStage.title,
+    BossStage.description,
+    BossStage.success_criteria,
+    BossStage.stage_order,
+    BossStage.status,
+    BossStage.target_week,
+)
+_QUEST_COLUMNS = (
+    Quest.quest_id,
+    Quest.goal_id,
+    Quest.title,
+    Quest.description,
+    Quest.difficulty_tier,
+    Quest.expected_duration_minutes,
+    Quest.variation_tags,
+    Quest.is_custom,
+    Quest.origin_prompt_hash,
+)
+_QUEST_LOG_COLUMNS = (
+    QuestLog.log_id,
+    QuestLog.quest_id,
+    QuestLog.goal_id,
+    QuestLog.occurred_at,
+    QuestLog.outcome,
+    QuestLog.perceived_difficulty,
+    QuestLog.energy_status,
+    QuestLog.loot_type,
+    QuestLog.mood_note,
+    QuestLog.llm_variation_seed,
+)
+
+# "orm" hydrates entities; "core" selects only the dict columns and builds
+# the dicts from Row._mapping, skipping identity-map bookkeeping.
+READ_MODES = ("orm", "core")
+
+
+def _boss_stage_row_to_dict(row: RowMapping) -> dict:
+    return dict(row)
+
+
+def _quest_row_to_dict(row: RowMapping) -> dict:
+    record = dict(row)
+    record["variation_tags"] = _tags_from_string(record["variation_tags"])
+    return record
+
+
+def _quest_log_row_to_dict(row: RowMapping) -> dict:
+    record = dict(row)
+    record["occurred_at"] = record["occurred_at"].isoformat()
+    return record
+
+
+def _quest_log_key(record: dict) -> tuple[datetime, str]:
+    return _coerce_datetime(record["occurred_at"]), record["log_id"]
+
+
+def _finalize_id(goal_id: str, kind: str, *parts: object) -> str:
+    """Deterministic id, so a retried finalize rewrites the same rows."""
+
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "/".join(["goaler", goal_id, kind, *map(str, parts)])))
+
+
+def _clear_finalized_rows(goal_id: str) -> list:
+    return [
+        delete(Metric).where(Metric.goal_id == goal_id),
+        delete(WeeklyStep).where(WeeklyStep.goal_id == goal_id),
+    ]
+
+
+class _RecordMapper:
+    """Entity construction and dict serialisation shared by storage backends."""
+
+    read_mode = "orm"
+
+    def _set_read_mode(self, read_mode: str) -> None:
+        if read_mode not in READ_MODES:
+            raise ValueError(f"read_mode must be one of {READ_MODES}")
+        self.read_mode = read_mode
+
+    def _core_or_orm(self, kind: str) -> tuple[tuple[Any, ...] | None, Callable[[Any], dict]]:
+        """Columns and row mapper for Core reads, or ``None`` and the entity mapper."""
+
+        readers: dict[str, tuple[tuple[Any, ...], Callable[[Any], dict], Callable[[Any], dict]]] = {
+            "boss_stage": (
+                _BOSS_STAGE_COLUMNS,
+                _boss_stage_row_to_dict,
+                self._boss_stage_to_dict,
+            ),
+            "quest": (_QUEST_COLUMNS, _quest_row_to_dict, self._quest_to_dict),
+            "quest_log": (
+                _QUEST_LOG_COLUMNS,
+                _quest_log_row_to_dict,
+                self._quest_log_to_dict,
+            ),
+        }
+        columns, row_to_dict, entity_to_dict = readers[kind]
+        if self.read_mode == "core":
+            return columns, row_to_dict
+        return None, entity_to_dict
+
+    def _build_goal(self, payload: dict) -> Goal:
+        return Goal(
             title=payload["title"],
             goal_type=payload.get("goal_type", "ONE_TIME"),
             motivation=payload.get("motivation"),
+            goal_id=payload.get("goal_id", str(uuid.uuid4())),
         )
-        self.session.add(goal)
-        self.session.commit()
-        self.session.refresh(goal)
-        return self._goal_to_dict(goal)
-
-    def get_goal(self, goal_id: str) -> dict | None:
-        goal = self.session.get(Goal, goal_id)
-        if not goal:
-            return None
-        return self._goal_to_dict(goal)
 
     def _goal_to_dict(self, goal: Goal) -> dict:
         return {
@@ -67,11 +245,8 @@ class SQLAlchemyStorage:
             "motivation": goal.motivation,
         }
 
-    # ------------------------------------------------------------------
-    # Boss stages
-    # ------------------------------------------------------------------
-    def create_boss_stage(self, goal_id: str, payload: dict) -> dict:
-        stage = BossStage(
+    def _build_boss_stage(self, goal_id: str, payload: dict) -> BossStage:
+        return BossStage(
             goal_id=goal_id,
             title=payload["title"],
             description=payload.get("description"),
@@ -81,19 +256,6 @@ class SQLAlchemyStorage:
             target_week=payload.get("target_week"),
             boss_id=payload.get("boss_id", str(uuid.uuid4())),
         )
-        self.session.add(stage)
-        self.session.commit()
-        self.session.refresh(stage)
-        return self._boss_stage_to_dict(stage)
-
-    def list_boss_stages(self, goal_id: str) -> list[dict]:
-        stmt = (
-            select(BossStage)
-            .where(BossStage.goal_id == goal_id)
-            .order_by(BossStage.stage_order, BossStage.created_at)
-        )
-        stages = self.session.scalars(stmt).all()
-        return [self._boss_stage_to_dict(stage) for stage in stages]
 
     def _boss_stage_to_dict(self, stage: BossStage) -> dict:
         return {
@@ -107,31 +269,65 @@ class SQLAlchemyStorage:
             "target_week": stage.target_week,
         }
 
-    # ------------------------------------------------------------------
-    # Quests
-    # ------------------------------------------------------------------
-    def create_quest(self, goal_id: str, payload: dict) -> dict:
-        quest = Quest(
+    def _build_metric(self, goal_id: str, position: int, payload: dict) -> Metric:
+        if "metric_name" not in payload:
+            raise ValueError(f"metric {position} of goal {goal_id!r} has no metric_name")
+        return Metric(
+            goal_id=goal_id,
+            metric_name=payload["metric_name"],
+            metric_type=payload.get("metric_type"),
+            target_value=payload.get("target_value"),
+            unit=payload.get("unit"),
+            initial_value=payload.get("initial_value"),
+            progress=payload.get("progress"),
+            metric_id=payload.get("metric_id") or _finalize_id(goal_id, "metric", position),
+        )
+
+    def _build_weekly_step(
+        self, goal_id: str, boss_id: str, position: int, payload: dict
+    ) -> WeeklyStep:
+        return WeeklyStep(
+            goal_id=goal_id,
+            boss_id=boss_id,
+            week_index=payload.get("week_index"),
+            title=payload.get("title"),
+            description=payload.get("description"),
+            step_order=position,
+            step_id=_finalize_id(goal_id, "weekly_step", boss_id, position),
+        )
+
+    def _build_finalized_rows(
+        self, goal_id: str, metrics: Iterable[dict], weekly_plan: dict[str, Iterable[dict]]
+    ) -> tuple[list[Metric], list[WeeklyStep]]:
+        metric_rows = [
+            self._build_metric(goal_id, position, payload)
+            for position, payload in enumerate(metrics)
+        ]
+        step_rows = [
+            self._build_weekly_step(goal_id, boss_id, position, payload)
+            for boss_id, entries in weekly_plan.items()
+            for position, payload in enumerate(entries)
+        ]
+        return metric_rows, step_rows
+
+    def _build_quest(self, goal_id: str, payload: dict) -> Quest:
+        quest_id = payload.get("quest_id", str(uuid.uuid4()))
+        tags = payload.get("variation_tags")
+        return Quest(
             goal_id=goal_id,
             title=payload["title"],
             description=payload.get("description"),
             difficulty_tier=payload.get("difficulty_tier", "NORMAL"),
             expected_duration_minutes=payload.get("expected_duration_minutes"),
-            variation_tags=_tags_to_string(payload.get("variation_tags")),
+            variation_tags=_tags_to_string(tags),
             is_custom=bool(payload.get("is_custom", False)),
             origin_prompt_hash=payload.get("origin_prompt_hash"),
-            quest_id=payload.get("quest_id", str(uuid.uuid4())),
+            quest_id=quest_id,
+            tag_links=[
+                QuestTag(quest_id=quest_id, goal_id=goal_id, tag=tag)
+                for tag in _unique_tags(tags)
+            ],
         )
-        self.session.add(quest)
-        self.session.commit()
-        self.session.refresh(quest)
-        return self._quest_to_dict(quest)
-
-    def get_quest(self, quest_id: str) -> dict | None:
-        quest = self.session.get(Quest, quest_id)
-        if not quest:
-            return None
-        return self._quest_to_dict(quest)
 
     def _quest_to_dict(self, quest: Quest) -> dict:
         return {
@@ -146,11 +342,8 @@ class SQLAlchemyStorage:
             "origin_prompt_hash": quest.origin_prompt_hash,
         }
 
-    # ------------------------------------------------------------------
-    # Quest logs
-    # ------------------------------------------------------------------
-    def log_quest_event(self, payload: dict) -> dict:
-        log = QuestLog(
+    def _build_quest_log(self, payload: dict) -> QuestLog:
+        return QuestLog(
             quest_id=payload["quest_id"],
             goal_id=payload["goal_id"],
             occurred_at=_coerce_datetime(payload["occurred_at"]),
@@ -162,20 +355,26 @@ class SQLAlchemyStorage:
             llm_variation_seed=payload.get("llm_variation_seed"),
             log_id=payload.get("log_id", str(uuid.uuid4())),
         )
-        self.session.add(log)
-        self.session.commit()
-        self.session.refresh(log)
-        return self._quest_log_to_dict(log)
 
-    def list_recent_quest_logs(self, goal_id: str, limit: int = 10) -> list[dict]:
-        stmt = (
-            select(QuestLog)
-            .where(QuestLog.goal_id == goal_id)
-            .order_by(QuestLog.occurred_at.desc())
-            .limit(limit)
+    def _build_conversation_summary(self, payload: dict) -> ConversationSummary:
+        period_start = payload.get("period_start")
+        period_end = payload.get("period_end")
+        return ConversationSummary(
+            conversation_id=payload["conversation_id"],
+            period_start=_coerce_datetime(period_start) if period_start else None,
+            period_end=_coerce_datetime(period_end) if period_end else None,
+            summary_text=payload["summary_text"],
+            summary_id=payload.get("summary_id", str(uuid.uuid4())),
         )
-        logs = self.session.scalars(stmt).all()
-        return [self._quest_log_to_dict(log) for log in logs]
+
+    def _conversation_summary_to_dict(self, summary: ConversationSummary) -> dict:
+        return {
+            "summary_id": summary.summary_id,
+            "conversation_id": summary.conversation_id,
+            "period_start": summary.period_start.isoformat() if summary.period_start else None,
+            "period_end": summary.period_end.isoformat() if summary.period_end else None,
+            "summary_text": summary.summary_text,
+        }
 
     def _quest_log_to_dict(self, log: QuestLog) -> dict:
         return {
@@ -192,16 +391,590 @@ class SQLAlchemyStorage:
         }
 
 
-def create_session_factory(database_url: str | None = None) -> sessionmaker[Session]:
-    url = database_url or os.getenv("GOALER_DATABASE_URL") or "sqlite:///data/goaler.db"
-    if url.startswith("sqlite:///") and not url.startswith("sqlite:///:memory:"):
+class SQLAlchemyStorage(_RecordMapper):
+    """Lightweight CRUD wrapper around a SQLAlchemy session.
+
+    ``read_mode="core"`` serves list/stream reads from column rows instead of
+    ORM entities; the returned dicts are identical in both modes.
+    """
+
+    def __init__(self, session: Session, *, read_mode: str = "orm"):
+        self.session = session
+        self._scope_depth = 0
+        self._set_read_mode(read_mode)
+
+    # ------------------------------------------------------------------
+    # Transactions
+    # ------------------------------------------------------------------
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """Group every write issued inside the block into a single commit.
+
+        Scopes may be nested; only the outermost one commits. Any exception
+        rolls back the whole unit of work and is re-raised.
+        """
+
+        self._scope_depth += 1
+        try:
+            yield self.session
+            if self._scope_depth == 1:
+                self.session.commit()
+        except Exception:
+            if self._scope_depth == 1:
+                self.session.rollback()
+            raise
+        finally:
+            self._scope_depth -= 1
+
+    def _commit(self) -> None:
+        if self._scope_depth == 0:
+            self.session.commit()
+
+    def _read(self, stmt: Select, kind: str, **options: Any) -> Iterator[dict]:
+        columns, to_dict = self._core_or_orm(kind)
+        if columns is not None:
+            result = self.session.execute(
+                stmt.with_only_columns(*columns).execution_options(**options)
+            )
+            return (to_dict(row._mapping) for row in result)
+        return (
+            to_dict(entity)
+            for entity in self.session.scalars(stmt.execution_options(**options))
+        )
+
+    def _add_all(self, entities: list) -> None:
+        self.session.add_all(entities)
+        self._commit()
+
+    # ------------------------------------------------------------------
+    # Goals
+    # ------------------------------------------------------------------
+    def create_goal(self, payload: dict) -> dict:
+        goal = self._build_goal(payload)
+        result = self._goal_to_dict(goal)
+        self._add_all([goal])
+        return result
+
+    def get_goal(self, goal_id: str) -> dict | None:
+        goal = self.session.get(Goal, goal_id)
+        if not goal:
+            return None
+        return self._goal_to_dict(goal)
+
+    def finalize_goal(
+        self,
+        goal_id: str,
+        *,
+        motivation: str | None = None,
+        metrics: Iterable[dict] = (),
+        weekly_plan: dict[str, Iterable[dict]] | None = None,
+    ) -> dict:
+        """Persist a conversation's draft for ``goal_id`` in one transaction.
+
+        The goal's motivation is updated and its metrics and weekly steps are
+        replaced wholesale, so retrying after a failure (or finalizing twice)
+        leaves exactly one copy of each row.
+        """
+
+        metric_rows, step_rows = self._build_finalized_rows(
+            goal_id, metrics, weekly_plan or {}
+        )
+        with self.session_scope():
+            goal = self.session.get(Goal, goal_id)
+            if goal is None:
+                raise ValueError(f"unknown goal_id {goal_id!r}")
+            if motivation is not None:
+                goal.motivation = motivation
+            for stmt in _clear_finalized_rows(goal_id):
+                self.session.execute(stmt)
+            self.session.add_all([*metric_rows, *step_rows])
+            result = self._goal_to_dict(goal)
+        return {**result, "metrics": len(metric_rows), "weekly_steps": len(step_rows)}
+
+    # ------------------------------------------------------------------
+    # Boss stages
+    # ------------------------------------------------------------------
+    def create_boss_stage(self, goal_id: str, payload: dict) -> dict:
+        return self.create_boss_stages(goal_id, [payload])[0]
+
+    def create_boss_stages(self, goal_id: str, payloads: Iterable[dict]) -> list[dict]:
+        stages = [self._build_boss_stage(goal_id, payload) for payload in payloads]
+        result = [self._boss_stage_to_dict(stage) for stage in stages]
+        self._add_all(stages)
+        return result
+
+    def list_boss_stages(self, goal_id: str) -> list[dict]:
+        return list(self._read(_boss_stages_query(goal_id), "boss_stage"))
+
+    # ------------------------------------------------------------------
+    # Quests
+    # ------------------------------------------------------------------
+    def create_quest(self, goal_id: str, payload: dict) -> dict:
+        return self.create_quests(goal_id, [payload])[0]
+
+    def create_quests(self, goal_id: str, payloads: Iterable[dict]) -> list[dict]:
+        quests = [self._build_quest(goal_id, payload) for payload in payloads]
+        result = [self._quest_to_dict(quest) for quest in quests]
+        self._add_all(quests)
+        return result
+
+    def get_quest(self, quest_id: str) -> dict | None:
+        quest = self.session.get(Quest, quest_id)
+        if not quest:
+            return None
+        return self._quest_to_dict(quest)
+
+    def find_quests_by_tags(
+        self, goal_id: str, tags: Iterable[str], match: str = "any"
+    ) -> list[dict]:
+        """Return the goal's quests carrying any (or all) of ``tags``.
+
+        Quests come back by ``created_at`` and then ``quest_id``; quests created
+        in one batch share a timestamp, so their relative order is arbitrary.
+        """
+
+        stmt = _quests_by_tags_query(goal_id, tags, match)
+        if stmt is None:
+            return []
+        return list(self._read(stmt, "quest"))
+
+    # ------------------------------------------------------------------
+    # Quest logs
+    # ------------------------------------------------------------------
+    def log_quest_event(self, payload: dict) -> dict:
+        return self.log_quest_events([payload])[0]
+
+    def log_quest_events(self, payloads: Iterable[dict]) -> list[dict]:
+        logs = [self._build_quest_log(payload) for payload in payloads]
+        result = [self._quest_log_to_dict(log) for log in logs]
+        self._add_all(logs)
+        return result
+
+    def list_recent_quest_logs(self, goal_id: str, limit: int = 10) -> list[dict]:
+        return list(self._read(_recent_quest_logs_query(goal_id, limit), "quest_log"))
+
+    def iter_quest_logs(
+        self,
+        goal_id: str,
+        since: datetime | str | None = None,
+        until: datetime | str | None = None,
+        batch_size: int = 500,
+    ) -> Iterator[dict]:
+        """Stream a goal's logs oldest-first in ``[since, until)``.
+
+        Pages are fetched with keyset pagination on ``(occurred_at, log_id)``,
+        so only one batch of rows is held in memory at a time.
+        """
+
+        base = _quest_log_window_query(goal_id, since, until, batch_size)
+        last_key: tuple[datetime, str] | None = None
+        while True:
+            stmt = _after_quest_log_key(base, last_key)
+            fetched = 0
+            for record in self._read(stmt, "quest_log", yield_per=batch_size):
+                fetched += 1
+                last_key = _quest_log_key(record)
+                yield record
+            if fetched < batch_size:
+                return
+
+    # ------------------------------------------------------------------
+    # Conversation summaries
+    # ------------------------------------------------------------------
+    def create_conversation_summary(self, payload: dict) -> dict:
+        summary = self._build_conversation_summary(payload)
+        result = self._conversation_summary_to_dict(summary)
+        self._add_all([summary])
+        return result
+
+
+class AsyncSQLAlchemyStorage(_RecordMapper):
+    """Asyncio counterpart of :class:`SQLAlchemyStorage` over an ``AsyncSession``.
+
+    Every method mirrors the sync signature and returns identical dicts, but
+    must be awaited.
+    """
+
+    def __init__(self, session: AsyncSession, *, read_mode: str = "orm"):
+        self.session = session
+        self._scope_depth = 0
+        self._set_read_mode(read_mode)
+
+    # ------------------------------------------------------------------
+    # Transactions
+    # ------------------------------------------------------------------
+    @asynccontextmanager
+    async def session_scope(self) -> AsyncIterator[AsyncSession]:
+        """Async variant of :meth:`SQLAlchemyStorage.session_scope`."""
+
+        self._scope_depth += 1
+        try:
+            yield self.session
+            if self._scope_depth == 1:
+                await self.session.commit()
+        except Exception:
+            if self._scope_depth == 1:
+                await self.session.rollback()
+            raise
+        finally:
+            self._scope_depth -= 1
+
+    async def _add_all(self, entities: list) -> None:
+        self.session.add_all(entities)
+        if self._scope_depth == 0:
+            await self.session.commit()
+
+    async def _read(self, stmt: Select, kind: str) -> list[dict]:
+        columns, to_dict = self._core_or_orm(kind)
+        if columns is not None:
+            result = await self.session.execute(stmt.with_only_columns(*columns))
+            return [to_dict(row._mapping) for row in result]
+        return [to_dict(entity) for entity in await self.session.scalars(stmt)]
+
+    # ------------------------------------------------------------------
+    # Goals
+    # ------------------------------------------------------------------
+    async def create_goal(self, payload: dict) -> dict:
+        goal = self._build_goal(payload)
+        result = self._goal_to_dict(goal)
+        await self._add_all([goal])
+        return result
+
+    async def get_goal(self, goal_id: str) -> dict | None:
+        goal = await self.session.get(Goal, goal_id)
+        if not goal:
+            return None
+        return self._goal_to_dict(goal)
+
+    async def finalize_goal(
+        self,
+        goal_id: str,
+        *,
+        motivation: str | None = None,
+        metrics: Iterable[dict] = (),
+        weekly_plan: dict[str, Iterable[dict]] | None = None,
+    ) -> dict:
+        metric_rows, step_rows = self._build_finalized_rows(
+            goal_id, metrics, weekly_plan or {}
+        )
+        async with self.session_scope():
+            goal = await self.session.get(Goal, goal_id)
+            if goal is None:
+                raise ValueError(f"unknown goal_id {goal_id!r}")
+            if motivation is not None:
+                goal.motivation = motivation
+            for stmt in _clear_finalized_rows(goal_id):
+                await self.session.execute(stmt)
+            self.session.add_all([*metric_rows, *step_rows])
+            result = self._goal_to_dict(goal)
+        return {**result, "metrics": len(metric_rows), "weekly_steps": len(step_rows)}
+
+    # ------------------------------------------------------------------
+    # Boss stages
+    # ------------------------------------------------------------------
+    async def create_boss_stage(self, goal_id: str, payload: dict) -> dict:
+        return (await self.create_boss_stages(goal_id, [payload]))[0]
+
+    async def create_boss_stages(
+        self, goal_id: str, payloads: Iterable[dict]
+    ) -> list[dict]:
+        stages = [self._build_boss_stage(goal_id, payload) for payload in payloads]
+        result = [self._boss_stage_to_dict(stage) for stage in stages]
+        await self._add_all(stages)
+        return result
+
+    async def list_boss_stages(self, goal_id: str) -> list[dict]:
+        return await self._read(_boss_stages_query(goal_id), "boss_stage")
+
+    # ------------------------------------------------------------------
+    # Quests
+    # ------------------------------------------------------------------
+    async def create_quest(self, goal_id: str, payload: dict) -> dict:
+        return (await self.create_quests(goal_id, [payload]))[0]
+
+    async def create_quests(self, goal_id: str, payloads: Iterable[dict]) -> list[dict]:
+        quests = [self._build_quest(goal_id, payload) for payload in payloads]
+        result = [self._quest_to_dict(quest) for quest in quests]
+        await self._add_all(quests)
+        return result
+
+    async def get_quest(self, quest_id: str) -> dict | None:
+        quest = await self.session.get(Quest, quest_id)
+        if not quest:
+            return None
+        return self._quest_to_dict(quest)
+
+    async def find_quests_by_tags(
+        self, goal_id: str, tags: Iterable[str], match: str = "any"
+    ) -> list[dict]:
+        stmt = _quests_by_tags_query(goal_id, tags, match)
+        if stmt is None:
+            return []
+        return await self._read(stmt, "quest")
+
+    # ------------------------------------------------------------------
+    # Quest logs
+    # ------------------------------------------------------------------
+    async def log_quest_event(self, payload: dict) -> dict:
+        return (await self.log_quest_events([payload]))[0]
+
+    async def log_quest_events(self, payloads: Iterable[dict]) -> list[dict]:
+        logs = [self._build_quest_log(payload) for payload in payloads]
+        result = [self._quest_log_to_dict(log) for log in logs]
+        await self._add_all(logs)
+        return result
+
+    async def list_recent_quest_logs(self, goal_id: str, limit: int = 10) -> list[dict]:
+        return await self._read(_recent_quest_logs_query(goal_id, limit), "quest_log")
+
+    async def iter_quest_logs(
+        self,
+        goal_id: str,
+        since: datetime | str | None = None,
+        until: datetime | str | None = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[dict]:
+        """Async variant of :meth:`SQLAlchemyStorage.iter_quest_logs`."""
+
+        base = _quest_log_window_query(goal_id, since, until, batch_size)
+        last_key: tuple[datetime, str] | None = None
+        while True:
+            page = await self._read(_after_quest_log_key(base, last_key), "quest_log")
+            for record in page:
+                last_key = _quest_log_key(record)
+                yield record
+            if len(page) < batch_size:
+                return
+
+    # ------------------------------------------------------------------
+    # Conversation summaries
+    # ------------------------------------------------------------------
+    async def create_conversation_summary(self, payload: dict) -> dict:
+        summary = self._build_conversation_summary(payload)
+        result = self._conversation_summary_to_dict(summary)
+        await self._add_all([summary])
+        return result
+
+
+# Connection pragmas applied to file-backed SQLite databases, selected with
+# GOALER_SQLITE_PROFILE. "performance" trades the last few commits on power
+# loss (synchronous=NORMAL under WAL) for far fewer fsyncs.
+SQLITE_PROFILES: dict[str, dict[str, str | int]] = {
+    "baseline": {},
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -65536,
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_SQLITE_PROFILE = "performance"
+
+_ENGINES: dict[str, Engine] = {}
+_SESSION_FACTORIES: dict[str, sessionmaker[Session]] = {}
+_ASYNC_ENGINES: dict[str, AsyncEngine] = {}
+_ASYNC_SESSION_FACTORIES: dict[str, async_sessionmaker[AsyncSession]] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _resolve_database_url(database_url: str | None) -> str:
+    return database_url or os.getenv("GOALER_DATABASE_URL") or "sqlite:///data/goaler.db"
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in {"sqlite://", "sqlite:///:memory:"} or url.startswith(
+        "sqlite:///:memory:"
+    )
+
+
+def _ensure_sqlite_directory(url: str) -> None:
+    if url.startswith("sqlite:///") and not _is_memory_sqlite(url):
         db_path = url.replace("sqlite:///", "", 1)
         directory = os.path.dirname(db_path)
         if directory:
             os.makedirs(directory, exist_ok=True)
-    engine = create_engine(url, future=True)
-    Base.metadata.create_all(engine)
-    return sessionmaker(bind=engine, expire_on_commit=False, future=True)
+
+
+def _async_database_url(url: str) -> str:
+    # Plain SQLite URLs are upgraded to the aiosqlite driver; other URLs must
+    # already name an async driver (e.g. postgresql+asyncpg).
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://") :]
+    return url
+
+
+def _env_int(name: str) -> int | None:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return None
+    return int(raw)
+
+
+def _pool_options(url: str, pool_size: int | None, max_overflow: int | None) -> dict:
+    # In-memory SQLite uses SingletonThreadPool, which rejects overflow sizing.
+    if _is_memory_sqlite(url):
+        return {}
+    options: dict = {}
+    pool_size = pool_size if pool_size is not None else _env_int("GOALER_DB_POOL_SIZE")
+    max_overflow = (
+        max_overflow
+        if max_overflow is not None
+        else _env_int("GOALER_DB_MAX_OVERFLOW")
+    )
+    if pool_size is not None:
+        options["pool_size"] = pool_size
+    if max_overflow is not None:
+        options["max_overflow"] = max_overflow
+    return options
+
+
+def _resolve_sqlite_profile(profile: str | None) -> dict[str, str | int]:
+    name = profile or os.getenv("GOALER_SQLITE_PROFILE") or DEFAULT_SQLITE_PROFILE
+    try:
+        return SQLITE_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown SQLite profile {name!r}; expected one of {sorted(SQLITE_PROFILES)}"
+        ) from None
+
+
+def apply_sqlite_profile(engine: Engine, profile: str | None = None) -> None:
+    """Run the profile's PRAGMAs on every new DBAPI connection of ``engine``."""
+
+    pragmas = _resolve_sqlite_profile(profile)
+    if not pragmas:
+        return
+
+    def _on_connect(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    event.listen(engine, "connect", _on_connect)
+
+
+def ensure_indexes(bind: Engine | Connection) -> None:
+    """Create model indexes missing from tables that predate them.
+
+    ``create_all`` only emits indexes together with new tables, so databases
+    created by older releases are upgraded here in place.
+    """
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+
+
+def backfill_quest_tags(session: Session, batch_size: int = 500) -> int:
+    """Populate ``quest_tags`` from legacy comma-separated ``variation_tags``.
+
+    Quests are walked in ``quest_id`` keyset batches and each batch is
+    committed on its own, so the backfill can be interrupted and rerun.
+    Returns the number of tag rows inserted.
+    """
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+
+    inserted = 0
+    last_quest_id: str | None = None
+    while True:
+        stmt = (
+            select(Quest.quest_id, Quest.goal_id, Quest.variation_tags)
+            .where(Quest.variation_tags.is_not(None))
+            .order_by(Quest.quest_id)
+            .limit(batch_size)
+        )
+        if last_quest_id is not None:
+            stmt = stmt.where(Quest.quest_id > last_quest_id)
+        batch = session.execute(stmt).all()
+        if not batch:
+            return inserted
+
+        quest_ids = [row.quest_id for row in batch]
+        existing = {
+            (link.quest_id, link.tag)
+            for link in session.execute(
+                select(QuestTag.quest_id, QuestTag.tag).where(
+                    QuestTag.quest_id.in_(quest_ids)
+                )
+            )
+        }
+        rows = [
+            {"quest_id": row.quest_id, "goal_id": row.goal_id, "tag": tag}
+            for row in batch
+            for tag in _unique_tags(_tags_from_string(row.variation_tags))
+            if (row.quest_id, tag) not in existing
+        ]
+        if rows:
+            session.execute(insert(QuestTag), rows)
+        session.commit()
+        inserted += len(rows)
+        last_quest_id = quest_ids[-1]
+
+
+def _bootstrap_schema(connection: Connection) -> None:
+    Base.metadata.create_all(connection)
+    ensure_indexes(connection)
+
+
+def get_engine(
+    database_url: str | None = None,
+    *,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    sqlite_profile: str | None = None,
+) -> Engine:
+    """Return the process-wide engine for ``database_url``.
+
+    The first call per URL creates the engine, sizes its pool (arguments or
+    ``GOALER_DB_POOL_SIZE`` / ``GOALER_DB_MAX_OVERFLOW``), applies the SQLite
+    profile to file databases and creates the schema. Later calls reuse it;
+    pool and profile arguments are ignored once cached.
+    """
+
+    url = _resolve_database_url(database_url)
+    engine = _ENGINES.get(url)
+    if engine is not None:
+        return engine
+    with _REGISTRY_LOCK:
+        engine = _ENGINES.get(url)
+        if engine is not None:
+            return engine
+        _ensure_sqlite_directory(url)
+        engine = create_engine(
+            url, future=True, **_pool_options(url, pool_size, max_overflow)
+        )
+        if url.startswith("sqlite:") and not _is_memory_sqlite(url):
+            apply_sqlite_profile(engine, sqlite_profile)
+        with engine.begin() as connection:
+            _bootstrap_schema(connection)
+        _ENGINES[url] = engine
+        return engine
+
+
+def create_session_factory(database_url: str | None = None) -> sessionmaker[Session]:
+    url = _resolve_database_url(database_url)
+    factory = _SESSION_FACTORIES.get(url)
+    if factory is not None:
+        return factory
+    engine = get_engine(url)
+    with _REGISTRY_LOCK:
+        factory = _SESSION_FACTORIES.get(url)
+        if factory is None:
+            factory = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+            _SESSION_FACTORIES[url] = factory
+        return factory
 
 
 def create_session(database_url: str | None = None) -> Session:
@@ -209,8 +982,199 @@ def create_session(database_url: str | None = None) -> Session:
     return factory()
 
 
+class ThreadLocalStorage:
+    """Give every thread its own :class:`SQLAlchemyStorage` and ``Session``.
+
+    A ``Session`` must not be shared between threads, so tools dispatched on a
+    thread pool go through this facade; each attribute access is forwarded to
+    the calling thread's storage, created on first use. In-memory SQLite gives
+    each thread a separate database, so such factories report
+    ``thread_safe = False`` and callers should stay on one thread.
+
+    Each method call (a ``session_scope`` block, or a returned stream once it
+    is exhausted, closed or garbage-collected) ends by closing the thread's
+    session. Its transaction and identity map therefore never outlive the
+    operation, and the next read sees rows other threads committed in the
+    meantime. The session itself is reused. Methods are looked up on the
+    calling thread's storage at call time, so a bound method such as
+    ``storage.create_conversation_summary`` may be handed to other threads.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None = None,
+        *,
+        read_mode: str = "orm",
+    ) -> None:
+        self.session_factory = session_factory or create_session_factory()
+        self.read_mode = read_mode
+        self._local = threading.local()
+        self._sessions: list[Session] = []
+        # Streams started but not yet finished, per storage (hence per thread).
+        self._streams: dict[SQLAlchemyStorage, int] = {}
+        self._lock = threading.Lock()
+        bind = getattr(self.session_factory, "kw", {}).get("bind")
+        url = getattr(bind, "url", None)
+        self.thread_safe = url is not None and not (
+            url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._storage(), name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        return functools.partial(self._call, name)
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        storage = self._storage()
+        try:
+            with storage.session_scope() as session:
+                yield session
+        finally:
+            self._release(storage)
+
+    def _call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        storage = self._storage()
+        try:
+            result = getattr(storage, name)(*args, **kwargs)
+        except BaseException:
+            self._release(storage)
+            raise
+        if isinstance(result, Iterator):
+            return self._release_after(storage, result)
+        self._release(storage)
+        return result
+
+    def _release_after(self, storage: SQLAlchemyStorage, stream: Iterator[Any]) -> Iterator[Any]:
+        # Counted from the first item: a stream never started holds no session.
+        with self._lock:
+            self._streams[storage] = self._streams.get(storage, 0) + 1
+        try:
+            yield from stream
+        finally:
+            # Also runs when the caller abandons the stream (close() or GC).
+            with self._lock:
+                remaining = self._streams.pop(storage) - 1
+                if remaining:
+                    self._streams[storage] = remaining
+            self._release(storage)
+
+    def _release(self, storage: SQLAlchemyStorage) -> None:
+        # Inside a session_scope, or while a stream is still being read, the
+        # session stays open; the outermost operation closes it.
+        with self._lock:
+            streaming = storage in self._streams
+        if storage._scope_depth == 0 and not streaming:
+            storage.session.close()
+
+    def _storage(self) -> SQLAlchemyStorage:
+        storage = getattr(self._local, "storage", None)
+        if storage is None:
+            session = self.session_factory()
+            with self._lock:
+                self._sessions.append(session)
+            storage = self._local.storage = SQLAlchemyStorage(
+                session, read_mode=self.read_mode
+            )
+        return storage
+
+    def close(self) -> None:
+        """Close the session of every thread that used this storage."""
+
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+
+def dispose_all() -> None:
+    """Dispose every registered engine; call once on process shutdown."""
+
+    with _REGISTRY_LOCK:
+        engines = list(_ENGINES.values())
+        _ENGINES.clear()
+        _SESSION_FACTORIES.clear()
+    for engine in engines:
+        engine.dispose()
+
+
+async def get_async_engine(
+    database_url: str | None = None,
+    *,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    sqlite_profile: str | None = None,
+) -> AsyncEngine:
+    """Async counterpart of :func:`get_engine` (SQLite URLs use aiosqlite)."""
+
+    url = _resolve_database_url(database_url)
+    engine = _ASYNC_ENGINES.get(url)
+    if engine is not None:
+        return engine
+
+    _ensure_sqlite_directory(url)
+    engine = create_async_engine(
+        _async_database_url(url), **_pool_options(url, pool_size, max_overflow)
+    )
+    if url.startswith("sqlite:") and not _is_memory_sqlite(url):
+        apply_sqlite_profile(engine.sync_engine, sqlite_profile)
+    async with engine.begin() as connection:
+        await connection.run_sync(_bootstrap_schema)
+
+    with _REGISTRY_LOCK:
+        registered = _ASYNC_ENGINES.setdefault(url, engine)
+    if registered is not engine:
+        await engine.dispose()
+    return registered
+
+
+async def create_async_session_factory(
+    database_url: str | None = None,
+) -> async_sessionmaker[AsyncSession]:
+    url = _resolve_database_url(database_url)
+    factory = _ASYNC_SESSION_FACTORIES.get(url)
+    if factory is not None:
+        return factory
+    engine = await get_async_engine(url)
+    with _REGISTRY_LOCK:
+        return _ASYNC_SESSION_FACTORIES.setdefault(
+            url, async_sessionmaker(bind=engine, expire_on_commit=False)
+        )
+
+
+async def create_async_session(database_url: str | None = None) -> AsyncSession:
+    factory = await create_async_session_factory(database_url)
+    return factory()
+
+
+async def dispose_all_async() -> None:
+    """Dispose every registered async engine; await once on shutdown."""
+
+    with _REGISTRY_LOCK:
+        engines = list(_ASYNC_ENGINES.values())
+        _ASYNC_ENGINES.clear()
+        _ASYNC_SESSION_FACTORIES.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
 __all__ = [
+    "READ_MODES",
+    "SQLITE_PROFILES",
+    "AsyncSQLAlchemyStorage",
     "SQLAlchemyStorage",
+    "ThreadLocalStorage",
+    "apply_sqlite_profile",
+    "backfill_quest_tags",
+    "create_async_session",
+    "create_async_session_factory",
     "create_session",
     "create_session_factory",
+    "dispose_all",
+    "dispose_all_async",
+    "ensure_indexes",
+    "get_async_engine",
+    "get_engine",
 ]
@@ -0,0 +1,193 @@
+"""Opt-in read-through cache in front of :class:`SQLAlchemyStorage`."""
+
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable
+
+from .storage import SQLAlchemyStorage
+
+_MISSING = object()
+
+
+class CachedStorage:
+    """Cache goal, quest and boss-stage reads with LRU + TTL eviction.
+
+    Wrap an existing storage to opt in::
+
+        agent = GoalSettingAgent(storage=CachedStorage(SQLAlchemyStorage(session)))
+
+    Writes that touch a goal (``create_boss_stage(s)``, ``create_quest(s)``,
+    ``finalize_goal``) drop every cached entry belonging to that goal. A value
+    loaded while an invalidation ran is returned but not cached, so a read
+    racing a write cannot put the old row back. Methods that are not cached
+    are forwarded to the wrapped storage unchanged.
+    """
+
+    def __init__(
+        self,
+        storage: SQLAlchemyStorage,
+        *,
+        max_entries: int = 1024,
+        ttl_seconds: float | None = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self.storage = storage
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float | None, str | None, Any]] = (
+            OrderedDict()
+        )
+        self._keys_by_goal: dict[str, set[Hashable]] = {}
+        # Bumped by every invalidation; a load only stores if it is unchanged.
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "storage":
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
+    # ------------------------------------------------------------------
+    # Cached reads
+    # ------------------------------------------------------------------
+    def get_goal(self, goal_id: str) -> dict | None:
+        return self._read_through(
+            ("goal", goal_id), lambda: self.storage.get_goal(goal_id), lambda _: goal_id
+        )
+
+    def get_quest(self, quest_id: str) -> dict | None:
+        return self._read_through(
+            ("quest", quest_id),
+            lambda: self.storage.get_quest(quest_id),
+            lambda quest: quest["goal_id"],
+        )
+
+    def list_boss_stages(self, goal_id: str) -> list[dict]:
+        return self._read_through(
+            ("boss_stages", goal_id),
+            lambda: self.storage.list_boss_stages(goal_id),
+            lambda _: goal_id,
+        )
+
+    # ------------------------------------------------------------------
+    # Invalidating writes
+    # ------------------------------------------------------------------
+    def create_boss_stage(self, goal_id: str, payload: dict) -> dict:
+        result = self.storage.create_boss_stage(goal_id, payload)
+        self.invalidate_goal(goal_id)
+        return result
+
+    def create_boss_stages(self, goal_id: str, payloads: Iterable[dict]) -> list[dict]:
+        result = self.storage.create_boss_stages(goal_id, payloads)
+        self.invalidate_goal(goal_id)
+        return result
+
+    def create_quest(self, goal_id: str, payload: dict) -> dict:
+        result = self.storage.create_quest(goal_id, payload)
+        self.invalidate_goal(goal_id)
+        return result
+
+    def create_quests(self, goal_id: str, payloads: Iterable[dict]) -> list[dict]:
+        result = self.storage.create_quests(goal_id, payloads)
+        self.invalidate_goal(goal_id)
+        return result
+
+    def finalize_goal(self, goal_id: str, **draft: Any) -> dict:
+        result = self.storage.finalize_goal(goal_id, **draft)
+        self.invalidate_goal(goal_id)
+        return result
+
+    # ------------------------------------------------------------------
+    # Cache management
+    # ------------------------------------------------------------------
+    def invalidate_goal(self, goal_id: str) -> None:
+        """Drop every cached entry that belongs to ``goal_id``."""
+
+        with self._lock:
+            self._version += 1
+            for key in self._keys_by_goal.pop(goal_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._keys_by_goal.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _read_through(
+        self,
+        key: Hashable,
+        load: Callable[[], Any],
+        owner: Callable[[Any], str],
+    ) -> Any:
+        cached, version = self._lookup(key)
+        if cached is not _MISSING:
+            return copy.deepcopy(cached)
+        value = load()
+        # Misses are not cached: the row may be created a moment later.
+        if value is not None:
+            self._store(key, owner(value), value, version)
+        return copy.deepcopy(value)
+
+    def _lookup(self, key: Hashable) -> tuple[Any, int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, goal_id, value = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value, self._version
+                self._discard(key, goal_id)
+                self.expirations += 1
+            self.misses += 1
+            return _MISSING, self._version
+
+    def _store(self, key: Hashable, goal_id: str | None, value: Any, version: int) -> None:
+        expires_at = None
+        if self.ttl_seconds is not None:
+            expires_at = self._clock() + self.ttl_seconds
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (expires_at, goal_id, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            if goal_id is not None:
+                self._keys_by_goal.setdefault(goal_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, (_, old_goal_id, _) = next(iter(self._entries.items()))
+                self._discard(old_key, old_goal_id)
+                self.evictions += 1
+
+    def _discard(self, key: Hashable, goal_id: str | None) -> None:
+        self._entries.pop(key, None)
+        if goal_id is not None:
+            keys = self._keys_by_goal.get(goal_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_goal[goal_id]
+
+
+__all__ = ["CachedStorage"]
@@ -0,0 +1,122 @@
+"""Run the tool calls of one LLM turn concurrently without reordering effects."""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, NamedTuple, Sequence
+
+# Conversation-state keys each agent tool writes. Calls whose key sets overlap
+# run in the order the model issued them; ``None`` (and any tool missing here)
+# conflicts with every other call of the turn.
+TOOL_STATE_KEYS: dict[str, frozenset[str] | None] = {
+    "create_goal": None,
+    "finalize_goal": None,
+    "add_metric": frozenset({"metrics"}),
+    "set_motivation": frozenset({"motivation"}),
+    "define_boss_stages": frozenset({"boss_stage_ids"}),
+    "propose_weekly_plan": frozenset({"weekly_plan"}),
+    "propose_daily_tasks": frozenset({"current_variations", "last_weekly_step"}),
+    "propose_quests": frozenset({"current_variations"}),
+    "choose_quest": frozenset({"accepted_quests", "current_variations"}),
+    "log_quest_outcome": frozenset({"quest_logs"}),
+}
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class ToolCall(NamedTuple):
+    name: str
+    method: Callable[..., Any]
+    kwargs: dict[str, Any]
+
+
+def _conflicts(left: str, right: str) -> bool:
+    left_keys = TOOL_STATE_KEYS.get(left)
+    right_keys = TOOL_STATE_KEYS.get(right)
+    if left_keys is None or right_keys is None:
+        return True
+    return not left_keys.isdisjoint(right_keys)
+
+
+def _dependencies(calls: Sequence[ToolCall]) -> list[set[int]]:
+    return [
+        {earlier for earlier in range(index) if _conflicts(calls[earlier].name, call.name)}
+        for index, call in enumerate(calls)
+    ]
+
+
+def _succeeded(future: Future | None) -> bool:
+    return future is not None and future.done() and future.exception() is None
+
+
+class ToolDispatcher:
+    """Execute a turn's tool calls on a thread pool, keeping results in order.
+
+    Calls that write the same conversation-state keys (see
+    :data:`TOOL_STATE_KEYS`) keep their relative order; independent ones run
+    side by side. Tools that return the whole state snapshot may therefore
+    see an independent sibling's write or not, as with any interleaving.
+    Once a call raises, no further calls are started; the first error in
+    call order is re-raised after the running calls finish.
+
+    With ``max_workers=1`` every call runs inline on the caller's thread,
+    which is what :meth:`for_agent` picks when the agent's storage cannot be
+    shared between threads.
+    """
+
+    def __init__(self, *, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive")
+        self.max_workers = max_workers
+        self._pool: ThreadPoolExecutor | None = None
+
+    @classmethod
+    def for_agent(cls, agent: Any, *, max_workers: int = DEFAULT_MAX_WORKERS) -> "ToolDispatcher":
+        storage = getattr(agent, "storage", None)
+        if not getattr(storage, "thread_safe", False):
+            max_workers = 1
+        return cls(max_workers=max_workers)
+
+    def run(self, calls: Sequence[ToolCall]) -> list[Any]:
+        """Return each call's result, in the order of ``calls``."""
+
+        if self.max_workers == 1 or len(calls) < 2:
+            return [call.method(**call.kwargs) for call in calls]
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="goaler-tool"
+            )
+        dependencies = _dependencies(calls)
+        futures: dict[int, Future] = {}
+        pending = list(range(len(calls)))
+        while pending:
+            for index in [
+                index
+                for index in pending
+                if all(_succeeded(futures.get(dep)) for dep in dependencies[index])
+            ]:
+                call = calls[index]
+                futures[index] = self._pool.submit(call.method, **call.kwargs)
+                pending.remove(index)
+            if not pending:
+                break
+            running = [future for future in futures.values() if not future.done()]
+            if running:
+                wait(running, return_when=FIRST_COMPLETED)
+            if any(future.done() and future.exception() for future in futures.values()):
+                break
+        wait(futures.values())
+        for index in sorted(futures):
+            error = futures[index].exception()
+            if error is not None:
+                raise error
+        return [futures[index].result() for index in range(len(calls))]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+__all__ = ["TOOL_STATE_KEYS", "ToolCall", "ToolDispatcher"]
@@ -0,0 +1,92 @@
+"""JSON Schema for the LLM tools, generated once from :mod:`core.llm_prompt`."""
+
+from __future__ import annotations
+
+import inspect
+import json
+import types
+import typing
+from typing import Any, Callable
+
+from . import llm_prompt
+
+_SCALARS: dict[Any, str] = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    dict: "object",
+}
+
+
+def _type_schema(annotation: Any) -> dict:
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Annotated:
+        schema = _type_schema(args[0])
+        return {"type": schema.pop("type"), "description": args[1], **schema}
+    if origin in (typing.Union, types.UnionType):
+        # Optional parameters are expressed by leaving them out of "required".
+        members = [arg for arg in args if arg is not type(None)]
+        if len(members) != 1:
+            raise TypeError(f"unsupported union {annotation!r}")
+        return _type_schema(members[0])
+    if origin is typing.Literal:
+        return {"type": "string", "enum": list(args)}
+    if origin is list:
+        return {"type": "array", "items": _type_schema(args[0]) if args else {}}
+    if origin is dict:
+        return {"type": "object"}
+    if typing.is_typeddict(annotation):
+        hints = typing.get_type_hints(annotation, include_extras=True)
+        return {
+            "type": "object",
+            "properties": {name: _type_schema(_strip_required(hint)) for name, hint in hints.items()},
+            "required": [name for name in hints if name in annotation.__required_keys__],
+        }
+    if annotation in _SCALARS:
+        return {"type": _SCALARS[annotation]}
+    raise TypeError(f"unsupported annotation {annotation!r}")
+
+
+def _strip_required(hint: Any) -> Any:
+    if typing.get_origin(hint) in (typing.NotRequired, typing.Required):
+        return typing.get_args(hint)[0]
+    return hint
+
+
+def tool_schema(stub: Callable[..., Any]) -> dict:
+    """Build the ``{"type": "function", ...}`` entry for one stub."""
+
+    hints = typing.get_type_hints(stub, include_extras=True)
+    parameters = inspect.signature(stub).parameters
+    return {
+        "type": "function",
+        "function": {
+            "name": stub.__name__,
+            "description": inspect.getdoc(stub) or "",
+            "parameters": {
+                "type": "object",
+                "properties": {name: _type_schema(hints[name]) for name in parameters},
+                "required": [
+                    name
+                    for name, parameter in parameters.items()
+                    if parameter.default is inspect.Parameter.empty
+                ],
+            },
+        },
+    }
+
+
+def build_tool_schemas() -> list[dict]:
+    return [tool_schema(getattr(llm_prompt, name)) for name in llm_prompt.__all__]
+
+
+# Built once at import. Every request sends the same bytes, in __all__ and
+# signature order, so provider-side prompt-prefix caching keeps hitting.
+TOOL_SCHEMAS: list[dict] = build_tool_schemas()
+TOOL_NAMES: tuple[str, ...] = tuple(llm_prompt.__all__)
+TOOL_SCHEMAS_JSON: str = json.dumps(TOOL_SCHEMAS, ensure_ascii=False, indent=2) + "\n"
+
+
+__all__ = ["TOOL_NAMES", "TOOL_SCHEMAS", "TOOL_SCHEMAS_JSON", "build_tool_schemas", "tool_schema"]
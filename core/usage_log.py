@@ -0,0 +1,234 @@
+"""Buffered, rotating JSON-lines writer for ``logs/llm_usage.log``."""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import queue
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+_SEGMENT_SUFFIX = re.compile(r"\.(\d{4}-\d{2}-\d{2})\.(\d+)(\.gz)?$")
+
+
+def log_segments(path: str | Path) -> list[Path]:
+    """Rotated segments of ``path`` oldest first, then ``path`` itself if present.
+
+    Rotated segments are named ``<name>.<YYYY-MM-DD>.<n>[.gz]`` after the UTC
+    day they were written.
+    """
+
+    path = Path(path)
+    rotated: list[tuple[str, int, Path]] = []
+    if path.parent.is_dir():
+        for candidate in path.parent.glob(f"{path.name}.*"):
+            match = _SEGMENT_SUFFIX.fullmatch(candidate.name[len(path.name):])
+            if match:
+                rotated.append((match.group(1), int(match.group(2)), candidate))
+    segments = [candidate for _, _, candidate in sorted(rotated)]
+    if path.is_file():
+        segments.append(path)
+    return segments
+
+
+class UsageLogWriter:
+    """Append usage records from a background thread.
+
+    :meth:`write` only queues the record; the writer thread serializes and
+    appends queued records in one write every ``flush_interval_ms`` or every
+    ``max_buffer`` records, keeping the file open in between. Before a write
+    the file is rotated when it would grow past ``max_bytes`` or when the
+    UTC day has changed since its first record (``rotate_daily``); rotated
+    segments are gzipped. Pending records are written by :meth:`close`,
+    which also runs at interpreter exit. Write errors never reach callers:
+    the records are counted as dropped and the error kept in ``last_error``.
+    Records written after :meth:`close` are dropped the same way.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        flush_interval_ms: float = 1000.0,
+        max_buffer: int = 256,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        rotate_daily: bool = True,
+        compress: bool = True,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        if max_buffer < 1:
+            raise ValueError("max_buffer must be positive")
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        self.path = Path(path)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_buffer = max_buffer
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.compress = compress
+        self._clock = clock
+        self.written = 0
+        self.batches = 0
+        self.rotations = 0
+        self.dropped = 0
+        self.last_error: BaseException | None = None
+        self._handle: BinaryIO | None = None
+        self._size = 0
+        self._segment_day: date | None = None
+        self._queue: queue.Queue[dict | Future | None] = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="goaler-usage-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, record: dict) -> None:
+        """Queue ``record``; it must not be mutated afterwards."""
+
+        # Checked and queued under the close lock, so nothing can land behind
+        # the stop sentinel once the writer thread has exited.
+        with self._close_lock:
+            if self._closed:
+                self.dropped += 1
+                return
+            self._queue.put(record)
+
+    def flush(self) -> None:
+        """Block until every record queued so far is on disk."""
+
+        marker: Future = Future()
+        with self._close_lock:
+            if self._closed:
+                return
+            self._queue.put(marker)
+        marker.result()
+
+    def close(self) -> None:
+        """Write pending records, close the file and stop the writer thread."""
+
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "dropped": self.dropped,
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch: list[dict] = []
+            markers: list[Future] = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                if isinstance(item, Future):
+                    markers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_buffer:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.set_result(None)
+        # close() queues the sentinel under _close_lock after setting _closed,
+        # and write()/flush() only queue under that lock while open, so the
+        # sentinel is always the last item: nothing is left to drain.
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _write(self, batch: list[dict]) -> None:
+        try:
+            data = "".join(
+                json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch
+            ).encode("utf-8")
+            handle = self._prepare(len(data))
+            handle.write(data)
+            handle.flush()
+        except Exception as exc:  # noqa: BLE001 - logging must never break the caller
+            with self._close_lock:
+                self.dropped += len(batch)
+            self.last_error = exc
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+            return
+        self._size += len(data)
+        self.written += len(batch)
+        self.batches += 1
+
+    def _prepare(self, incoming: int) -> BinaryIO:
+        today = self._clock().date()
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists():
+                stat = self.path.stat()
+                self._size = stat.st_size
+                self._segment_day = datetime.fromtimestamp(stat.st_mtime, timezone.utc).date()
+            else:
+                self._size = 0
+                self._segment_day = today
+            self._handle = self.path.open("ab")
+        if self._size and (
+            self._size + incoming > self.max_bytes
+            or (self.rotate_daily and self._segment_day != today)
+        ):
+            self._rotate()
+            self._handle = self.path.open("ab")
+            self._size = 0
+            self._segment_day = today
+        return self._handle
+
+    def _rotate(self) -> None:
+        assert self._handle is not None and self._segment_day is not None
+        self._handle.close()
+        self._handle = None
+        stem = f"{self.path.name}.{self._segment_day.isoformat()}"
+        index = 1
+        while any(
+            (self.path.parent / f"{stem}.{index}{suffix}").exists() for suffix in ("", ".gz")
+        ):
+            index += 1
+        target = self.path.parent / f"{stem}.{index}"
+        self.path.rename(target)
+        if self.compress:
+            with target.open("rb") as source, gzip.open(f"{target}.gz", "wb") as sink:
+                shutil.copyfileobj(source, sink)
+            target.unlink()
+        self.rotations += 1
+
+
+__all__ = ["DEFAULT_MAX_BYTES", "UsageLogWriter", "log_segments"]
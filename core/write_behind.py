@@ -0,0 +1,242 @@
+"""Group-commit write-behind mode for quest outcome logging."""
+
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator
+
+from sqlalchemy.orm import Session
+
+from .storage import SQLAlchemyStorage, _RecordMapper
+
+# "buffered": return as soon as the event is queued; a crash can lose up to
+# one flush window. "durable": block until the batch holding the event has
+# committed, still sharing that commit with concurrent callers.
+DURABILITY_MODES = ("buffered", "durable")
+
+
+@dataclass
+class _Pending:
+    payload: dict | None
+    done: Future | None = field(default=None)
+
+
+class WriteBehindStorage(_RecordMapper):
+    """Queue ``log_quest_event`` writes and commit them in groups.
+
+    A background thread collects queued payloads and writes them with
+    ``log_quest_events`` in one transaction every ``flush_interval_ms`` or
+    every ``max_batch`` items, whichever comes first; in durable mode it
+    commits whatever is queued as soon as the previous commit finishes.
+    Callers get the log dict with a pre-assigned ``log_id`` immediately
+    (buffered) or once its batch has committed (durable). Quest-log reads
+    flush first so a conversation always sees its own writes. A batch that
+    fails to commit is split and retried, so only the offending events fail.
+
+    The writer uses its own sessions from ``session_factory``; every other
+    method is forwarded to the wrapped ``storage``. Pending writes are
+    flushed by :meth:`close`, which also runs at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        storage: SQLAlchemyStorage,
+        session_factory: Callable[[], Session],
+        *,
+        flush_interval_ms: float = 50.0,
+        max_batch: int = 200,
+        durability: str = "buffered",
+    ) -> None:
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}")
+        if max_batch < 1:
+            raise ValueError("max_batch must be positive")
+        self.storage = storage
+        self.durability = durability
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.flushed_batches = 0
+        self.flushed_events = 0
+        self.failed_events = 0
+        self.last_error: BaseException | None = None
+        self._session_factory = session_factory
+        self._queue: queue.Queue[_Pending | None] = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="goaler-write-behind", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "storage":
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def log_quest_event(self, payload: dict) -> dict:
+        return self.log_quest_events([payload])[0]
+
+    def log_quest_events(self, payloads: Iterable[dict]) -> list[dict]:
+        results: list[dict] = []
+        pending: list[_Pending] = []
+        waits: list[Future] = []
+        for payload in payloads:
+            payload = {**payload, "log_id": payload.get("log_id") or str(uuid.uuid4())}
+            # Building the entity validates the payload on the caller's thread.
+            results.append(self._quest_log_to_dict(self._build_quest_log(payload)))
+            done: Future | None = None
+            if self.durability == "durable":
+                done = Future()
+                waits.append(done)
+            pending.append(_Pending(payload, done))
+        self._enqueue(pending)
+        for done in waits:
+            done.result()
+        return results
+
+    # ------------------------------------------------------------------
+    # Reads that must observe queued writes
+    # ------------------------------------------------------------------
+    def list_recent_quest_logs(self, goal_id: str, limit: int = 10) -> list[dict]:
+        self.flush()
+        return self.storage.list_recent_quest_logs(goal_id, limit)
+
+    def iter_quest_logs(self, goal_id: str, *args: Any, **kwargs: Any) -> Iterator[dict]:
+        self.flush()
+        return self.storage.iter_quest_logs(goal_id, *args, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def flush(self) -> None:
+        """Block until every event queued so far has been written."""
+
+        marker: Future = Future()
+        with self._close_lock:
+            if self._closed:
+                return
+            self._queue.put(_Pending(None, marker))
+        marker.result()
+
+    def close(self) -> None:
+        """Flush pending events and stop the writer thread."""
+
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _enqueue(self, items: list[_Pending]) -> None:
+        # Checked and queued under the close lock, so nothing can land behind
+        # the stop sentinel and wait on a writer thread that has exited.
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("write-behind storage is closed")
+            for item in items:
+                self._queue.put(item)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "flushed_batches": self.flushed_batches,
+            "flushed_events": self.flushed_events,
+            "failed_events": self.failed_events,
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch: list[_Pending] = []
+            markers: list[Future] = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                if item.payload is None:
+                    if item.done is not None:
+                        markers.append(item.done)
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    if self.durability == "durable":
+                        # Durable callers are blocked on this batch, so waiting
+                        # for stragglers only adds latency: commit what is queued.
+                        item = self._queue.get_nowait()
+                    else:
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.set_result(None)
+        # Drain anything queued between the stop sentinel and shutdown.
+        leftovers: list[_Pending] = []
+        late_markers: list[Future] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item.payload is not None:
+                leftovers.append(item)
+            elif item is not None and item.done is not None:
+                late_markers.append(item.done)
+        if leftovers:
+            self._write(leftovers)
+        for marker in late_markers:
+            marker.set_result(None)
+
+    def _write(self, batch: list[_Pending]) -> None:
+        session = self._session_factory()
+        try:
+            SQLAlchemyStorage(session).log_quest_events(
+                [pending.payload for pending in batch if pending.payload is not None]
+            )
+        except Exception as exc:
+            session.rollback()
+            if len(batch) > 1:
+                # Constraint errors only show up at commit; retry each half so
+                # one bad row does not take other callers' events down with it.
+                session.close()
+                middle = len(batch) // 2
+                self._write(batch[:middle])
+                self._write(batch[middle:])
+                return
+            # Surfaced to durable callers via their futures, otherwise via stats.
+            self.failed_events += len(batch)
+            self.last_error = exc
+            for pending in batch:
+                if pending.done is not None:
+                    pending.done.set_exception(exc)
+        else:
+            self.flushed_batches += 1
+            self.flushed_events += len(batch)
+            for pending in batch:
+                if pending.done is not None:
+                    pending.done.set_result(None)
+        finally:
+            session.close()
+
+
+__all__ = ["DURABILITY_MODES", "WriteBehindStorage"]
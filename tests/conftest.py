@@ -8,6 +8,14 @@ from core.models import Base
 from core.storage import SQLAlchemyStorage
 
 
+@pytest.fixture(autouse=True)
+def _isolated_runtime_files(tmp_path, monkeypatch) -> None:
+    """Keep the default database and LLM response cache out of the checkout."""
+
+    monkeypatch.setenv("GOALER_DATABASE_URL", f"sqlite:///{tmp_path / 'goaler.db'}")
+    monkeypatch.setenv("GOALER_LLM_CACHE_PATH", str(tmp_path / "llm_cache.db"))
+
+
 @pytest.fixture(scope="function")
 def session() -> Generator[Session, None, None]:
     engine = create_engine("sqlite:///:memory:", future=True)
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from core.context_window import ContextWindow, estimate_tokens
+from core.models import ConversationSummary
+
+
+class StepClock:
+    def __init__(self) -> None:
+        self.now = datetime(2025, 5, 1, tzinfo=timezone.utc)
+
+    def __call__(self) -> datetime:
+        self.now += timedelta(minutes=1)
+        return self.now
+
+
+def _turn(window: ContextWindow, index: int) -> None:
+    window.append({"role": "user", "content": f"turn {index} " + "x" * 200})
+    window.append(
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": f"call_{index}",
+                    "type": "function",
+                    "function": {"name": "add_metric", "arguments": f'{{"metric_name": "m{index}"}}'},
+                }
+            ],
+        }
+    )
+    window.append({"role": "tool", "tool_call_id": f"call_{index}", "content": "{}" * 40})
+    window.append({"role": "assistant", "content": f"reply {index}"})
+
+
+def test_old_turns_fold_into_a_persisted_summary(storage, session) -> None:
+    window = ContextWindow(
+        "system prompt",
+        conversation_id="conv-1",
+        max_tokens=400,
+        keep_turns=2,
+        on_summary=storage.create_conversation_summary,
+        clock=StepClock(),
+    )
+    for index in range(6):
+        _turn(window, index)
+
+    prompt = window.messages()
+    stats = window.stats()
+
+    assert prompt[0] == {"role": "system", "content": "system prompt"}
+    assert prompt[1]["role"] == "system" and "add_metric" in prompt[1]["content"]
+    kept = [message["content"][:6] for message in prompt if message["role"] == "user"]
+    assert kept == [f"turn {index}" for index in range(6 - len(kept), 6)]
+    assert 2 <= len(kept) < 6
+    # Every tool result still follows the assistant message that requested it.
+    assert [message["role"] for message in prompt[2:6]] == ["user", "assistant", "tool", "assistant"]
+    assert stats["turns_kept"] == len(kept)
+    assert stats["tokens_saved"] == stats["full_history_tokens_estimate"] - stats["prompt_tokens_estimate"]
+    assert stats["tokens_saved"] > 0
+    assert stats["prompt_tokens_estimate"] <= 400
+
+    summaries = session.scalars(select(ConversationSummary)).all()
+    assert len(summaries) == 1
+    assert summaries[0].conversation_id == "conv-1"
+    assert summaries[0].period_start < summaries[0].period_end
+
+
+def test_history_within_budget_is_sent_unchanged() -> None:
+    folded: list[dict] = []
+    window = ContextWindow("system", max_tokens=10_000, keep_turns=1, on_summary=folded.append)
+    for index in range(3):
+        _turn(window, index)
+
+    prompt = window.messages()
+
+    assert len(prompt) == 1 + 3 * 4
+    assert window.stats()["tokens_saved"] == 0
+    assert folded == []
+
+
+def test_summaries_roll_forward_across_folds() -> None:
+    folded: list[dict] = []
+    window = ContextWindow("system", max_tokens=300, keep_turns=1, on_summary=folded.append)
+    for index in range(4):
+        _turn(window, index)
+        window.messages()
+
+    assert len(folded) >= 2
+    assert "m0" in folded[0]["summary_text"]
+    assert "reply 1" in folded[-1]["summary_text"]
+    assert window.stats()["prompt_tokens_estimate"] <= 300
+    assert window.stats()["tokens_saved_total"] > window.stats()["tokens_saved"]
+
+
+def test_estimate_counts_hangul_per_character() -> None:
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("목표") == 2
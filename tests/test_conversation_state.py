@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from core.agent import GoalSettingAgent
+from core.conversation_state import ConversationState
+
+FULL_STATE = {
+    "goal_id": "goal-1",
+    "goal_title": "하프 마라톤",
+    "metrics": [{"metric_name": "km", "target_value": 21}],
+    "motivation": None,
+    "onboarding_stage": "STAGE_0_ONBOARDING",
+    "feature_flags": {"loot": False, "energy": False, "boss": False},
+    "boss_stage_ids": ["boss-1", "boss-2"],
+    "weekly_plan": {"boss-1": [{"day": "MON"}]},
+    "current_variations": [],
+    "accepted_quests": [],
+    "last_weekly_step": {"title": "1주차"},
+    "quest_logs": ["log-1"],
+}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [FULL_STATE, {"goal_title": "A"}, {**FULL_STATE, "custom": {"nested": [1]}}, {}],
+    ids=["full", "partial", "extras", "empty"],
+)
+def test_round_trip_is_lossless(data) -> None:
+    state = ConversationState.from_dict(data)
+
+    assert state.to_dict() == data
+    assert json.dumps(state.to_dict(), sort_keys=True) == json.dumps(data, sort_keys=True)
+    assert dict(state) == {
+        key: tuple(value) if key in ConversationState.ID_LIST_FIELDS else value
+        for key, value in data.items()
+    }
+
+
+def test_id_lists_are_tuples_and_unset_keys_stay_absent() -> None:
+    state = ConversationState(goal_title="A")
+    state["accepted_quests"] = ["q1"]
+    state["extra"] = 1
+
+    assert state.accepted_quests == ("q1",)
+    assert "metrics" not in state
+    assert state.get("metrics", "missing") == "missing"
+    del state["extra"]
+    assert state.extras is None
+    assert not hasattr(state, "__dict__")
+
+
+def test_tool_responses_stay_json_identical(storage) -> None:
+    agent = GoalSettingAgent(storage=storage)
+    created = agent.create_goal("conv", "러닝")
+    assert created is not None
+    agent.add_metric(
+        "conv",
+        {"metric_name": "km", "metric_type": "INCREMENTAL", "target_value": 5, "unit": "km"},
+    )
+    agent.define_boss_stages("conv", created["goal_id"], [{"title": "5km"}])
+
+    state = agent.state_manager.get_state("conv")
+    assert state is not None
+
+    assert list(created) == list(FULL_STATE)[:10]
+    assert created["accepted_quests"] == [] and created["boss_stage_ids"] == []
+    assert isinstance(state["boss_stage_ids"], list)
+    assert json.loads(json.dumps(state)) == state
@@ -1,8 +1,12 @@
 from datetime import datetime, timezone
 
 import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
 from core.agent import GoalSettingAgent
+from core.models import Base
+from core.storage import SQLAlchemyStorage
 
 
 @pytest.fixture
@@ -72,6 +76,56 @@ def test_finalize_goal_clears_state(agent) -> None:
     assert agent.state_manager.get_state(conv_id) is None
 
 
+def test_finalize_goal_persists_draft_once(agent) -> None:
+    conv_id = "finalize_conv"
+    created = agent.create_goal(conv_id, "Persist Test")
+    agent.add_metric(conv_id, {"metric_name": "pages", "target_value": 300})
+    agent.set_motivation(conv_id, "Read more")
+    agent.propose_weekly_plan(
+        conv_id, created["goal_id"], "boss-1", [{"title": "Week 1", "week_index": 1}]
+    )
+
+    result = agent.finalize_goal(conv_id)
+    retried = agent.finalize_goal(conv_id)
+
+    assert result["status"] == "ok"
+    assert (result["metrics"], result["weekly_steps"]) == (1, 1)
+    assert result["write_ms"] >= 0
+    assert retried["status"] == "noop"
+    assert agent.storage.get_goal(created["goal_id"])["motivation"] == "Read more"
+
+
+def test_add_metric_rejects_a_metric_without_a_name(agent) -> None:
+    conv_id = "metric_conv"
+    agent.create_goal(conv_id, "Metric Goal")
+
+    result = agent.add_metric(conv_id, {"metric_type": "INCREMENTAL"})
+
+    assert result["status"] == "error" and "metric_name" in result["error"]
+    assert agent.add_metric(conv_id, {"metric_name": "km", "target_value": "5km"})["status"] == "error"
+    assert agent.state_manager.get_state(conv_id)["metrics"] == []
+
+
+@pytest.mark.parametrize("metric", [{"metric_type": "INCREMENTAL"}, {"metric_name": None}])
+def test_finalize_goal_reports_a_malformed_draft(metric) -> None:
+    # Its own engine: the NOT NULL failure rolls back the shared fixture's transaction.
+    engine = create_engine("sqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False, future=True)()
+    agent = GoalSettingAgent(storage=SQLAlchemyStorage(session))
+    conv_id = "malformed_conv"
+    agent.create_goal(conv_id, "Malformed Goal")
+    # A draft restored from an older snapshot skips add_metric's checks.
+    agent.state_manager.append(conv_id, "metrics", metric)
+
+    result = agent.finalize_goal(conv_id)
+
+    assert result["status"] == "error" and "metric_name" in result["error"]
+    assert agent.state_manager.get_state(conv_id) is not None
+    session.close()
+    engine.dispose()
+
+
 def test_onboarding_context_defaults(agent) -> None:
     conv_id = "ctx_conv"
     agent.create_goal(conv_id, "Context Goal")
@@ -119,6 +119,8 @@ def test_tool_call_driven_goal_flow(monkeypatch, capsys):
 
     monkeypatch.setenv("GOALER_USE_MOCK", "false")
     monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    # The scripted responses below are whole completions, not streams.
+    monkeypatch.setenv("GOALER_STREAM", "false")
 
     class FakeGoalSettingAgent:
         """Agent double that records tool usage while mimicking state updates."""
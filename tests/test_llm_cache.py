@@ -0,0 +1,140 @@
+import json
+from types import SimpleNamespace
+from typing import cast
+
+from openai import OpenAI
+from openai.types.chat import ChatCompletion
+
+from core.llm_cache import LLMResponseCache, cached_create, request_key
+
+MESSAGES = [{"role": "user", "content": "요약해줘"}]
+
+
+def _completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 5, "total_tokens": 17},
+        }
+    )
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.requests: list[dict] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **request):
+        self.requests.append(request)
+        return _completion(f"reply {len(self.requests)}")
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_request_key_is_stable_and_ignores_transport_options() -> None:
+    base = {"model": "gpt-4o-mini", "messages": MESSAGES, "temperature": 0}
+    reordered = {"temperature": 0, "messages": MESSAGES, "model": "gpt-4o-mini", "timeout": 5}
+
+    assert request_key(base) == request_key(reordered)
+    assert request_key(base) != request_key({**base, "temperature": 1})
+    assert request_key(base) != request_key({**base, "tools": [{"type": "function"}]})
+
+
+def test_identical_requests_hit_the_cache(tmp_path) -> None:
+    cache = LLMResponseCache(tmp_path / "cache.db")
+    client = FakeClient()
+
+    first, first_hit = cached_create(client, cache, model="gpt-4o-mini", messages=MESSAGES)
+    second, second_hit = cached_create(client, cache, model="gpt-4o-mini", messages=MESSAGES)
+
+    assert (first_hit, second_hit) == (False, True)
+    assert len(client.requests) == 1
+    assert second.choices[0].message.content == first.choices[0].message.content
+    assert cache.stats()["hits"] == 1
+    cache.close()
+
+    # Entries survive a restart.
+    reopened = LLMResponseCache(tmp_path / "cache.db")
+    _, hit = cached_create(client, reopened, model="gpt-4o-mini", messages=MESSAGES)
+    assert hit
+    reopened.close()
+
+
+def test_streamed_requests_bypass_the_cache(tmp_path) -> None:
+    cache = LLMResponseCache(tmp_path / "cache.db")
+    client = FakeClient()
+
+    for _ in range(2):
+        _, hit = cached_create(client, cache, model="m", messages=MESSAGES, stream=True)
+        assert not hit
+
+    assert len(client.requests) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire_after_ttl(tmp_path) -> None:
+    clock = Clock()
+    cache = LLMResponseCache(tmp_path / "cache.db", ttl_seconds=60, clock=clock)
+    cache.put("old", "m", {"value": 1})
+
+    clock.now += 61
+    assert cache.get("old") is None
+
+    cache.put("new", "m", {"value": 2})
+    assert cache.stats()["entries"] == 1
+    assert cache.evictions == 1
+
+
+def test_least_recently_used_entries_go_first_over_max_bytes(tmp_path) -> None:
+    clock = Clock()
+    entry_size = len(json.dumps({"value": "x" * 100}, separators=(",", ":")))
+    cache = LLMResponseCache(tmp_path / "cache.db", max_bytes=entry_size * 2, clock=clock)
+
+    for key in ("a", "b"):
+        clock.now += 1
+        cache.put(key, "m", {"value": "x" * 100})
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.put("c", "m", {"value": "x" * 100})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_cache_hits_are_logged_with_zero_tokens(tmp_path, monkeypatch) -> None:
+    import app
+
+    log_path = tmp_path / "llm_usage.log"
+    monkeypatch.setattr(app, "USAGE_LOG_PATH", log_path)
+    cache = LLMResponseCache(tmp_path / "cache.db")
+    client = FakeClient()
+    summarize = app._llm_summarizer(cast(OpenAI, client), cache)
+    turns = [[{"role": "user", "content": "주 3회 러닝"}]]
+
+    assert summarize(None, turns) == summarize(None, turns) == "reply 1"
+
+    app._close_usage_writers()
+    records = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert [(record["cache_hit"], record["total_tokens"]) for record in records] == [
+        (False, 17),
+        (True, 0),
+    ]
+    assert {record["task"] for record in records} == {"summaries"}
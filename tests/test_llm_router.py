@@ -0,0 +1,258 @@
+import threading
+import time
+
+import pytest
+
+from core.llm_router import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    AttemptAborted,
+    CircuitBreaker,
+    ModelRouter,
+    RouteFailed,
+)
+
+PLAN = {"chat": {"primary": "big", "fallback": "small"}}
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class Flaky(Exception):
+    pass
+
+
+def _router(clock: Clock, **kwargs) -> ModelRouter:
+    options = {"retry_on": (Flaky,), "clock": clock, "sleep": clock.sleep, "rng": lambda: 0.5}
+    return ModelRouter(PLAN, **{**options, **kwargs})
+
+
+def test_healthy_primary_is_used() -> None:
+    clock = Clock()
+    router = _router(clock)
+    seen = []
+
+    def request(model: str, timeout: float) -> str:
+        seen.append((model, timeout))
+        return "ok"
+
+    result, route = router.call("chat", request)
+
+    assert result == "ok"
+    assert seen == [("big", 30.0)]
+    assert route["model"] == "big" and route["route"] == "primary" and route["attempts"] == 1
+    assert route["breaker"] == CLOSED
+
+
+def test_repeated_errors_trip_the_breaker_to_the_fallback() -> None:
+    clock = Clock()
+    router = _router(clock, failure_threshold=2, cooldown_seconds=30)
+    calls = []
+
+    def request(model: str, timeout: float) -> str:
+        calls.append(model)
+        if model == "big":
+            raise Flaky(model)
+        return model
+
+    result, route = router.call("chat", request)
+
+    assert calls == ["big", "big", "small"]
+    assert result == "small"
+    assert route["route"] == "fallback" and route["attempts"] == 3 and route["breaker"] == OPEN
+    # Full jitter: rng() * base * 2**n with rng() = 0.5.
+    assert clock.now == pytest.approx(0.125 + 0.25)
+
+    # Later calls skip the primary until the cooldown allows one probe.
+    router.call("chat", request)
+    assert calls[-1] == "small"
+    clock.now += 30
+    assert router.breaker("big").state == HALF_OPEN
+    router.call("chat", lambda model, timeout: model)
+    assert router.breaker("big").state == CLOSED
+
+
+def test_p95_latency_breach_trips_the_breaker() -> None:
+    clock = Clock()
+    router = _router(clock, latency_p95_seconds=1.0)
+
+    def slow(model: str, timeout: float) -> str:
+        clock.now += 2.0 if model == "big" else 0.1
+        return model
+
+    models = [router.call("chat", slow)[0] for _ in range(6)]
+
+    assert models == ["big"] * 5 + ["small"]
+    assert router.breaker("big").trip_reason == "latency"
+
+
+def test_deadline_bounds_retries() -> None:
+    clock = Clock()
+    router = _router(
+        clock, deadline_seconds=1.0, max_retries=10, backoff_base_seconds=0.4, failure_threshold=99
+    )
+    timeouts = []
+
+    def request(model: str, timeout: float) -> str:
+        timeouts.append(timeout)
+        clock.now += 0.3
+        raise Flaky(model)
+
+    with pytest.raises(RouteFailed) as caught:
+        router.call("chat", request)
+
+    assert isinstance(caught.value.__cause__, Flaky)
+    assert caught.value.route["attempts"] == len(timeouts) < 11
+    assert timeouts[0] == 1.0 and timeouts == sorted(timeouts, reverse=True)
+
+
+def test_non_retryable_errors_propagate_without_counting() -> None:
+    clock = Clock()
+    router = _router(clock)
+
+    def request(model: str, timeout: float) -> str:
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        router.call("chat", request)
+    assert router.breaker("big").state == CLOSED
+
+
+def test_non_retryable_error_on_the_probe_releases_it() -> None:
+    clock = Clock()
+    router = _router(clock, failure_threshold=1, max_retries=0, cooldown_seconds=30)
+
+    def unavailable(model: str, timeout: float) -> str:
+        raise Flaky(model)
+
+    def rejected(model: str, timeout: float) -> str:
+        raise ValueError("400 bad request")
+
+    with pytest.raises(RouteFailed):
+        router.call("chat", unavailable)
+    clock.now += 30
+
+    with pytest.raises(ValueError):
+        router.call("chat", rejected)
+    assert router.breaker("big").state == HALF_OPEN
+
+    result, route = router.call("chat", lambda model, timeout: model)
+    assert result == "big" and route["route"] == "primary"
+    assert router.breaker("big").state == CLOSED
+
+
+def test_half_open_probe_failure_reopens() -> None:
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=5, clock=clock)
+    breaker.record_failure()
+    clock.now += 5
+
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.trips == 2
+
+
+def test_slow_requests_are_hedged_to_the_fallback() -> None:
+    router = ModelRouter(PLAN, hedge_after_seconds=0.05, retry_on=(Flaky,))
+    release = threading.Event()
+
+    def request(model: str, timeout: float) -> str:
+        if model == "big":
+            release.wait(timeout)
+        return model
+
+    try:
+        started = time.perf_counter()
+        result, route = router.call("chat", request)
+        elapsed = time.perf_counter() - started
+    finally:
+        release.set()
+        router.close()
+
+    assert result == "small"
+    assert route["hedged"] and route["model"] == "small" and route["route"] == "primary"
+    assert elapsed < 1.0
+
+
+def test_hedging_can_be_disabled_per_call() -> None:
+    router = ModelRouter(PLAN, hedge_after_seconds=0.01, retry_on=(Flaky,))
+
+    def request(model: str, timeout: float) -> str:
+        time.sleep(0.05)
+        return model
+
+    result, route = router.call("chat", request, hedge=False)
+    router.close()
+
+    assert result == "big" and not route["hedged"]
+
+
+def test_routing_decisions_are_logged(tmp_path, monkeypatch) -> None:
+    import json
+    from types import SimpleNamespace
+    from typing import cast
+
+    from openai import APIConnectionError, OpenAI
+
+    import app
+
+    log_path = tmp_path / "llm_usage.log"
+    monkeypatch.setattr(app, "USAGE_LOG_PATH", log_path)
+    plan = app.LLM_MODEL_PLAN["reflection_reports"]
+
+    def create(**request):
+        if request["model"] == plan["primary"]:
+            raise APIConnectionError(request=None)
+        usage = SimpleNamespace(prompt_tokens=3, completion_tokens=2, total_tokens=5)
+        return SimpleNamespace(usage=usage, choices=[])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    router = ModelRouter(app.LLM_MODEL_PLAN, retry_on=app.RETRYABLE_ERRORS, sleep=lambda _: None)
+
+    app._completion(cast(OpenAI, client), router, None, "reflection_reports", messages=[])
+    with pytest.raises(RouteFailed):
+        app._completion(
+            cast(OpenAI, client),
+            ModelRouter(
+                {"reflection_reports": {"primary": plan["primary"]}},
+                max_retries=0,
+                retry_on=app.RETRYABLE_ERRORS,
+            ),
+            None,
+            "reflection_reports",
+            messages=[],
+        )
+
+    app._close_usage_writers()
+    ok, failed = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert ok["model"] == plan["fallback"] and ok["route"] == "fallback" and ok["attempts"] == 3
+    assert ok["total_tokens"] == 5 and ok["task"] == "reflection_reports"
+    assert ok["latency_ms"] >= 0 and ok["error"] is None and ok["conversation_id"] is None
+    assert failed["error"].startswith("APIConnectionError") and failed["total_tokens"] is None
+
+
+def test_aborted_attempt_fails_the_route_without_retrying() -> None:
+    clock = Clock()
+    router = _router(clock, failure_threshold=1)
+    calls = []
+
+    def request(model: str, timeout: float) -> str:
+        calls.append(model)
+        raise AttemptAborted("partial output") from Flaky(model)
+
+    with pytest.raises(RouteFailed) as caught:
+        router.call("chat", request)
+
+    assert calls == ["big"]
+    assert isinstance(caught.value.__cause__, Flaky)
+    assert router.breaker("big").state == OPEN
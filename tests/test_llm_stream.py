@@ -0,0 +1,117 @@
+import json
+from types import SimpleNamespace
+from typing import cast
+
+import pytest
+from openai import APIConnectionError, OpenAI
+
+from core.agent import GoalSettingAgent
+from core.llm_stream import StreamedReply
+from tools.fake_openai import FakeOpenAIServer
+
+
+def _call(index: int, arguments: str, **first: str) -> dict:
+    fragment: dict = {"index": index, "function": {"arguments": arguments}}
+    if first:
+        fragment["id"] = first["id"]
+        fragment["function"]["name"] = first["name"]
+    return {"tool_calls": [fragment]}
+
+
+def _chunk(delta: dict | None = None, usage: dict | None = None) -> dict:
+    return {"choices": [{"index": 0, "delta": delta}] if delta is not None else [], "usage": usage}
+
+
+def test_fragments_are_assembled_per_tool_call_index() -> None:
+    printed: list[str] = []
+    stream = [
+        _chunk({"role": "assistant", "content": ""}),
+        _chunk({"content": "목표를"}),
+        _chunk({"content": " 만들게요."}),
+        _chunk(_call(0, '{"metric', id="call_a", name="add_metric")),
+        _chunk(_call(1, "", id="call_b", name="set_motivation")),
+        _chunk(_call(0, '_name": "km"}')),
+        _chunk(_call(1, '{"text": "건강"}')),
+        _chunk(usage={"prompt_tokens": 10, "completion_tokens": 4, "total_tokens": 14}),
+    ]
+
+    reply = StreamedReply.consume(stream, printed.append)
+
+    assert printed == ["목표를", " 만들게요."]
+    assert reply.content == "목표를 만들게요."
+    assert [(call.id, call.function.name) for call in reply.tool_calls] == [
+        ("call_a", "add_metric"),
+        ("call_b", "set_motivation"),
+    ]
+    assert json.loads(reply.tool_calls[0].function.arguments) == {"metric_name": "km"}
+    assert reply.usage["total_tokens"] == 14
+    assert reply.ttft is not None and reply.ttft >= 0
+    assert reply.to_message()["tool_calls"][1]["function"]["arguments"] == '{"text": "건강"}'
+
+
+def test_chat_loop_streams_against_local_server(monkeypatch, capsys, tmp_path, storage) -> None:
+    import app
+
+    def _responder(request: dict) -> dict:
+        if request["messages"][-1]["role"] == "user":
+            return {"content": None, "tool_calls": [{"name": "create_goal", "arguments": {"title": "독서"}}]}
+        return {"content": "'독서' 목표를 만들었어요.", "tool_calls": []}
+
+    server = FakeOpenAIServer(responder=_responder).start()
+    real_openai = app.OpenAI
+    monkeypatch.setattr(app, "OpenAI", lambda api_key: real_openai(api_key="sk-local", base_url=server.url))
+    monkeypatch.setattr(app, "GoalSettingAgent", lambda: GoalSettingAgent(storage=storage))
+    monkeypatch.setattr(app, "USAGE_LOG_PATH", tmp_path / "llm_usage.log")
+    monkeypatch.setenv("GOALER_USE_MOCK", "false")
+    monkeypatch.delenv("GOALER_STREAM", raising=False)
+    inputs = iter(["책 읽기 목표", "exit"])
+    monkeypatch.setattr("builtins.input", lambda _prompt: next(inputs))
+    try:
+        app.run_conversation()
+    finally:
+        server.stop()
+
+    captured = capsys.readouterr().out
+    assert "Goaler: '독서' 목표를 만들었어요.\n" in captured
+    assert "TOOL CALL: create_goal({'title': '독서'" in captured
+    second = server.requests[1]
+    assert second["stream"] is True
+    assistant, tool = second["messages"][-2:]
+    assert json.loads(assistant["tool_calls"][0]["function"]["arguments"]) == {"title": "독서"}
+    assert tool["tool_call_id"] == assistant["tool_calls"][0]["id"]
+    usage_lines = (tmp_path / "llm_usage.log").read_text(encoding="utf-8").splitlines()
+    assert len(usage_lines) == 2
+    assert all(json.loads(line)["total_tokens"] > 0 for line in usage_lines)
+
+
+def test_stream_broken_after_output_is_not_retried(monkeypatch, capsys, tmp_path) -> None:
+    import app
+    from core.llm_router import ModelRouter, RouteFailed
+
+    monkeypatch.setattr(app, "USAGE_LOG_PATH", tmp_path / "llm_usage.log")
+    calls: list[str] = []
+
+    def _create(**request):
+        calls.append(request["model"])
+        yield _chunk({"role": "assistant", "content": "목표를"})
+        raise APIConnectionError(request=None)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+    router = ModelRouter(app.LLM_MODEL_PLAN, retry_on=app.RETRYABLE_ERRORS, sleep=lambda _: None)
+
+    with pytest.raises(RouteFailed) as caught:
+        app._routed(
+            router,
+            "goal_planning",
+            lambda model, timeout: app._stream_completion(
+                cast(OpenAI, client), model=model, timeout=timeout, messages=[]
+            ),
+            hedge=False,
+        )
+
+    app._close_usage_writers()
+    assert len(calls) == 1
+    assert isinstance(caught.value.__cause__, APIConnectionError)
+    assert capsys.readouterr().out == "Goaler: 목표를\n"
+    record = json.loads((tmp_path / "llm_usage.log").read_text(encoding="utf-8"))
+    assert record["attempts"] == 1 and record["error"].startswith("APIConnectionError")
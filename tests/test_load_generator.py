@@ -0,0 +1,37 @@
+from tools.bench_llm import run_load
+from tools.fake_openai import GOAL_FLOW_INPUTS, GOAL_FLOW_REPLY, goal_flow_responder
+
+
+def test_goal_flow_responder_is_driven_by_the_history() -> None:
+    first = goal_flow_responder({"messages": [{"role": "user", "content": GOAL_FLOW_INPUTS[0]}]})
+    assert [call["name"] for call in first["tool_calls"]] == ["create_goal"]
+
+    history = [
+        {"role": "user", "content": GOAL_FLOW_INPUTS[0]},
+        {"role": "tool", "content": '{"goal_id": "g-1", "metrics": []}'},
+        {"role": "assistant", "content": GOAL_FLOW_REPLY},
+        {"role": "user", "content": GOAL_FLOW_INPUTS[1]},
+        {"role": "tool", "content": "{}"},
+        {"role": "assistant", "content": GOAL_FLOW_REPLY},
+        {"role": "user", "content": GOAL_FLOW_INPUTS[2]},
+    ]
+    boss = goal_flow_responder({"messages": history})
+    assert boss["tool_calls"][0]["arguments"]["goal_id"] == "g-1"
+    assert goal_flow_responder({"messages": history + [{"role": "tool", "content": "{}"}]}) == {
+        "content": GOAL_FLOW_REPLY,
+        "tool_calls": [],
+    }
+
+
+def test_concurrent_conversations_run_every_tool_offline() -> None:
+    result = run_load(conversations=6, concurrency=3)
+
+    assert result["errors"] == []
+    # One tool-call request and one text reply per scripted user turn.
+    assert result["llm_requests"] == 6 * len(GOAL_FLOW_INPUTS) * 2
+    counts = {name: len(samples) for name, samples in result["latency_ms"].items()}
+    assert counts["add_metric"] == 12
+    for name in ("create_goal", "set_motivation", "define_boss_stages", "choose_quest",
+                 "log_quest_outcome", "finalize_goal"):
+        assert counts[name] == 6
+    assert counts["turn"] == 6 * len(GOAL_FLOW_INPUTS)
@@ -0,0 +1,158 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from core.models import Base, ConversationStateJournal, ConversationStateSnapshot
+from core.state_backends import JournalStateBackend, RedisStateBackend
+from core.state_manager import StateManager
+from tools.fake_redis import FakeRedisServer, RespClient
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'state.db'}", future=True)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    engine.dispose()
+
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedisServer().start()
+    yield server
+    server.stop()
+
+
+def _client(server) -> RespClient:
+    host, port = server.server_address[:2]
+    return RespClient(host, port)
+
+
+def _journal_rows(session_factory) -> int:
+    with session_factory() as session:
+        return session.scalar(select(func.count()).select_from(ConversationStateJournal))
+
+
+def test_journal_backend_survives_restart(session_factory) -> None:
+    manager = StateManager(JournalStateBackend(session_factory))
+    manager.new_conversation("conv", {"goal_title": "러닝", "metrics": []})
+    state = manager.get_state("conv")
+    assert state is not None
+    state["metrics"] = [{"metric_name": "km", "target_value": 5}]
+    manager.update_state("conv", state)
+
+    restarted = StateManager(JournalStateBackend(session_factory))
+
+    assert restarted.get_state("conv") == {
+        "goal_title": "러닝",
+        "metrics": [{"metric_name": "km", "target_value": 5}],
+    }
+    assert restarted.update_state("conv", {"goal_title": "수영"}) is True
+    restarted.end_conversation("conv")
+    assert StateManager(JournalStateBackend(session_factory)).get_state("conv") is None
+
+
+def test_journal_compacts_into_snapshot(session_factory) -> None:
+    backend = JournalStateBackend(session_factory, compact_every=5)
+    backend.save("conv", {"goal_title": "러닝", "count": 0})
+    for count in range(1, 12):
+        backend.save("conv", {"goal_title": "러닝", "count": count}, changed=["count"])
+
+    assert _journal_rows(session_factory) == 2
+    with session_factory() as session:
+        assert session.get(ConversationStateSnapshot, "conv") is not None
+
+    backend.save("conv", {"count": 11}, changed=["goal_title"])
+    assert JournalStateBackend(session_factory).load("conv") == {"count": 11}
+
+    assert backend.compact_all() == 1
+    assert _journal_rows(session_factory) == 0
+    assert backend.load("conv") == {"count": 11}
+
+
+def test_journal_length_comes_from_the_journal_not_process_memory(session_factory) -> None:
+    first = JournalStateBackend(session_factory, compact_every=5)
+    for count in range(3):
+        first.save("conv", {"count": count})
+
+    # A second process (or one that never loaded the conversation) still
+    # compacts at the fifth row, and keeps nothing per conversation.
+    second = JournalStateBackend(session_factory, compact_every=5)
+    for count in range(3, 5):
+        second.save("conv", {"count": count})
+
+    assert _journal_rows(session_factory) == 0
+    assert second.load("conv") == {"count": 4}
+    assert set(vars(second)) == {"compact_every", "shared", "_session_factory"}
+
+
+def test_journal_backend_loads_only_on_a_miss_unless_shared(session_factory, monkeypatch) -> None:
+    backend = JournalStateBackend(session_factory)
+    manager = StateManager(backend)
+    manager.new_conversation("conv", {"count": 0})
+    loads: list[str] = []
+    load = backend.load
+
+    def _counting_load(conversation_id: str) -> dict | None:
+        loads.append(conversation_id)
+        return load(conversation_id)
+
+    monkeypatch.setattr(backend, "load", _counting_load)
+    for count in range(1, 4):
+        manager.set("conv", "count", count)
+        assert manager.get_state("conv") == {"count": count}
+    assert loads == []
+
+    worker_a = StateManager(JournalStateBackend(session_factory, shared=True))
+    worker_b = StateManager(JournalStateBackend(session_factory, shared=True))
+    assert worker_a.get_state("conv") == {"count": 3}
+    worker_b.set("conv", "count", 4)
+    assert worker_a.get_state("conv") == {"count": 4}
+
+
+def test_redis_backend_shares_state_between_managers(redis_server) -> None:
+    worker_a = StateManager(RedisStateBackend(_client(redis_server)))
+    worker_b = StateManager(RedisStateBackend(_client(redis_server)))
+
+    worker_a.new_conversation("conv", {"goal_title": "러닝", "motivation": None})
+    state = worker_b.get_state("conv")
+    assert state is not None
+    state["motivation"] = "건강"
+    worker_b.update_state("conv", state)
+
+    assert worker_a.get_state("conv") == {"goal_title": "러닝", "motivation": "건강"}
+
+    worker_a.update_state("conv", {"goal_title": "수영"})
+    assert worker_b.get_state("conv") == {"goal_title": "수영"}
+
+    worker_b.end_conversation("conv")
+    assert worker_a.get_state("conv") is None
+
+
+def test_redis_backend_across_processes(redis_server) -> None:
+    host, port = redis_server.server_address[:2]
+    script = textwrap.dedent(
+        f"""
+        from core.state_backends import RedisStateBackend
+        from core.state_manager import StateManager
+        from tools.fake_redis import RespClient
+
+        manager = StateManager(RedisStateBackend(RespClient({host!r}, {port})))
+        state = manager.get_state("conv")
+        state["accepted_quests"].append("quest-from-worker")
+        manager.update_state("conv", state)
+        """
+    )
+    manager = StateManager(RedisStateBackend(_client(redis_server)))
+    manager.new_conversation("conv", {"accepted_quests": []})
+
+    subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, check=True)
+
+    assert manager.get_state("conv") == {"accepted_quests": ["quest-from-worker"]}
@@ -0,0 +1,213 @@
+import threading
+
+import pytest
+
+from core.state_manager import StateManager
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _manager(**kwargs):
+    evicted: list[tuple[str, str]] = []
+    clock = FakeClock()
+    # A single shard keeps the LRU order global, as these tests assume.
+    kwargs.setdefault("shards", 1)
+    manager = StateManager(
+        clock=clock,
+        on_evict=lambda conv_id, state, reason: evicted.append((conv_id, reason)),
+        **kwargs,
+    )
+    return manager, clock, evicted
+
+
+def test_least_recently_used_conversation_is_evicted() -> None:
+    manager, _, evicted = _manager(max_entries=2)
+    manager.new_conversation("a", {"goal_title": "A"})
+    manager.new_conversation("b", {"goal_title": "B"})
+    manager.get_state("a")
+
+    manager.new_conversation("c", {"goal_title": "C"})
+
+    assert evicted == [("b", "lru")]
+    assert manager.get_state("b") is None
+    assert manager.get_state("a") == {"goal_title": "A"}
+    assert manager.stats()["size"] == 2
+    assert manager.stats()["evictions"] == 1
+
+
+def test_eviction_hook_runs_outside_the_shard_lock() -> None:
+    finished: list[bool] = []
+
+    def _on_evict(conv_id: str, state: dict, reason: str) -> None:
+        # Another thread touching the same shard must not wait on the evicting thread.
+        reader = threading.Thread(target=lambda: finished.append(manager.stats()["size"] == 1))
+        reader.start()
+        reader.join(timeout=2)
+
+    manager = StateManager(max_entries=1, shards=1, on_evict=_on_evict)
+    manager.new_conversation("a", {"goal_title": "A"})
+    manager.new_conversation("b", {"goal_title": "B"})
+
+    assert finished == [True]
+
+
+def test_idle_conversations_expire() -> None:
+    manager, clock, evicted = _manager(idle_ttl=60)
+    manager.new_conversation("idle", {"goal_title": "Idle"})
+    manager.new_conversation("active", {"goal_title": "Active"})
+    clock.now = 45
+    manager.get_state("active")
+
+    clock.now = 90
+
+    assert manager.get_state("idle") is None
+    assert manager.get_state("active") == {"goal_title": "Active"}
+    assert evicted == [("idle", "idle")]
+
+
+def test_byte_budget_and_accounting() -> None:
+    manager, _, evicted = _manager(max_bytes=4000)
+    manager.new_conversation("small", {"goal_title": "S"})
+    small_bytes = manager.stats()["approx_bytes"]
+    assert small_bytes > 0
+
+    manager.new_conversation("big", {"metrics": ["x" * 100] * 40})
+
+    assert evicted == [("small", "bytes")]
+    assert manager.stats()["size"] == 1
+
+    manager.end_conversation("big")
+    assert manager.stats()["approx_bytes"] == 0
+
+
+def test_update_refreshes_accounting() -> None:
+    manager, _, _ = _manager()
+    manager.new_conversation("conv", {"metrics": []})
+    before = manager.stats()["approx_bytes"]
+
+    manager.update_state("conv", {"metrics": ["m" * 500]})
+
+    assert manager.stats()["approx_bytes"] > before + 500
+    assert manager.update_state("missing", {}) is False
+
+
+def test_patch_api_copies_only_on_write() -> None:
+    manager, _, _ = _manager()
+    manager.new_conversation("conv", {"metrics": [], "weekly_plan": {"boss-1": []}})
+    snapshot = manager.get_state("conv")
+
+    assert manager.append("conv", "metrics", {"metric_name": "km"}) is True
+    assert manager.set("conv", ("weekly_plan", "boss-2"), [{"day": "MON"}]) is True
+    assert manager.extend("conv", "accepted_quests", ["q1", "q2"]) is True
+
+    assert snapshot == {"metrics": [], "weekly_plan": {"boss-1": []}}
+    assert manager.get_state("conv") == {
+        "metrics": [{"metric_name": "km"}],
+        "weekly_plan": {"boss-1": [], "boss-2": [{"day": "MON"}]},
+        "accepted_quests": ["q1", "q2"],
+    }
+    # Id lists are kept as compact tuples internally.
+    assert manager.get("conv", "accepted_quests") == ("q1", "q2")
+    assert manager.append("missing", "metrics", {}) is False
+
+
+def test_mutate_commits_touched_keys_and_discards_on_error() -> None:
+    saved: list[list[str] | None] = []
+
+    class RecordingBackend:
+        shared = False
+
+        def load(self, conversation_id):
+            return None
+
+        def save(self, conversation_id, state, changed=None):
+            saved.append(None if changed is None else sorted(changed))
+
+        def delete(self, conversation_id):
+            pass
+
+    manager = StateManager(RecordingBackend())
+    manager.new_conversation(
+        "conv", {"accepted_quests": ["q1"], "current_variations": [1], "metrics": []}
+    )
+    snapshot = manager.get_state("conv")
+    assert snapshot is not None
+
+    with manager.mutate("conv") as draft:
+        draft["accepted_quests"].append("q2")
+        draft["current_variations"] = []
+        draft["metrics"]  # read-only keys are not written back
+
+    with pytest.raises(RuntimeError):
+        with manager.mutate("conv") as draft:
+            draft["accepted_quests"].append("lost")
+            raise RuntimeError("abort")
+
+    assert snapshot["accepted_quests"] == ["q1"]
+    assert manager.get_state("conv") == {
+        "accepted_quests": ["q1", "q2"],
+        "current_variations": [],
+        "metrics": [],
+    }
+    assert saved == [None, ["accepted_quests", "current_variations"]]
+
+
+def test_concurrent_updates_are_not_lost() -> None:
+    manager = StateManager(shards=4, lock_stripes=8)
+    manager.new_conversation("conv", {"boss_stage_ids": [], "counter": 0})
+    threads, per_thread = 8, 300
+
+    def _increment(draft) -> None:
+        draft["counter"] = draft["counter"] + 1
+
+    def _worker(worker: int) -> None:
+        for index in range(per_thread):
+            manager.append("conv", "boss_stage_ids", f"{worker}-{index}")
+            manager.update("conv", _increment)
+            with manager.locked("conv"):
+                state = manager.get_state("conv")
+                assert state is not None
+                state["legacy"] = state.get("legacy", 0) + 1
+                manager.update_state("conv", state)
+
+    pool = [threading.Thread(target=_worker, args=(worker,)) for worker in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    state = manager.get_state("conv")
+    assert state is not None
+    assert len(state["boss_stage_ids"]) == threads * per_thread
+    assert len(set(state["boss_stage_ids"])) == threads * per_thread
+    assert state["counter"] == threads * per_thread
+    assert state["legacy"] == threads * per_thread
+
+
+def test_unrelated_conversations_do_not_share_a_lock() -> None:
+    manager = StateManager(lock_stripes=64)
+    busy = "conv-busy"
+    other = next(
+        f"conv-{index}"
+        for index in range(1000)
+        if manager.locked(f"conv-{index}") is not manager.locked(busy)
+    )
+    manager.new_conversation(other, {"motivation": None})
+    done = threading.Event()
+
+    def _write_other() -> None:
+        manager.set(other, "motivation", "건강")
+        done.set()
+
+    with manager.locked(busy):
+        thread = threading.Thread(target=_write_other)
+        thread.start()
+        assert done.wait(timeout=5)
+    thread.join()
+    assert manager.get(other, "motivation") == "건강"
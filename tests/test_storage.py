@@ -0,0 +1,440 @@
+from datetime import datetime, timezone
+from typing import cast
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from core.models import Base, Metric, WeeklyStep
+from core.storage import SQLAlchemyStorage
+
+
+@pytest.fixture
+def statements(session):
+    captured: list[str] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement.split(None, 1)[0].upper())
+
+    connection = session.get_bind()
+    event.listen(connection, "before_cursor_execute", _capture)
+    yield captured
+    event.remove(connection, "before_cursor_execute", _capture)
+
+
+@pytest.fixture
+def commits(session):
+    counter = {"count": 0}
+
+    def _count(_session):
+        counter["count"] += 1
+
+    event.listen(session, "after_commit", _count)
+    yield counter
+    event.remove(session, "after_commit", _count)
+
+
+def test_create_boss_stages_single_commit_without_refresh(
+    storage, statements, commits
+) -> None:
+    goal = storage.create_goal({"title": "Batch Goal"})
+    statements.clear()
+    commits["count"] = 0
+
+    created = storage.create_boss_stages(
+        goal["goal_id"],
+        [{"title": f"Stage {index}", "stage_order": index} for index in range(1, 9)],
+    )
+
+    assert [stage["stage_order"] for stage in created] == list(range(1, 9))
+    assert all(stage["status"] == "PLANNED" for stage in created)
+    assert commits["count"] == 1
+    assert "SELECT" not in statements
+    assert storage.list_boss_stages(goal["goal_id"]) == created
+
+
+def test_session_scope_groups_writes_into_one_commit(storage, commits) -> None:
+    with storage.session_scope():
+        goal = storage.create_goal({"title": "Scoped Goal"})
+        quests = storage.create_quests(
+            goal["goal_id"],
+            [
+                {"title": "러닝", "variation_tags": ["tempo_up", "outdoor"]},
+                {"title": "스트레칭"},
+            ],
+        )
+        storage.log_quest_events(
+            [
+                {
+                    "quest_id": quest["quest_id"],
+                    "goal_id": goal["goal_id"],
+                    "occurred_at": datetime(2025, 2, day, tzinfo=timezone.utc),
+                    "outcome": "COMPLETED",
+                }
+                for day, quest in enumerate(quests, start=1)
+            ]
+        )
+        assert commits["count"] == 0
+
+    assert commits["count"] == 1
+    assert storage.get_quest(quests[0]["quest_id"]) == quests[0]
+    assert len(storage.list_recent_quest_logs(goal["goal_id"])) == 2
+
+
+def test_finalize_goal_is_one_commit_and_idempotent(storage, session, commits) -> None:
+    goal = storage.create_goal({"title": "Finalize Goal"})
+    draft = {
+        "motivation": "Run with friends",
+        "metrics": [
+            {"metric_name": "distance", "metric_type": "INCREMENTAL", "target_value": 21.1},
+            {"metric_name": "sessions", "target_value": 3, "unit": "회"},
+        ],
+        "weekly_plan": {
+            "boss-1": [{"title": "Base", "week_index": 1}, {"title": "Build", "week_index": 2}],
+            "boss-2": [{"title": "Taper"}],
+        },
+    }
+    commits["count"] = 0
+
+    first = storage.finalize_goal(goal["goal_id"], **draft)
+    retried = storage.finalize_goal(goal["goal_id"], **draft)
+
+    assert commits["count"] == 2
+    assert first == retried == {
+        **goal,
+        "motivation": "Run with friends",
+        "metrics": 2,
+        "weekly_steps": 3,
+    }
+    assert session.scalar(select(func.count()).select_from(Metric)) == 2
+    assert session.scalars(
+        select(WeeklyStep.title).order_by(WeeklyStep.boss_id, WeeklyStep.step_order)
+    ).all() == ["Base", "Build", "Taper"]
+
+
+def test_finalize_goal_rolls_back_everything_on_failure() -> None:
+    engine = create_engine("sqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False, future=True)()
+    storage = SQLAlchemyStorage(session)
+    goal = storage.create_goal({"title": "Atomic Goal"})
+
+    # metric_name is NOT NULL, so the flush fails after the motivation update.
+    with pytest.raises(IntegrityError):
+        storage.finalize_goal(
+            goal["goal_id"],
+            motivation="lost",
+            metrics=[{"metric_name": None}],
+            weekly_plan={"boss-1": [{"title": "lost"}]},
+        )
+    with pytest.raises(ValueError):
+        storage.finalize_goal("missing-goal", motivation="lost")
+
+    assert storage.get_goal(goal["goal_id"]) == goal
+    assert session.scalar(select(func.count()).select_from(WeeklyStep)) == 0
+    session.close()
+    engine.dispose()
+
+
+def test_session_scope_rolls_back_on_error() -> None:
+    engine = create_engine("sqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False, future=True)()
+    storage = SQLAlchemyStorage(session)
+    goal = storage.create_goal({"title": "Rollback Goal"})
+
+    with pytest.raises(RuntimeError):
+        with storage.session_scope():
+            storage.create_boss_stage(goal["goal_id"], {"title": "Lost"})
+            with storage.session_scope():
+                storage.create_boss_stage(goal["goal_id"], {"title": "Nested"})
+            raise RuntimeError("abort")
+
+    assert storage.list_boss_stages(goal["goal_id"]) == []
+    assert storage.get_goal(goal["goal_id"]) == goal
+    session.close()
+    engine.dispose()
+
+
+def test_session_factory_registry_reuses_engine(tmp_path, monkeypatch) -> None:
+    from core import storage as storage_module
+
+    create_all_calls: list[object] = []
+    original_create_all = Base.metadata.create_all
+
+    def _counting_create_all(bind, *args, **kwargs):
+        create_all_calls.append(bind)
+        return original_create_all(bind, *args, **kwargs)
+
+    monkeypatch.setattr(Base.metadata, "create_all", _counting_create_all)
+    monkeypatch.setenv("GOALER_DB_POOL_SIZE", "3")
+    monkeypatch.setenv("GOALER_DB_MAX_OVERFLOW", "2")
+    url = f"sqlite:///{tmp_path / 'registry.db'}"
+
+    try:
+        first = storage_module.create_session_factory(url)
+        second = storage_module.create_session_factory(url)
+        assert first is second
+        assert len(create_all_calls) == 1
+
+        pool = cast(QueuePool, storage_module.get_engine(url).pool)
+        assert pool.size() == 3
+        # Filling the pool and the whole overflow allowance leaves overflow() at max_overflow.
+        connections = [pool.connect() for _ in range(3 + 2)]
+        try:
+            assert pool.overflow() == 2
+        finally:
+            for connection in connections:
+                connection.close()
+    finally:
+        storage_module.dispose_all()
+
+    assert url not in storage_module._ENGINES
+    assert storage_module.create_session_factory(url) is not first
+    assert len(create_all_calls) == 2
+    storage_module.dispose_all()
+
+
+def test_performance_profile_applies_pragmas(tmp_path) -> None:
+    from core import storage as storage_module
+
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    try:
+        engine = storage_module.get_engine(url, sqlite_profile="performance")
+        with engine.connect() as connection:
+            journal_mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+            synchronous = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+            temp_store = connection.exec_driver_sql("PRAGMA temp_store").scalar()
+    finally:
+        storage_module.dispose_all()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+    assert temp_store == 2  # MEMORY
+
+
+def test_unknown_sqlite_profile_is_rejected(tmp_path, monkeypatch) -> None:
+    from core import storage as storage_module
+
+    monkeypatch.setenv("GOALER_SQLITE_PROFILE", "turbo")
+    with pytest.raises(ValueError, match="turbo"):
+        storage_module.get_engine(f"sqlite:///{tmp_path / 'bad.db'}")
+    storage_module.dispose_all()
+
+
+def _query_plan(session, call) -> str:
+    captured: list[tuple[str, tuple]] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    connection = session.get_bind()
+    event.listen(connection, "before_cursor_execute", _capture)
+    try:
+        call()
+    finally:
+        event.remove(connection, "before_cursor_execute", _capture)
+
+    statement, parameters = captured[-1]
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_hot_queries_use_composite_indexes(storage, session) -> None:
+    goal = storage.create_goal({"title": "Plan Goal"})
+    goal_id = goal["goal_id"]
+
+    logs_plan = _query_plan(session, lambda: storage.list_recent_quest_logs(goal_id))
+    assert "ix_quest_logs_goal_id_occurred_at" in logs_plan
+    assert "TEMP B-TREE" not in logs_plan
+
+    stages_plan = _query_plan(session, lambda: storage.list_boss_stages(goal_id))
+    assert "ix_boss_stages_goal_id_stage_order_created_at" in stages_plan
+    assert "TEMP B-TREE" not in stages_plan
+
+
+def test_bootstrap_adds_indexes_to_existing_database(tmp_path) -> None:
+    from sqlalchemy import inspect
+
+    from core import storage as storage_module
+
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    legacy_engine = create_engine(url, future=True)
+    Base.metadata.create_all(legacy_engine)
+    with legacy_engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.exec_driver_sql(f"DROP INDEX {index.name}")
+    legacy_engine.dispose()
+
+    try:
+        engine = storage_module.get_engine(url)
+        inspector = inspect(engine)
+        index_names = {
+            index["name"]
+            for table in ("quest_logs", "boss_stages", "quests")
+            for index in inspector.get_indexes(table)
+        }
+    finally:
+        storage_module.dispose_all()
+
+    assert index_names == {
+        "ix_quest_logs_goal_id_occurred_at",
+        "ix_boss_stages_goal_id_stage_order_created_at",
+        "ix_quests_goal_id",
+    }
+
+
+def test_iter_quest_logs_streams_in_keyset_pages(storage, statements) -> None:
+    goal = storage.create_goal({"title": "History Goal"})
+    quest = storage.create_quest(goal["goal_id"], {"title": "매일 걷기"})
+    storage.log_quest_events(
+        [
+            {
+                "quest_id": quest["quest_id"],
+                "goal_id": goal["goal_id"],
+                # Pairs share a timestamp so the log_id tie-breaker is exercised.
+                "occurred_at": datetime(2025, 3, 1 + index // 2, tzinfo=timezone.utc),
+                "outcome": "COMPLETED",
+            }
+            for index in range(10)
+        ]
+    )
+    statements.clear()
+
+    stream = storage.iter_quest_logs(goal["goal_id"], batch_size=3)
+    assert statements == []
+
+    logs = list(stream)
+    keys = [(log["occurred_at"], log["log_id"]) for log in logs]
+    assert keys == sorted(keys)
+    assert len({log["log_id"] for log in logs}) == 10
+    assert statements.count("SELECT") == 4
+
+    window = list(
+        storage.iter_quest_logs(
+            goal["goal_id"],
+            since=datetime(2025, 3, 2, tzinfo=timezone.utc),
+            until="2025-03-04T00:00:00+00:00",
+            batch_size=2,
+        )
+    )
+    assert [log["occurred_at"][:10] for log in window] == ["2025-03-02"] * 2 + [
+        "2025-03-03"
+    ] * 2
+
+
+def _tagged_goal(storage) -> tuple[str, list[dict]]:
+    goal = storage.create_goal({"title": "Tag Goal"})
+    quests = storage.create_quests(
+        goal["goal_id"],
+        [
+            {"title": "템포 러닝", "variation_tags": ["tempo_up", "outdoor"]},
+            {"title": "실내 자전거", "variation_tags": ["tempo_up", "indoor"]},
+            {"title": "산책", "variation_tags": ["outdoor", "outdoor"]},
+            {"title": "명상"},
+        ],
+    )
+    return goal["goal_id"], quests
+
+
+def test_find_quests_by_tags_any_and_all(storage) -> None:
+    goal_id, quests = _tagged_goal(storage)
+    other_goal = storage.create_goal({"title": "Other"})
+    storage.create_quest(other_goal["goal_id"], {"title": "x", "variation_tags": ["tempo_up"]})
+
+    # Quests from one batch share created_at; ties fall back to the random quest_id.
+    found = storage.find_quests_by_tags(goal_id, ["tempo_up", "outdoor"])
+    any_match = {quest["title"]: quest for quest in found}
+    assert set(any_match) == {"템포 러닝", "실내 자전거", "산책"}
+    assert any_match["산책"]["variation_tags"] == ["outdoor", "outdoor"]
+
+    all_match = storage.find_quests_by_tags(goal_id, ["tempo_up", "outdoor"], match="all")
+    assert all_match == [quests[0]]
+    assert storage.find_quests_by_tags(goal_id, []) == []
+    with pytest.raises(ValueError):
+        storage.find_quests_by_tags(goal_id, ["x"], match="some")
+
+
+def test_find_quests_by_tags_uses_tag_index(storage, session) -> None:
+    goal_id, _ = _tagged_goal(storage)
+
+    plan = _query_plan(session, lambda: storage.find_quests_by_tags(goal_id, ["indoor"]))
+
+    assert "ix_quest_tags_tag_goal_id" in plan
+
+
+def test_backfill_quest_tags_from_legacy_strings(storage, session) -> None:
+    from sqlalchemy import func, insert, select
+
+    from core.models import Quest, QuestTag
+    from core.storage import backfill_quest_tags
+
+    goal = storage.create_goal({"title": "Legacy"})
+    session.execute(
+        insert(Quest),
+        [
+            {
+                "quest_id": f"legacy-{index}",
+                "goal_id": goal["goal_id"],
+                "title": f"Legacy {index}",
+                "variation_tags": "focus,social" if index % 2 else "focus",
+            }
+            for index in range(5)
+        ],
+    )
+    session.commit()
+
+    assert backfill_quest_tags(session, batch_size=2) == 7
+    assert backfill_quest_tags(session, batch_size=2) == 0
+    assert session.scalar(select(func.count()).select_from(QuestTag)) == 7
+    matched = storage.find_quests_by_tags(goal["goal_id"], ["focus", "social"], match="all")
+    assert [quest["quest_id"] for quest in matched] == ["legacy-1", "legacy-3"]
+
+
+def test_core_read_mode_matches_orm_output(storage, session) -> None:
+    import json
+
+    from core.storage import SQLAlchemyStorage
+
+    goal_id, _ = _tagged_goal(storage)
+    storage.create_boss_stages(
+        goal_id,
+        [
+            {"title": "보스", "stage_order": 1, "target_week": 3},
+            {"title": "최종 보스", "stage_order": 2, "status": "READY"},
+        ],
+    )
+    quest = storage.find_quests_by_tags(goal_id, ["tempo_up"])[0]
+    storage.log_quest_events(
+        [
+            {
+                "quest_id": quest["quest_id"],
+                "goal_id": goal_id,
+                "occurred_at": datetime(2025, 6, 1 + index, tzinfo=timezone.utc),
+                "outcome": "COMPLETED",
+                "loot_type": "INSIGHT",
+                "mood_note": None if index % 2 else "좋았어요",
+            }
+            for index in range(5)
+        ]
+    )
+    core = SQLAlchemyStorage(session, read_mode="core")
+
+    reads = [
+        lambda s: s.list_boss_stages(goal_id),
+        lambda s: s.find_quests_by_tags(goal_id, ["tempo_up", "outdoor"], match="any"),
+        lambda s: s.list_recent_quest_logs(goal_id, limit=3),
+        lambda s: list(s.iter_quest_logs(goal_id, batch_size=2)),
+    ]
+    for read in reads:
+        expected = read(storage)
+        assert expected
+        assert json.dumps(read(core), ensure_ascii=False) == json.dumps(
+            expected, ensure_ascii=False
+        )
+
+    with pytest.raises(ValueError):
+        SQLAlchemyStorage(session, read_mode="raw")
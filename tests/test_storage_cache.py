@@ -0,0 +1,112 @@
+import pytest
+
+from core.agent import GoalSettingAgent
+from core.storage_cache import CachedStorage
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> _FakeClock:
+    return _FakeClock()
+
+
+@pytest.fixture
+def cached(storage, clock) -> CachedStorage:
+    return CachedStorage(storage, max_entries=3, ttl_seconds=60, clock=clock)
+
+
+def test_repeated_reads_hit_cache(cached, storage, monkeypatch) -> None:
+    goal = cached.create_goal({"title": "Cache Goal"})
+    quest = cached.create_quest(goal["goal_id"], {"title": "러닝", "variation_tags": ["a"]})
+
+    assert cached.get_goal(goal["goal_id"]) == goal
+    assert cached.get_quest(quest["quest_id"]) == quest
+
+    def _fail(*_args):
+        raise AssertionError("storage should not be queried on a hit")
+
+    monkeypatch.setattr(storage, "get_goal", _fail)
+    monkeypatch.setattr(storage, "get_quest", _fail)
+    fetched = cached.get_quest(quest["quest_id"])
+    fetched["variation_tags"].append("mutated")
+
+    assert cached.get_goal(goal["goal_id"]) == goal
+    assert cached.get_quest(quest["quest_id"]) == quest
+    assert cached.stats() == {
+        "size": 2,
+        "hits": 3,
+        "misses": 2,
+        "evictions": 0,
+        "expirations": 0,
+    }
+
+
+def test_writes_invalidate_entries_of_the_same_goal(cached) -> None:
+    goal = cached.create_goal({"title": "Invalidate"})
+    other = cached.create_goal({"title": "Other"})
+    cached.create_boss_stage(goal["goal_id"], {"title": "1단계", "stage_order": 1})
+
+    assert len(cached.list_boss_stages(goal["goal_id"])) == 1
+    assert cached.list_boss_stages(other["goal_id"]) == []
+
+    cached.create_boss_stages(goal["goal_id"], [{"title": "2단계", "stage_order": 2}])
+    assert [stage["title"] for stage in cached.list_boss_stages(goal["goal_id"])] == [
+        "1단계",
+        "2단계",
+    ]
+    cached.list_boss_stages(other["goal_id"])
+    assert cached.stats()["hits"] == 1
+
+
+def test_lru_and_ttl_eviction(cached, clock) -> None:
+    goals = [cached.create_goal({"title": f"Goal {index}"}) for index in range(4)]
+    for goal in goals[:3]:
+        cached.get_goal(goal["goal_id"])
+    cached.get_goal(goals[0]["goal_id"])  # refresh recency of goal 0
+    cached.get_goal(goals[3]["goal_id"])  # evicts goal 1
+
+    assert cached.stats()["evictions"] == 1
+    cached.get_goal(goals[0]["goal_id"])
+    assert cached.stats()["hits"] == 2
+
+    clock.now = 61
+    cached.get_goal(goals[0]["goal_id"])
+    assert cached.stats()["expirations"] == 1
+    assert cached.stats()["misses"] == 5
+
+
+def test_invalidation_during_a_load_keeps_the_stale_row_out(cached, storage, monkeypatch) -> None:
+    goal = cached.create_goal({"title": "Race Goal", "motivation": "before"})
+    load = storage.get_goal
+
+    def _load_then_race_a_write(goal_id):
+        row = load(goal_id)
+        # A writer commits and invalidates after the row was read but before it is stored.
+        cached.finalize_goal(goal_id, motivation="after")
+        return row
+
+    monkeypatch.setattr(storage, "get_goal", _load_then_race_a_write)
+    assert cached.get_goal(goal["goal_id"])["motivation"] == "before"
+    monkeypatch.setattr(storage, "get_goal", load)
+
+    assert cached.stats()["size"] == 0
+    assert cached.get_goal(goal["goal_id"])["motivation"] == "after"
+
+
+def test_agent_runs_unchanged_on_cached_storage(cached) -> None:
+    agent = GoalSettingAgent(storage=cached)
+    agent.create_goal("conv_cache", "Agent Goal")
+    state = agent.state_manager.get_state("conv_cache")
+    assert state is not None
+    goal_id = state["goal_id"]
+
+    agent.define_boss_stages("conv_cache", goal_id, [{"title": "보스"}])
+
+    assert [stage["title"] for stage in cached.list_boss_stages(goal_id)] == ["보스"]
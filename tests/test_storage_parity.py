@@ -0,0 +1,205 @@
+"""Run identical scenarios against the sync and async storage backends."""
+
+import asyncio
+import inspect
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.models import Base
+from core.storage import AsyncSQLAlchemyStorage, SQLAlchemyStorage
+
+GOAL_ID = "goal-parity"
+QUEST_IDS = ["quest-a", "quest-b"]
+
+
+async def _call(storage, name: str, *args, **kwargs):
+    result = getattr(storage, name)(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def _collect(stream) -> list:
+    if hasattr(stream, "__aiter__"):
+        return [item async for item in stream]
+    return list(stream)
+
+
+async def _scenario_goal_and_stages(storage) -> list:
+    goal = await _call(storage, "create_goal", {"title": "패리티", "goal_id": GOAL_ID})
+    stages = await _call(
+        storage,
+        "create_boss_stages",
+        GOAL_ID,
+        [
+            {"title": "두 번째", "stage_order": 2, "boss_id": "boss-2"},
+            {"title": "첫 번째", "stage_order": 1, "boss_id": "boss-1"},
+        ],
+    )
+    single = await _call(
+        storage, "create_boss_stage", GOAL_ID, {"title": "세 번째", "boss_id": "boss-3"}
+    )
+    return [
+        goal,
+        stages,
+        single,
+        await _call(storage, "get_goal", GOAL_ID),
+        await _call(storage, "get_goal", "missing"),
+        await _call(storage, "list_boss_stages", GOAL_ID),
+    ]
+
+
+async def _scenario_quests_and_logs(storage) -> list:
+    await _call(storage, "create_goal", {"title": "로그", "goal_id": GOAL_ID})
+    quests = await _call(
+        storage,
+        "create_quests",
+        GOAL_ID,
+        [
+            {"title": "러닝", "quest_id": QUEST_IDS[0], "variation_tags": ["tempo_up"]},
+            {"title": "요가", "quest_id": QUEST_IDS[1], "is_custom": True},
+        ],
+    )
+    payloads = [
+        {
+            "log_id": f"log-{index:02d}",
+            "quest_id": QUEST_IDS[index % 2],
+            "goal_id": GOAL_ID,
+            "occurred_at": datetime(2025, 4, 1 + index, tzinfo=timezone.utc),
+            "outcome": "COMPLETED" if index % 3 else "SKIPPED",
+            "energy_status": "KEEPING_PACE",
+        }
+        for index in range(7)
+    ]
+    await _call(storage, "log_quest_events", payloads[:-1])
+    await _call(storage, "log_quest_event", payloads[-1])
+    return [
+        quests,
+        await _call(storage, "get_quest", QUEST_IDS[0]),
+        await _call(storage, "list_recent_quest_logs", GOAL_ID, 3),
+        await _collect(storage.iter_quest_logs(GOAL_ID, batch_size=2)),
+        await _collect(
+            storage.iter_quest_logs(
+                GOAL_ID, since="2025-04-03T00:00:00+00:00", batch_size=10
+            )
+        ),
+    ]
+
+
+async def _scenario_scope_rollback(storage) -> list:
+    await _call(storage, "create_goal", {"title": "롤백", "goal_id": GOAL_ID})
+    if inspect.iscoroutinefunction(storage.create_goal):
+        with pytest.raises(RuntimeError):
+            async with storage.session_scope():
+                await storage.create_boss_stage(GOAL_ID, {"title": "버려짐"})
+                raise RuntimeError("abort")
+    else:
+        with pytest.raises(RuntimeError):
+            with storage.session_scope():
+                storage.create_boss_stage(GOAL_ID, {"title": "버려짐"})
+                raise RuntimeError("abort")
+    return [await _call(storage, "list_boss_stages", GOAL_ID)]
+
+
+async def _scenario_finalize(storage) -> list:
+    await _call(storage, "create_goal", {"title": "마무리", "goal_id": GOAL_ID})
+    draft = {
+        "motivation": "건강",
+        "metrics": [{"metric_name": "km", "metric_type": "INCREMENTAL", "target_value": 21}],
+        "weekly_plan": {"boss-1": [{"title": "1주차", "week_index": 1}, {"title": "2주차"}]},
+    }
+    return [
+        await _call(storage, "finalize_goal", GOAL_ID, **draft),
+        await _call(storage, "finalize_goal", GOAL_ID, **draft),
+        await _call(storage, "get_goal", GOAL_ID),
+    ]
+
+
+async def _scenario_conversation_summary(storage) -> list:
+    return [
+        await _call(
+            storage,
+            "create_conversation_summary",
+            {
+                "summary_id": "summary-1",
+                "conversation_id": "conv-parity",
+                "period_start": "2025-04-01T09:00:00+00:00",
+                "period_end": datetime(2025, 4, 1, 10, tzinfo=timezone.utc),
+                "summary_text": "- 사용자: 하프 마라톤",
+            },
+        )
+    ]
+
+
+SCENARIOS = [
+    _scenario_goal_and_stages,
+    _scenario_quests_and_logs,
+    _scenario_scope_rollback,
+    _scenario_finalize,
+    _scenario_conversation_summary,
+]
+
+
+def _run_sync(scenario, db_url: str, read_mode: str = "orm") -> list:
+    engine = create_engine(db_url, future=True)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False, future=True)()
+    try:
+        return asyncio.run(scenario(SQLAlchemyStorage(session, read_mode=read_mode)))
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _run_async(scenario, db_url: str, read_mode: str = "orm") -> list:
+    async def _main() -> list:
+        engine = create_async_engine(db_url.replace("sqlite://", "sqlite+aiosqlite://"))
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session = async_sessionmaker(bind=engine, expire_on_commit=False)()
+        try:
+            return await scenario(AsyncSQLAlchemyStorage(session, read_mode=read_mode))
+        finally:
+            await session.close()
+            await engine.dispose()
+
+    return asyncio.run(_main())
+
+
+def test_async_storage_exposes_sync_method_set() -> None:
+    public = {name for name in dir(SQLAlchemyStorage) if not name.startswith("_")}
+    async_public = {
+        name for name in dir(AsyncSQLAlchemyStorage) if not name.startswith("_")
+    }
+    assert public == async_public
+
+
+@pytest.mark.parametrize("read_mode", ["orm", "core"])
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=lambda fn: fn.__name__)
+def test_sync_and_async_storage_agree(scenario, read_mode, tmp_path) -> None:
+    sync_result = _run_sync(scenario, f"sqlite:///{tmp_path / 'sync.db'}", read_mode)
+    async_result = _run_async(scenario, f"sqlite:///{tmp_path / 'async.db'}", read_mode)
+
+    assert sync_result == async_result
+
+
+def test_async_session_factory_is_cached_and_bootstraps_schema(tmp_path) -> None:
+    from core import storage as storage_module
+
+    url = f"sqlite:///{tmp_path / 'async_registry.db'}"
+
+    async def _main() -> tuple:
+        first = await storage_module.create_async_session_factory(url)
+        second = await storage_module.create_async_session_factory(url)
+        async with first() as session:
+            goal = await AsyncSQLAlchemyStorage(session).create_goal({"title": "등록"})
+        async with second() as session:
+            stored = await AsyncSQLAlchemyStorage(session).get_goal(goal["goal_id"])
+        await storage_module.dispose_all_async()
+        return first is second, stored == goal
+
+    assert asyncio.run(_main()) == (True, True)
@@ -0,0 +1,207 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from core.agent import GoalSettingAgent
+from core.storage import ThreadLocalStorage, create_session_factory
+from core.tool_dispatch import ToolCall, ToolDispatcher
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = ToolDispatcher(max_workers=4)
+    yield dispatcher
+    dispatcher.close()
+
+
+def test_independent_calls_overlap_and_keep_result_order(dispatcher) -> None:
+    barrier = threading.Barrier(2, timeout=5)
+
+    def _tool(value):
+        # Both calls must be running at once to get past the barrier.
+        barrier.wait()
+        return value
+
+    results = dispatcher.run(
+        [
+            ToolCall("define_boss_stages", _tool, {"value": "bosses"}),
+            ToolCall("set_motivation", _tool, {"value": "motivation"}),
+        ]
+    )
+
+    assert results == ["bosses", "motivation"]
+
+
+def test_calls_touching_the_same_state_run_in_order(dispatcher) -> None:
+    events: list[tuple[str, int]] = []
+
+    def _tool(index):
+        events.append(("start", index))
+        time.sleep(0.01 * (3 - index))
+        events.append(("end", index))
+        return index
+
+    calls = [ToolCall("add_metric", _tool, {"index": index}) for index in range(3)]
+    calls.append(ToolCall("finalize_goal", _tool, {"index": 3}))
+
+    assert dispatcher.run(calls) == [0, 1, 2, 3]
+    assert events == [(kind, index) for index in range(4) for kind in ("start", "end")]
+
+
+def test_first_error_is_raised_and_dependents_never_start(dispatcher) -> None:
+    started: list[str] = []
+
+    def _fail():
+        started.append("fail")
+        raise RuntimeError("boom")
+
+    def _ok(name):
+        started.append(name)
+        return name
+
+    with pytest.raises(RuntimeError, match="boom"):
+        dispatcher.run(
+            [
+                ToolCall("add_metric", _fail, {}),
+                ToolCall("add_metric", _ok, {"name": "after"}),
+            ]
+        )
+
+    assert started == ["fail"]
+
+
+def test_agent_tools_run_concurrently_on_thread_local_storage(tmp_path) -> None:
+    storage = ThreadLocalStorage(create_session_factory(f"sqlite:///{tmp_path / 'tools.db'}"))
+    agent = GoalSettingAgent(storage=storage)
+    dispatcher = ToolDispatcher.for_agent(agent)
+    created = agent.create_goal("conv", "러닝")
+    assert created is not None
+    goal_id = created["goal_id"]
+
+    results = dispatcher.run(
+        [
+            ToolCall(
+                "define_boss_stages",
+                agent.define_boss_stages,
+                {"conversation_id": "conv", "goal_id": goal_id, "boss_candidates": [{"title": "5km"}]},
+            ),
+            ToolCall("set_motivation", agent.set_motivation, {"conversation_id": "conv", "text": "건강"}),
+            *(
+                ToolCall(
+                    "add_metric",
+                    agent.add_metric,
+                    {"conversation_id": "conv", "metric_details": {"metric_name": name}},
+                )
+                for name in ("km", "pace", "sessions")
+            ),
+        ]
+    )
+    dispatcher.close()
+
+    state = agent.state_manager.get_state("conv")
+    assert state is not None
+    assert dispatcher.max_workers > 1
+    assert results[0]["boss_stages"][0]["title"] == "5km"
+    assert [metric["metric_name"] for metric in state["metrics"]] == ["km", "pace", "sessions"]
+    assert state["motivation"] == "건강"
+    assert [stage["title"] for stage in storage.list_boss_stages(goal_id)] == ["5km"]
+    storage.close()
+
+
+def test_thread_local_reads_see_other_threads_commits(tmp_path) -> None:
+    storage = ThreadLocalStorage(create_session_factory(f"sqlite:///{tmp_path / 'fresh.db'}"))
+    goal = storage.create_goal({"title": "러닝", "motivation": "before"})
+    assert storage.get_goal(goal["goal_id"])["motivation"] == "before"
+    writer = threading.Thread(
+        target=lambda: storage.finalize_goal(goal["goal_id"], motivation="after")
+    )
+    writer.start()
+    writer.join()
+
+    assert storage.get_goal(goal["goal_id"])["motivation"] == "after"
+    # No transaction or identity map outlives an operation, so nothing can go stale.
+    session = storage._storage().session
+    assert not session.in_transaction() and len(session.identity_map) == 0
+    with storage.session_scope():
+        storage.get_goal(goal["goal_id"])
+        assert session.in_transaction()
+    assert not session.in_transaction() and len(session.identity_map) == 0
+    assert list(storage.iter_quest_logs(goal["goal_id"])) == []
+    assert not session.in_transaction()
+    storage.close()
+
+
+def test_thread_local_abandoned_stream_releases_the_session(tmp_path) -> None:
+    storage = ThreadLocalStorage(create_session_factory(f"sqlite:///{tmp_path / 'streams.db'}"))
+    goal = storage.create_goal({"title": "러닝"})
+    quest = storage.create_quest(goal["goal_id"], {"title": "5km"})
+    storage.log_quest_events(
+        [
+            {
+                "goal_id": goal["goal_id"],
+                "quest_id": quest["quest_id"],
+                "occurred_at": datetime(2025, 5, day, tzinfo=timezone.utc),
+                "outcome": "COMPLETED",
+            }
+            for day in (1, 2, 3)
+        ]
+    )
+    session = storage._storage().session
+
+    for abandon in ("close", "drop"):
+        stream = storage.iter_quest_logs(goal["goal_id"], batch_size=1)
+        next(stream)
+        assert session.in_transaction()
+        if abandon == "close":
+            stream.close()
+        else:
+            del stream
+        assert not session.in_transaction() and len(session.identity_map) == 0
+
+    # A stream started on a worker and dropped elsewhere still releases the worker's session.
+    started: list = []
+    worker = threading.Thread(
+        target=lambda: started.append(
+            (storage._storage().session, storage.iter_quest_logs(goal["goal_id"], batch_size=1))
+        )
+    )
+    worker.start()
+    worker.join()
+    worker_session, stream = started.pop()
+    worker = threading.Thread(target=lambda: next(stream))
+    worker.start()
+    worker.join()
+    assert worker_session.in_transaction()
+    stream.close()
+    assert not worker_session.in_transaction()
+    assert storage.get_goal(goal["goal_id"])["title"] == "러닝"
+    storage.close()
+
+
+def test_thread_local_methods_resolve_the_calling_threads_session(tmp_path) -> None:
+    storage = ThreadLocalStorage(create_session_factory(f"sqlite:///{tmp_path / 'bound.db'}"))
+    create_goal = storage.create_goal  # fetched on this thread, like app.py's on_summary
+    created: list[dict] = []
+
+    # Bound to this thread's session, the worker's write would join the
+    # rolled-back scope below instead of committing on its own.
+    with pytest.raises(RuntimeError):
+        with storage.session_scope():
+            worker = threading.Thread(target=lambda: created.append(create_goal({"title": "독서"})))
+            worker.start()
+            worker.join()
+            raise RuntimeError("roll back")
+
+    assert storage.get_goal(created[0]["goal_id"])["title"] == "독서"
+    storage.close()
+
+
+def test_shared_session_storage_falls_back_to_inline_calls(storage) -> None:
+    agent = GoalSettingAgent(storage=storage)
+
+    assert ToolDispatcher.for_agent(agent).max_workers == 1
+    assert ToolDispatcher.for_agent(
+        GoalSettingAgent(storage=ThreadLocalStorage(create_session_factory("sqlite://")))
+    ).max_workers == 1
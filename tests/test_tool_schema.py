@@ -0,0 +1,45 @@
+import inspect
+import subprocess
+import sys
+from pathlib import Path
+
+from core import llm_prompt
+from core.agent import GoalSettingAgent
+from core.tool_dispatch import TOOL_STATE_KEYS
+from core.tool_schema import TOOL_NAMES, TOOL_SCHEMAS, TOOL_SCHEMAS_JSON, build_tool_schemas
+
+GOLDEN = Path("tests/golden/tool_schemas.json")
+
+
+def test_schemas_match_golden_bytes() -> None:
+    # Regenerate with `python -m tools.tool_schemas --write` after changing a stub.
+    assert TOOL_SCHEMAS_JSON == GOLDEN.read_text(encoding="utf-8")
+    assert build_tool_schemas() == TOOL_SCHEMAS
+
+
+def test_schema_bytes_are_stable_across_processes() -> None:
+    script = "from core.tool_schema import TOOL_SCHEMAS_JSON; print(TOOL_SCHEMAS_JSON, end='')"
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            check=True,
+            env={"PYTHONHASHSEED": seed, "PYTHONPATH": "."},
+        ).stdout
+        for seed in ("0", "1", "random")
+    }
+
+    assert outputs == {TOOL_SCHEMAS_JSON.encode()}
+
+
+def test_every_stub_parameter_is_accepted_by_the_agent() -> None:
+    for name in TOOL_NAMES:
+        method = getattr(GoalSettingAgent, name)
+        stub_params = inspect.signature(getattr(llm_prompt, name)).parameters
+        # Binding fails if the agent method lacks a parameter the schema offers.
+        inspect.signature(method).bind(None, "conv", **{param: None for param in stub_params})
+
+
+def test_every_tool_is_scheduled_by_the_dispatcher() -> None:
+    assert set(TOOL_STATE_KEYS) == set(TOOL_NAMES)
+    assert [schema["function"]["name"] for schema in TOOL_SCHEMAS] == list(TOOL_NAMES)
@@ -0,0 +1,135 @@
+import gzip
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from core.usage_log import UsageLogWriter, log_segments
+
+
+class DayClock:
+    def __init__(self) -> None:
+        self.now = datetime(2025, 5, 1, 23, 0, tzinfo=timezone.utc)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _read(path) -> list[dict]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_records_are_buffered_until_size_or_flush(tmp_path) -> None:
+    path = tmp_path / "llm_usage.log"
+    writer = UsageLogWriter(path, flush_interval_ms=60_000, max_buffer=3)
+    for index in range(4):
+        writer.write({"index": index})
+
+    _wait_for(lambda: writer.written == 3)
+    assert writer.batches == 1
+    writer.flush()
+    assert [record["index"] for record in _read(path)] == [0, 1, 2, 3]
+    writer.close()
+
+
+def test_records_are_flushed_after_the_interval(tmp_path) -> None:
+    path = tmp_path / "llm_usage.log"
+    writer = UsageLogWriter(path, flush_interval_ms=20)
+    writer.write({"model": "gpt-5-mini"})
+
+    _wait_for(lambda: writer.written == 1)
+    assert _read(path) == [{"model": "gpt-5-mini"}]
+    writer.close()
+
+
+def test_close_drains_pending_records(tmp_path) -> None:
+    path = tmp_path / "llm_usage.log"
+    writer = UsageLogWriter(path, flush_interval_ms=60_000, max_buffer=1000)
+    for index in range(50):
+        writer.write({"index": index})
+
+    writer.close()
+    writer.close()
+
+    assert len(_read(path)) == 50
+    writer.write({"index": 50})
+    writer.flush()
+    assert len(_read(path)) == 50 and writer.dropped == 1
+
+
+def test_writes_racing_close_are_kept_or_dropped_never_raised(tmp_path) -> None:
+    path = tmp_path / "llm_usage.log"
+    writer = UsageLogWriter(path, flush_interval_ms=60_000, max_buffer=1000)
+    start = threading.Barrier(9)
+    errors: list[BaseException] = []
+
+    def _log(worker: int) -> None:
+        start.wait()
+        try:
+            for index in range(200):
+                writer.write({"worker": worker, "index": index})
+                if index % 50 == 0:
+                    writer.flush()
+        except BaseException as exc:  # noqa: BLE001 - collected for the assertion
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_log, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    writer.close()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert not errors and not any(thread.is_alive() for thread in threads)
+    written = len(_read(path)) if path.exists() else 0
+    assert written == writer.written and written + writer.dropped == 8 * 200
+
+
+def test_size_rotation_gzips_old_segments(tmp_path) -> None:
+    path = tmp_path / "llm_usage.log"
+    clock = DayClock()
+    writer = UsageLogWriter(path, max_buffer=1, max_bytes=200, clock=clock)
+    for index in range(20):
+        writer.write({"index": index, "padding": "x" * 40})
+    writer.close()
+
+    segments = log_segments(path)
+    assert writer.rotations == len(segments) - 1 > 1
+    assert all(segment.name.startswith("llm_usage.log.2025-05-01.") for segment in segments[:-1])
+    assert all(segment.suffix == ".gz" for segment in segments[:-1])
+    assert all(segment.stat().st_size <= 200 for segment in segments[-1:])
+    records = [record for segment in segments for record in _read(segment)]
+    assert [record["index"] for record in records] == list(range(20))
+
+
+def test_day_change_rotates(tmp_path) -> None:
+    path = tmp_path / "llm_usage.log"
+    clock = DayClock()
+    writer = UsageLogWriter(path, max_buffer=1, clock=clock)
+    writer.write({"day": 1})
+    writer.flush()
+    clock.now += timedelta(hours=2)
+    writer.write({"day": 2})
+    writer.close()
+
+    rotated, current = log_segments(path)
+    assert rotated.name == "llm_usage.log.2025-05-01.1.gz"
+    assert _read(rotated) == [{"day": 1}] and _read(current) == [{"day": 2}]
+
+
+def test_write_errors_are_counted_not_raised(tmp_path) -> None:
+    writer = UsageLogWriter(tmp_path, max_buffer=1)  # a directory cannot be opened
+    writer.write({"index": 0})
+    writer.close()
+
+    assert writer.dropped == 1 and writer.last_error is not None
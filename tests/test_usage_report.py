@@ -0,0 +1,118 @@
+import gzip
+import json
+
+import pytest
+
+from core.usage_log import log_segments
+from tools.usage_report import aggregate_logs, build_report, render_markdown, work_units
+
+PRICES = {"gpt-5-mini": {"input": 0.25, "output": 2.0}}
+
+
+def _record(day: int, model: str, latency: float, conversation: str, **fields) -> dict:
+    record = {
+        "timestamp": f"2025-05-{day:02d}T09:00:00",
+        "model": model,
+        "prompt_tokens": 1000,
+        "completion_tokens": 100,
+        "total_tokens": 1100,
+        "latency_ms": latency,
+        "error": None,
+        "conversation_id": conversation,
+        "cache_hit": False,
+    }
+    record.update(fields)
+    return record
+
+
+def _write(path, records: list[dict]) -> None:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "wt", encoding="utf-8") as fh:
+        fh.writelines(json.dumps(record) + "\n" for record in records)
+
+
+@pytest.fixture
+def usage_log(tmp_path):
+    log_path = tmp_path / "llm_usage.log"
+    _write(
+        tmp_path / "llm_usage.log.2025-05-01.1.gz",
+        [_record(1, "gpt-5-mini", float(ms), "c1") for ms in range(1, 101)],
+    )
+    _write(
+        log_path,
+        [
+            _record(2, "gpt-5-mini", 500.0, "c2"),
+            _record(2, "gpt-5-mini", 0.0, "c2", prompt_tokens=0, completion_tokens=0,
+                    total_tokens=0, cache_hit=True),
+            _record(2, "local-model", 40.0, "c2"),
+            _record(2, "gpt-5-mini", 900.0, "c3", prompt_tokens=0, completion_tokens=0,
+                    total_tokens=0, error="APITimeoutError: Request timed out."),
+        ],
+    )
+    with open(log_path, "a", encoding="utf-8") as fh:
+        fh.write("not json\n\n")
+    return log_path
+
+
+def test_report_groups_tokens_cost_and_latency(usage_log) -> None:
+    report = build_report(usage_log, PRICES, workers=1)
+
+    assert report["lines"] == 105 and report["bad_lines"] == 1
+    totals = report["totals"]
+    assert totals["requests"] == 104
+    assert totals["errors"] == 1 and totals["cache_hits"] == 1
+    assert totals["unpriced_requests"] == 1
+    # 101 priced calls of 1000 prompt + 100 completion tokens.
+    assert totals["cost_usd"] == pytest.approx(101 * (1000 * 0.25 + 100 * 2.0) / 1_000_000)
+
+    day_one = report["days"]["2025-05-01"]
+    assert day_one["requests"] == 100
+    assert day_one["latency_p50_ms"] == pytest.approx(50, rel=0.02)
+    assert day_one["latency_p95_ms"] == pytest.approx(95, rel=0.02)
+    assert day_one["latency_p99_ms"] == pytest.approx(99, rel=0.02)
+    assert set(report["models"]) == {"gpt-5-mini", "local-model"}
+    assert report["conversations"]["c2"]["requests"] == 3
+    assert "latency_p95_ms" not in report["conversations"]["c2"]
+
+    markdown = render_markdown(report)
+    assert "## By model" in markdown and "| local-model |" in markdown
+    assert "--prices" in markdown
+
+
+def test_day_filters(usage_log) -> None:
+    report = build_report(usage_log, PRICES, since="2025-05-02", until="2025-05-02", workers=1)
+
+    assert list(report["days"]) == ["2025-05-02"]
+    assert report["totals"]["requests"] == 4
+
+
+def test_chunked_and_parallel_runs_match_a_single_pass(tmp_path) -> None:
+    log_path = tmp_path / "llm_usage.log"
+    _write(log_path, [_record(3, "gpt-5-mini", float(i % 37), f"c{i % 5}") for i in range(500)])
+    segments = log_segments(log_path)
+
+    expected = aggregate_logs(segments, PRICES, workers=1).to_dict()
+    # Odd chunk sizes put boundaries in the middle of lines.
+    assert len(work_units(segments, chunk_bytes=997)) > 10
+    for chunk_bytes in (997, 4096):
+        assert aggregate_logs(segments, PRICES, workers=1, chunk_bytes=chunk_bytes).to_dict() == expected
+    assert aggregate_logs(segments, PRICES, workers=2, chunk_bytes=997).to_dict() == expected
+    assert expected["lines"] == 500
+
+
+def test_conversations_beyond_the_cap_are_folded_into_one_group(tmp_path) -> None:
+    log_path = tmp_path / "llm_usage.log"
+    # c0 is by far the most expensive; c1..c49 make one cheap call each.
+    records = [_record(4, "gpt-5-mini", 10.0, "c0", prompt_tokens=50_000) for _ in range(5)]
+    records += [_record(4, "gpt-5-mini", 10.0, f"c{index}") for index in range(1, 50)]
+    _write(log_path, records)
+
+    aggregate = aggregate_logs(log_segments(log_path), PRICES, workers=1, max_conversations=3)
+    report = aggregate.to_dict()
+
+    assert len(report["conversations"]) == 3
+    assert report["conversations"]["c0"]["requests"] == 5
+    assert report["pruned_conversations"] == 47
+    kept = sum(group["requests"] for group in report["conversations"].values())
+    assert kept + report["other_conversations"]["requests"] == report["totals"]["requests"] == 54
+    assert "47개 대화" in render_markdown({**report, "period": None})
@@ -0,0 +1,171 @@
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.agent import GoalSettingAgent
+from core.models import Base
+from core.storage import SQLAlchemyStorage
+from core.write_behind import WriteBehindStorage
+
+
+@pytest.fixture
+def file_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'write_behind.db'}", future=True)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def seeded(file_factory):
+    storage = SQLAlchemyStorage(file_factory())
+    goal = storage.create_goal({"title": "Write-behind"})
+    quest = storage.create_quest(goal["goal_id"], {"title": "러닝"})
+    yield storage, goal["goal_id"], quest["quest_id"]
+    storage.session.close()
+
+
+def _payload(goal_id: str, quest_id: str, day: int) -> dict:
+    return {
+        "goal_id": goal_id,
+        "quest_id": quest_id,
+        "occurred_at": datetime(2025, 5, day, tzinfo=timezone.utc),
+        "outcome": "COMPLETED",
+    }
+
+
+def test_buffered_events_are_grouped_and_flushed_on_close(seeded, file_factory) -> None:
+    storage, goal_id, quest_id = seeded
+    writer = WriteBehindStorage(
+        storage, file_factory, flush_interval_ms=10_000, max_batch=4
+    )
+
+    logs = [writer.log_quest_event(_payload(goal_id, quest_id, day)) for day in range(1, 11)]
+    assert len({log["log_id"] for log in logs}) == 10
+    assert all(log["log_id"] for log in logs)
+
+    writer.close()
+
+    assert writer.stats()["flushed_events"] == 10
+    # Two full batches of four, then the remaining two on shutdown.
+    assert writer.stats()["flushed_batches"] == 3
+    stored = storage.list_recent_quest_logs(goal_id, limit=20)
+    assert {log["log_id"] for log in stored} == {log["log_id"] for log in logs}
+    with pytest.raises(RuntimeError):
+        writer.log_quest_event(_payload(goal_id, quest_id, 11))
+
+
+def test_a_poisoned_payload_fails_alone(seeded, file_factory) -> None:
+    storage, goal_id, quest_id = seeded
+    writer = WriteBehindStorage(storage, file_factory, flush_interval_ms=10_000, max_batch=10)
+    first = writer.log_quest_event(_payload(goal_id, quest_id, 1))
+    writer.flush()
+
+    # The reused log_id only fails at commit, inside a batch with four good events.
+    logs = [writer.log_quest_event(_payload(goal_id, quest_id, day)) for day in (2, 3)]
+    writer.log_quest_event({**_payload(goal_id, quest_id, 4), "log_id": first["log_id"]})
+    logs += [writer.log_quest_event(_payload(goal_id, quest_id, day)) for day in (5, 6)]
+    writer.close()
+
+    assert writer.stats()["flushed_events"] == 5
+    assert writer.stats()["failed_events"] == 1 and writer.last_error is not None
+    stored = {log["log_id"] for log in storage.list_recent_quest_logs(goal_id, limit=20)}
+    assert stored == {first["log_id"], *(log["log_id"] for log in logs)}
+
+
+def test_reads_flush_pending_writes(seeded, file_factory) -> None:
+    storage, goal_id, quest_id = seeded
+    writer = WriteBehindStorage(storage, file_factory, flush_interval_ms=10_000)
+    try:
+        log = writer.log_quest_event(_payload(goal_id, quest_id, 1))
+        assert writer.list_recent_quest_logs(goal_id)[0]["log_id"] == log["log_id"]
+        assert writer.get_goal(goal_id)["title"] == "Write-behind"
+    finally:
+        writer.close()
+
+
+def test_durable_mode_returns_after_commit(seeded, file_factory) -> None:
+    storage, goal_id, quest_id = seeded
+    writer = WriteBehindStorage(storage, file_factory, durability="durable")
+    barrier = threading.Barrier(8)
+    logged: list[dict] = []
+
+    def _log(day: int) -> None:
+        barrier.wait()
+        log = writer.log_quest_event(_payload(goal_id, quest_id, day))
+        # Visible from an unrelated session without any explicit flush.
+        with file_factory() as session:
+            stored = SQLAlchemyStorage(session).list_recent_quest_logs(goal_id, 20)
+        assert log["log_id"] in {entry["log_id"] for entry in stored}
+        logged.append(log)
+
+    threads = [threading.Thread(target=_log, args=(day,)) for day in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert len(logged) == 8
+        stats = writer.stats()
+        assert stats["flushed_events"] == 8
+        assert stats["flushed_batches"] <= 8
+    finally:
+        writer.close()
+
+
+def test_flush_racing_close_never_hangs(seeded, file_factory) -> None:
+    storage, goal_id, quest_id = seeded
+    writer = WriteBehindStorage(storage, file_factory, durability="durable")
+    start = threading.Barrier(9)
+
+    def _flush() -> None:
+        start.wait()
+        for _ in range(50):
+            writer.flush()
+
+    threads = [threading.Thread(target=_flush) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    writer.close()
+    for thread in threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+    writer.flush()
+    with pytest.raises(RuntimeError):
+        writer.log_quest_event(_payload(goal_id, quest_id, 1))
+
+
+def test_durable_mode_surfaces_write_errors(seeded, file_factory) -> None:
+    storage, goal_id, _ = seeded
+    writer = WriteBehindStorage(storage, file_factory, durability="durable")
+    try:
+        with pytest.raises(Exception):
+            writer.log_quest_event({**_payload(goal_id, "missing", 1), "quest_id": None})
+        assert writer.stats()["failed_events"] == 1
+    finally:
+        writer.close()
+
+
+def test_agent_logs_outcomes_through_write_behind(seeded, file_factory) -> None:
+    storage, _, _ = seeded
+    writer = WriteBehindStorage(storage, file_factory)
+    agent = GoalSettingAgent(storage=writer)
+    try:
+        agent.create_goal("conv_wb", "Agent Goal")
+        state = agent.state_manager.get_state("conv_wb")
+        assert state is not None
+        goal_id = state["goal_id"]
+        quest = agent.choose_quest("conv_wb", goal_id, {"title": "스트레칭"})["quest"]
+        response = agent.log_quest_outcome(
+            "conv_wb",
+            {"goal_id": goal_id, "quest_id": quest["quest_id"], "outcome": "COMPLETED"},
+        )
+        assert writer.list_recent_quest_logs(goal_id)[0]["log_id"] == response["log"]["log_id"]
+    finally:
+        writer.close()
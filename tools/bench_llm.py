@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Latency benchmarks for the chat loop against a local fake OpenAI server.
+
+Run from the repository root; nothing leaves the machine:
+
+    python -m tools.bench_llm ttft --requests 20 --first-token-ms 300 --token-ms 20
+    python -m tools.bench_llm load --conversations 200 --concurrency 20 --first-token-ms 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+from openai import OpenAI
+from openai.types.chat import ChatCompletionMessageParam
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app
+from core.agent import SYSTEM_PROMPT, GoalSettingAgent
+from core.context_window import ContextWindow
+from core.llm_router import ModelRouter
+from core.llm_stream import StreamedReply
+from core.models import Base
+from core.storage import ThreadLocalStorage
+from core.tool_dispatch import ToolDispatcher
+from core.tool_schema import TOOL_NAMES
+from tools.fake_openai import GOAL_FLOW_INPUTS, FakeOpenAIServer, goal_flow_responder
+
+MESSAGES: list[ChatCompletionMessageParam] = [{"role": "user", "content": "이번 주 러닝 계획을 자세히 알려줘"}]
+
+
+def _print_table(headers: list[str], rows: list[list[str]]) -> None:
+    print("| " + " | ".join(headers) + " |")
+    print("|" + "|".join("---" for _ in headers) + "|")
+    for row in rows:
+        print("| " + " | ".join(row) + " |")
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _non_streaming(client: OpenAI) -> tuple[float, float]:
+    started = time.perf_counter()
+    response = client.chat.completions.create(model="fake", messages=MESSAGES)
+    elapsed = time.perf_counter() - started
+    assert response.choices[0].message.content
+    # Nothing can be shown before the whole body has arrived.
+    return elapsed, elapsed
+
+
+def _streaming(client: OpenAI) -> tuple[float, float]:
+    started = time.perf_counter()
+    stream = client.chat.completions.create(
+        model="fake", messages=MESSAGES, stream=True, stream_options={"include_usage": True}
+    )
+    reply = StreamedReply.consume(stream, started_at=started)
+    assert reply.ttft is not None and reply.usage is not None
+    return reply.ttft, time.perf_counter() - started
+
+
+def bench_ttft(requests: int, first_token_ms: float, token_ms: float) -> None:
+    server = FakeOpenAIServer(
+        first_token_delay=first_token_ms / 1000, token_delay=token_ms / 1000
+    ).start()
+    client = OpenAI(api_key="sk-local", base_url=server.url, max_retries=0)
+    rows = []
+    try:
+        for name, call in (("non-streaming", _non_streaming), ("streaming", _streaming)):
+            call(client)  # warm up the connection pool
+            samples = [call(client) for _ in range(requests)]
+            ttfts = [ttft * 1000 for ttft, _ in samples]
+            totals = [total * 1000 for _, total in samples]
+            rows.append(
+                [
+                    name,
+                    f"{statistics.median(ttfts):.1f}",
+                    f"{_percentile(ttfts, 95):.1f}",
+                    f"{statistics.median(totals):.1f}",
+                ]
+            )
+    finally:
+        client.close()
+        server.stop()
+    _print_table(["mode", "TTFT p50 ms", "TTFT p95 ms", "total p50 ms"], rows)
+
+
+class _Latencies:
+    """Thread-safe millisecond samples per operation name."""
+
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def timed(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        def _wrapper(**kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(**kwargs)
+            finally:
+                self.add(name, (time.perf_counter() - started) * 1000)
+
+        return _wrapper
+
+    def add(self, name: str, milliseconds: float) -> None:
+        with self._lock:
+            self.samples[name].append(milliseconds)
+
+
+def run_load(
+    conversations: int,
+    concurrency: int,
+    first_token_ms: float = 0.0,
+    token_ms: float = 0.0,
+    *,
+    streaming: bool = False,
+) -> dict:
+    """Drive scripted goal-setting conversations through ``app._run_turn``.
+
+    Every conversation has its own agent, dispatcher and context window on a
+    shared file-backed SQLite database, as separate chat processes would;
+    the fake server scripts the tool calls (:data:`GOAL_FLOW_INPUTS`). Tool
+    latencies are measured around the agent methods the dispatcher runs.
+    """
+
+    server = FakeOpenAIServer(
+        responder=goal_flow_responder,
+        first_token_delay=first_token_ms / 1000,
+        token_delay=token_ms / 1000,
+    ).start()
+    client = OpenAI(api_key="sk-local", base_url=server.url, max_retries=0)
+    latencies = _Latencies()
+    client.chat.completions.create = latencies.timed(  # type: ignore[method-assign]
+        "llm round trip", client.chat.completions.create
+    )
+    router = ModelRouter(app.LLM_MODEL_PLAN, retry_on=app.RETRYABLE_ERRORS)
+    usage_log_path = app.USAGE_LOG_PATH
+    errors: list[BaseException] = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{Path(tmp_dir) / 'load.db'}", future=True)
+        Base.metadata.create_all(engine)
+        storage = ThreadLocalStorage(sessionmaker(bind=engine, expire_on_commit=False, future=True))
+        app.USAGE_LOG_PATH = Path(tmp_dir) / "llm_usage.log"
+
+        def _conversation(index: int) -> None:
+            agent = GoalSettingAgent(storage=storage)
+            tools = {name: latencies.timed(name, getattr(agent, name)) for name in TOOL_NAMES}
+            dispatcher = ToolDispatcher.for_agent(agent)
+            conversation_id = f"load_{index}"
+            history = ContextWindow(SYSTEM_PROMPT, conversation_id=conversation_id)
+            try:
+                for text in GOAL_FLOW_INPUTS:
+                    history.append({"role": "user", "content": text})
+                    started = time.perf_counter()
+                    app._run_turn(
+                        client,
+                        router,
+                        None,
+                        history,
+                        tools,
+                        dispatcher,
+                        conversation_id,
+                        streaming=streaming,
+                    )
+                    latencies.add("turn", (time.perf_counter() - started) * 1000)
+            finally:
+                dispatcher.close()
+
+        started = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(concurrency) as pool:
+                futures = [pool.submit(_conversation, index) for index in range(conversations)]
+                errors = [error for future in futures if (error := future.exception()) is not None]
+            seconds = time.perf_counter() - started
+        finally:
+            app._close_usage_writers()
+            app.USAGE_LOG_PATH = usage_log_path
+            router.close()
+            client.close()
+            server.stop()
+            storage.close()
+            engine.dispose()
+
+    samples = dict(latencies.samples)
+    tool_calls = sum(len(values) for name, values in samples.items() if name in TOOL_NAMES)
+    return {
+        "conversations": conversations,
+        "concurrency": concurrency,
+        "errors": [repr(error) for error in errors],
+        "seconds": seconds,
+        "llm_requests": len(server.requests),
+        "conversations_per_second": conversations / seconds,
+        "turns_per_second": len(samples.get("turn", [])) / seconds,
+        "tool_calls_per_second": tool_calls / seconds,
+        "latency_ms": samples,
+    }
+
+
+def bench_load(
+    conversations: int, concurrency: int, first_token_ms: float, token_ms: float, streaming: bool
+) -> None:
+    result = run_load(conversations, concurrency, first_token_ms, token_ms, streaming=streaming)
+    _print_table(
+        ["conversations", "concurrency", "errors", "seconds", "conv/s", "turns/s", "tool calls/s"],
+        [
+            [
+                str(result["conversations"]),
+                str(result["concurrency"]),
+                str(len(result["errors"])),
+                f"{result['seconds']:.2f}",
+                f"{result['conversations_per_second']:.1f}",
+                f"{result['turns_per_second']:.1f}",
+                f"{result['tool_calls_per_second']:.1f}",
+            ]
+        ],
+    )
+    print()
+    order = [*TOOL_NAMES, "llm round trip", "turn"]
+    rows = [
+        [
+            name,
+            str(len(samples)),
+            f"{_percentile(samples, 50):.2f}",
+            f"{_percentile(samples, 95):.2f}",
+            f"{_percentile(samples, 99):.2f}",
+        ]
+        for name in order
+        if (samples := result["latency_ms"].get(name))
+    ]
+    _print_table(["operation", "calls", "p50 ms", "p95 ms", "p99 ms"], rows)
+    for error in result["errors"][:5]:
+        print(f"error: {error}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ttft = subparsers.add_parser(
+        "ttft", help="time-to-first-token of streaming vs non-streaming completions"
+    )
+    ttft.add_argument("--requests", type=int, default=20)
+    ttft.add_argument("--first-token-ms", type=float, default=300.0)
+    ttft.add_argument("--token-ms", type=float, default=20.0)
+
+    load = subparsers.add_parser(
+        "load", help="concurrent scripted conversations through the real tool dispatch"
+    )
+    load.add_argument("--conversations", type=int, default=100)
+    load.add_argument("--concurrency", type=int, default=10)
+    load.add_argument("--first-token-ms", type=float, default=50.0)
+    load.add_argument("--token-ms", type=float, default=0.0)
+    load.add_argument("--stream", action="store_true", help="use streamed completions")
+
+    args = parser.parse_args()
+    if args.command == "ttft":
+        bench_ttft(args.requests, args.first_token_ms, args.token_ms)
+    elif args.command == "load":
+        bench_load(
+            args.conversations, args.concurrency, args.first_token_ms, args.token_ms, args.stream
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for conversation state handling.
+
+Run from the repository root so the ``core`` package is importable:
+
+    python -m tools.bench_state patch-allocations --calls 2000 --conversations 200
+    python -m tools.bench_state state-footprint --states 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+import uuid
+from typing import Callable
+
+from core.conversation_state import ConversationState
+from core.state_manager import StateManager
+
+
+def _print_table(headers: list[str], rows: list[list[str]]) -> None:
+    print("| " + " | ".join(headers) + " |")
+    print("|" + "|".join("---" for _ in headers) + "|")
+    for row in rows:
+        print("| " + " | ".join(row) + " |")
+
+
+def _seeded_state(metrics: int, quests: int, logs: int) -> dict:
+    return {
+        "goal_id": str(uuid.uuid4()),
+        "goal_title": "하프 마라톤 완주",
+        "metrics": [
+            {
+                "metric_name": f"metric-{index}",
+                "metric_type": "INCREMENTAL",
+                "target_value": index,
+                "unit": "km",
+            }
+            for index in range(metrics)
+        ],
+        "motivation": None,
+        "onboarding_stage": "STAGE_0_ONBOARDING",
+        "feature_flags": {"loot": True, "energy": False, "boss": False},
+        "boss_stage_ids": [str(uuid.uuid4()) for _ in range(3)],
+        "weekly_plan": {},
+        "current_variations": [{"title": "템포런"}, {"title": "인터벌"}],
+        "accepted_quests": [str(uuid.uuid4()) for _ in range(quests)],
+        "quest_logs": [str(uuid.uuid4()) for _ in range(logs)],
+    }
+
+
+def _seeded_manager(conversations: int, seed: tuple[int, int, int]) -> StateManager:
+    manager = StateManager()
+    for index in range(conversations):
+        manager.new_conversation(f"bench-{index}", _seeded_state(*seed))
+    return manager
+
+
+# The state half of each agent tool, before and after the patch API; storage
+# calls are left out so only state handling is measured.
+
+
+def _legacy_add_metric(manager: StateManager, conv_id: str, value: str) -> None:
+    state = manager.get_state(conv_id)
+    assert state is not None
+    state.setdefault("metrics", []).append({"metric_name": value})
+    manager.update_state(conv_id, state)
+
+
+def _patch_add_metric(manager: StateManager, conv_id: str, value: str) -> None:
+    manager.append(conv_id, "metrics", {"metric_name": value})
+    # add_metric still returns the whole state to the LLM.
+    manager.get_state(conv_id)
+
+
+def _legacy_choose_quest(manager: StateManager, conv_id: str, value: str) -> None:
+    state = manager.get_state(conv_id)
+    assert state is not None
+    state.setdefault("accepted_quests", []).append(value)
+    state["current_variations"] = []
+    manager.update_state(conv_id, state)
+
+
+def _patch_choose_quest(manager: StateManager, conv_id: str, value: str) -> None:
+    manager.append(conv_id, "accepted_quests", value)
+    manager.set(conv_id, "current_variations", [])
+
+
+def _legacy_log_quest_outcome(manager: StateManager, conv_id: str, value: str) -> None:
+    state = manager.get_state(conv_id)
+    assert state is not None
+    state.setdefault("quest_logs", []).append(value)
+    manager.update_state(conv_id, state)
+
+
+def _patch_log_quest_outcome(manager: StateManager, conv_id: str, value: str) -> None:
+    manager.append(conv_id, "quest_logs", value)
+
+
+TOOLS: dict[str, tuple[Callable, Callable]] = {
+    "add_metric": (_legacy_add_metric, _patch_add_metric),
+    "choose_quest": (_legacy_choose_quest, _patch_choose_quest),
+    "log_quest_outcome": (_legacy_log_quest_outcome, _patch_log_quest_outcome),
+}
+
+
+def _measure(
+    call: Callable[[StateManager, str, str], None],
+    calls: int,
+    conversations: int,
+    seed: tuple[int, int, int],
+) -> tuple[float, float]:
+    """Return (mean peak bytes allocated per call, microseconds per call)."""
+
+    work = [(f"bench-{index % conversations}", f"value-{index}") for index in range(calls)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = _seeded_manager(conversations, seed)
+        peaks = 0
+        tracemalloc.start()
+        for conv_id, value in work:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            call(manager, conv_id, value)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks += peak - before
+        tracemalloc.stop()
+
+        manager = _seeded_manager(conversations, seed)
+        started = time.perf_counter()
+        for conv_id, value in work:
+            call(manager, conv_id, value)
+        elapsed = time.perf_counter() - started
+    return peaks / calls, elapsed / calls * 1e6
+
+
+def bench_patch_allocations(
+    calls: int, conversations: int, metrics: int, quests: int, logs: int
+) -> None:
+    seed = (metrics, quests, logs)
+    rows = []
+    for tool, (legacy, patch) in TOOLS.items():
+        legacy_bytes, legacy_us = _measure(legacy, calls, conversations, seed)
+        patch_bytes, patch_us = _measure(patch, calls, conversations, seed)
+        rows.append(
+            [
+                tool,
+                f"{legacy_bytes:,.0f}",
+                f"{patch_bytes:,.0f}",
+                f"{1 - patch_bytes / legacy_bytes:.0%}",
+                f"{legacy_us:.1f}",
+                f"{patch_us:.1f}",
+            ]
+        )
+    _print_table(
+        [
+            "tool",
+            "get/update bytes/call",
+            "patch bytes/call",
+            "reduction",
+            "get/update µs",
+            "patch µs",
+        ],
+        rows,
+    )
+
+
+def _footprint(build: Callable[[dict], object], payloads: list[dict]) -> tuple[int, float]:
+    """Return (bytes retained, seconds) for building one state per payload."""
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    states = [build(payload) for payload in payloads]
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del states
+    return retained, elapsed
+
+
+def bench_state_footprint(states: int, quests: int, logs: int) -> None:
+    # Payload values (ids, metric dicts) are built up front and shared by both
+    # representations, so only the per-state containers are measured.
+    payloads = [_seeded_state(2, quests, logs) for _ in range(states)]
+    builders: dict[str, Callable[[dict], object]] = {
+        "dict": lambda data: {
+            **data,
+            "boss_stage_ids": list(data["boss_stage_ids"]),
+            "accepted_quests": list(data["accepted_quests"]),
+            "quest_logs": list(data["quest_logs"]),
+        },
+        "ConversationState": ConversationState.from_dict,
+    }
+    rows = []
+    baseline = None
+    for name, build in builders.items():
+        retained, elapsed = _footprint(build, payloads)
+        baseline = baseline or retained
+        rows.append(
+            [
+                name,
+                f"{retained / 2**20:.1f}",
+                f"{retained / states:.0f}",
+                f"{retained / baseline:.0%}",
+                f"{elapsed * 1e6 / states:.2f}",
+            ]
+        )
+    _print_table(["representation", "MiB", "bytes/state", "vs dict", "µs/state"], rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    patch = subparsers.add_parser(
+        "patch-allocations",
+        help="per-call allocation of get_state/update_state vs the patch API",
+    )
+    patch.add_argument("--calls", type=int, default=2000)
+    patch.add_argument("--conversations", type=int, default=200)
+    patch.add_argument("--metrics", type=int, default=3)
+    patch.add_argument("--quests", type=int, default=30)
+    patch.add_argument("--logs", type=int, default=100)
+
+    footprint = subparsers.add_parser(
+        "state-footprint", help="tracemalloc footprint of dict vs ConversationState"
+    )
+    footprint.add_argument("--states", type=int, default=50_000)
+    footprint.add_argument("--quests", type=int, default=5)
+    footprint.add_argument("--logs", type=int, default=10)
+
+    args = parser.parse_args()
+    if args.command == "state-footprint":
+        bench_state_footprint(args.states, args.quests, args.logs)
+    elif args.command == "patch-allocations":
+        bench_patch_allocations(
+            args.calls, args.conversations, args.metrics, args.quests, args.logs
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the SQLAlchemy storage layer.
+
+Run from the repository root so the ``core`` package is importable:
+
+    python -m tools.bench_storage sqlite-profiles --events 2000
+    python -m tools.bench_storage group-commit --events 2000 --threads 8
+    python -m tools.bench_storage read-modes --logs 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from core.models import Base
+from core.storage import (
+    READ_MODES,
+    SQLITE_PROFILES,
+    SQLAlchemyStorage,
+    apply_sqlite_profile,
+)
+from core.write_behind import WriteBehindStorage
+
+
+def _file_storage(db_path: Path, profile: str) -> tuple[SQLAlchemyStorage, Engine]:
+    engine = create_engine(f"sqlite:///{db_path}", future=True)
+    apply_sqlite_profile(engine, profile)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False, future=True)()
+    return SQLAlchemyStorage(session), engine
+
+
+def _seed_quest(storage: SQLAlchemyStorage) -> tuple[str, str]:
+    goal = storage.create_goal({"title": "Benchmark Goal"})
+    quest = storage.create_quest(goal["goal_id"], {"title": "Benchmark Quest"})
+    return goal["goal_id"], quest["quest_id"]
+
+
+def bench_sqlite_profiles(events: int) -> list[dict]:
+    """Measure per-event ``log_quest_event`` throughput under each profile."""
+
+    results: list[dict] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for profile in SQLITE_PROFILES:
+            storage, engine = _file_storage(Path(tmp_dir) / f"{profile}.db", profile)
+            goal_id, quest_id = _seed_quest(storage)
+            started = time.perf_counter()
+            for _ in range(events):
+                storage.log_quest_event(
+                    {
+                        "goal_id": goal_id,
+                        "quest_id": quest_id,
+                        "occurred_at": datetime.now(timezone.utc),
+                        "outcome": "COMPLETED",
+                    }
+                )
+            elapsed = time.perf_counter() - started
+            storage.session.close()
+            engine.dispose()
+            results.append(
+                {
+                    "profile": profile,
+                    "events": events,
+                    "seconds": elapsed,
+                    "events_per_second": events / elapsed if elapsed else 0.0,
+                }
+            )
+    return results
+
+
+def bench_group_commit(events: int, threads: int, profile: str) -> list[dict]:
+    """Compare per-event commits with write-behind group commit."""
+
+    results: list[dict] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in ("per-event", "write-behind buffered", "write-behind durable"):
+            storage, engine = _file_storage(Path(tmp_dir) / f"{len(results)}.db", profile)
+            goal_id, quest_id = _seed_quest(storage)
+            payload = {"goal_id": goal_id, "quest_id": quest_id, "outcome": "COMPLETED"}
+            target: SQLAlchemyStorage | WriteBehindStorage = storage
+            writer: WriteBehindStorage | None = None
+            if mode != "per-event":
+                factory = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+                writer = WriteBehindStorage(
+                    storage, factory, durability=mode.rsplit(" ", 1)[-1]
+                )
+                target = writer
+            lock = threading.Lock()
+
+            def _worker(count: int) -> None:
+                for _ in range(count):
+                    event = {**payload, "occurred_at": datetime.now(timezone.utc)}
+                    if writer is None:
+                        # A Session is not thread-safe; per-event commits serialise.
+                        with lock:
+                            target.log_quest_event(event)
+                    else:
+                        target.log_quest_event(event)
+
+            per_thread = events // threads
+            workers = [
+                threading.Thread(target=_worker, args=(per_thread,))
+                for _ in range(threads)
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            batches = per_thread * threads
+            if writer is not None:
+                writer.close()
+                batches = writer.stats()["flushed_batches"]
+            elapsed = time.perf_counter() - started
+            storage.session.close()
+            engine.dispose()
+            results.append(
+                {
+                    "mode": mode,
+                    "events": per_thread * threads,
+                    "commits": batches,
+                    "seconds": elapsed,
+                    "events_per_second": per_thread * threads / elapsed if elapsed else 0.0,
+                }
+            )
+    return results
+
+
+def bench_read_modes(logs: int, batch_size: int) -> list[dict]:
+    """Time and trace allocations of ORM vs Core reads over ``logs`` quest logs."""
+
+    results: list[dict] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage, engine = _file_storage(Path(tmp_dir) / "reads.db", "performance")
+        goal_id, quest_id = _seed_quest(storage)
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for start in range(0, logs, 10_000):
+            storage.log_quest_events(
+                {
+                    "goal_id": goal_id,
+                    "quest_id": quest_id,
+                    "occurred_at": base + timedelta(seconds=index),
+                    "outcome": "COMPLETED",
+                    "energy_status": "KEEPING_PACE",
+                }
+                for index in range(start, min(start + 10_000, logs))
+            )
+        storage.session.close()
+        factory = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+
+        reads = {
+            "list_recent_quest_logs": lambda s: len(s.list_recent_quest_logs(goal_id, logs)),
+            "iter_quest_logs": lambda s: sum(
+                1 for _ in s.iter_quest_logs(goal_id, batch_size=batch_size)
+            ),
+        }
+        for read_name, read in reads.items():
+            for mode in READ_MODES:
+                with factory() as session:
+                    started = time.perf_counter()
+                    rows = read(SQLAlchemyStorage(session, read_mode=mode))
+                    elapsed = time.perf_counter() - started
+                with factory() as session:
+                    tracemalloc.start()
+                    read(SQLAlchemyStorage(session, read_mode=mode))
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                results.append(
+                    {
+                        "read": read_name,
+                        "mode": mode,
+                        "rows": rows,
+                        "seconds": elapsed,
+                        "peak_mib": peak / (1024 * 1024),
+                    }
+                )
+        engine.dispose()
+    return results
+
+
+def _print_table(rows: list[dict], columns: list[str]) -> None:
+    print("| " + " | ".join(columns) + " |")
+    print("| " + " | ".join("---" for _ in columns) + " |")
+    for row in rows:
+        cells = []
+        for column in columns:
+            value = row[column]
+            cells.append(f"{value:,.2f}" if isinstance(value, float) else str(value))
+        print("| " + " | ".join(cells) + " |")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    profiles = subparsers.add_parser(
+        "sqlite-profiles", help="log_quest_event throughput per SQLite profile"
+    )
+    profiles.add_argument("--events", type=int, default=2000)
+
+    group = subparsers.add_parser(
+        "group-commit", help="per-event commit vs write-behind group commit"
+    )
+    group.add_argument("--events", type=int, default=2000)
+    group.add_argument("--threads", type=int, default=8)
+    group.add_argument("--profile", choices=sorted(SQLITE_PROFILES), default="durable")
+
+    reads = subparsers.add_parser("read-modes", help="ORM vs Core row read path")
+    reads.add_argument("--logs", type=int, default=100_000)
+    reads.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args()
+
+    if args.command == "sqlite-profiles":
+        _print_table(
+            bench_sqlite_profiles(args.events),
+            ["profile", "events", "seconds", "events_per_second"],
+        )
+    elif args.command == "read-modes":
+        _print_table(
+            bench_read_modes(args.logs, args.batch_size),
+            ["read", "mode", "rows", "seconds", "peak_mib"],
+        )
+    elif args.command == "group-commit":
+        _print_table(
+            bench_group_commit(args.events, args.threads, args.profile),
+            ["mode", "events", "commits", "seconds", "events_per_second"],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI Chat Completions endpoint.
+
+Serves ``POST /v1/chat/completions`` with scripted replies, both as one JSON
+body and as a server-sent-event stream, with configurable prefill and
+per-token delays so latency work can run offline:
+
+    python -m tools.fake_openai --port 8390 --first-token-ms 300 --token-ms 20
+    python -m tools.fake_openai --script goal-flow   # scripted tool calls
+
+Point the SDK at it with ``OpenAI(base_url=server.url, api_key="sk-local")``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+DEFAULT_REPLY = (
+    "좋아요! 이번 주에는 가볍게 20분 걷기부터 시작해볼까요? "
+    "작은 성공을 쌓으면 다음 단계가 훨씬 쉬워져요."
+)
+
+# A responder maps the request body to ``{"content": str | None,
+# "tool_calls": [{"name": str, "arguments": dict}]}``.
+Responder = Callable[[dict], dict]
+
+
+def default_responder(_request: dict) -> dict:
+    return {"content": DEFAULT_REPLY, "tool_calls": []}
+
+
+# User turns of one scripted goal-setting conversation; goal_flow_responder
+# answers the n-th user message with the n-th step's tool calls.
+GOAL_FLOW_INPUTS = (
+    "주 3회 러닝 습관을 만들고 싶어",
+    "주간 러닝 횟수와 거리로 측정할게. 건강 때문에 하고 싶어",
+    "첫 보스는 5km 완주로 하자",
+    "오늘은 20분 걷기 퀘스트로 할게",
+    "다 했어!",
+    "이제 마무리하자",
+)
+GOAL_FLOW_REPLY = "좋아요, 기록해 두었어요. 다음 단계로 가볼까요?"
+
+
+def _find_field(value: Any, key: str) -> Any:
+    if isinstance(value, dict):
+        if key in value:
+            return value[key]
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            found = _find_field(item, key)
+            if found is not None:
+                return found
+    return None
+
+
+def _tool_result_field(messages: list[dict], key: str) -> Any:
+    """Return ``key`` from the most recent tool result that has it."""
+
+    for message in reversed(messages):
+        if message.get("role") != "tool":
+            continue
+        try:
+            found = _find_field(json.loads(message.get("content") or "null"), key)
+        except ValueError:
+            continue
+        if found is not None:
+            return found
+    return None
+
+
+def _goal_flow_calls(step: int, goal_id: Any, quest_id: Any) -> list[dict]:
+    if step == 0:
+        return [{"name": "create_goal", "arguments": {"title": "주 3회 러닝"}}]
+    if step == 1:
+        # Three calls in one message: the dispatcher orders them by state key.
+        return [
+            {
+                "name": "add_metric",
+                "arguments": {
+                    "metric_name": "주간 러닝 횟수",
+                    "metric_type": "INCREMENTAL",
+                    "target_value": 3,
+                    "unit": "회",
+                },
+            },
+            {
+                "name": "add_metric",
+                "arguments": {
+                    "metric_name": "주간 러닝 거리",
+                    "metric_type": "INCREMENTAL",
+                    "target_value": 15,
+                    "unit": "km",
+                },
+            },
+            {"name": "set_motivation", "arguments": {"text": "건강하게 오래 뛰고 싶어서"}},
+        ]
+    if step == 2:
+        boss = {"title": "5km 완주", "success_criteria": "쉬지 않고 5km", "target_week": 4}
+        return [{"name": "define_boss_stages", "arguments": {"goal_id": goal_id, "boss_candidates": [boss]}}]
+    if step == 3:
+        quest = {"title": "20분 걷기", "expected_duration_minutes": 20}
+        return [{"name": "choose_quest", "arguments": {"goal_id": goal_id, "quest_choice": quest}}]
+    if step == 4:
+        outcome = {
+            "goal_id": goal_id,
+            "quest_id": quest_id,
+            "outcome": "COMPLETED",
+            "loot_type": "ACHIEVEMENT",
+        }
+        return [{"name": "log_quest_outcome", "arguments": outcome}]
+    return [{"name": "finalize_goal", "arguments": {}}]
+
+
+def goal_flow_responder(request: dict) -> dict:
+    """Script a goal-setting conversation from the request history alone.
+
+    The n-th user message gets the tool calls of step n of
+    :data:`GOAL_FLOW_INPUTS`, with ids taken from earlier tool results, and
+    a message that ends in tool results gets a short text reply. Nothing is
+    kept per connection, so any number of conversations can run at once.
+    """
+
+    messages = request["messages"]
+    if messages and messages[-1].get("role") == "tool":
+        return {"content": GOAL_FLOW_REPLY, "tool_calls": []}
+    step = max(0, sum(1 for message in messages if message.get("role") == "user") - 1)
+    calls = _goal_flow_calls(
+        step % len(GOAL_FLOW_INPUTS),
+        _tool_result_field(messages, "goal_id"),
+        _tool_result_field(messages, "quest_id"),
+    )
+    return {"content": None, "tool_calls": calls}
+
+
+RESPONDERS: dict[str, Responder] = {"default": default_responder, "goal-flow": goal_flow_responder}
+
+
+def _tokens(text: str) -> list[str]:
+    """Split ``text`` into word-sized deltas that concatenate back to it."""
+
+    words = text.split(" ")
+    return [word if index == 0 else " " + word for index, word in enumerate(words)]
+
+
+def _fragments(text: str, size: int = 8) -> list[str]:
+    return [text[start:start + size] for start in range(0, len(text), size)] or [""]
+
+
+def _usage(request: dict, completion_tokens: int) -> dict:
+    prompt_tokens = sum(len(str(message.get("content") or "")) // 4 + 4 for message in request["messages"])
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _tool_calls(reply: dict) -> list[dict]:
+    return [
+        {
+            "id": f"call_{index}_{uuid.uuid4().hex[:8]}",
+            "type": "function",
+            "function": {
+                "name": call["name"],
+                "arguments": json.dumps(call.get("arguments", {}), ensure_ascii=False),
+            },
+        }
+        for index, call in enumerate(reply.get("tool_calls") or [])
+    ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeOpenAIServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") not in {"/v1/chat/completions", "/chat/completions"}:
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        reply = self.server.responder(request)
+        with self.server.lock:
+            self.server.requests.append(request)
+        time.sleep(self.server.first_token_delay)
+        if request.get("stream"):
+            self._stream(request, reply)
+        else:
+            self._complete(request, reply)
+
+    def _chunk(self, completion_id: str, model: str, **fields: Any) -> dict:
+        return {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [],
+            **fields,
+        }
+
+    def _complete(self, request: dict, reply: dict) -> None:
+        content = reply.get("content")
+        tokens = _tokens(content) if content else []
+        time.sleep(self.server.token_delay * len(tokens))
+        tool_calls = _tool_calls(reply)
+        message: dict[str, Any] = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        body = json.dumps(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if tool_calls else "stop",
+                    }
+                ],
+                "usage": _usage(request, max(len(tokens), 1)),
+            },
+            ensure_ascii=False,
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, request: dict, reply: dict) -> None:
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = request.get("model", "fake")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def _send(payload: dict | str) -> None:
+            data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+            event = f"data: {data}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+            self.wfile.flush()
+
+        def _delta(delta: dict, finish_reason: str | None = None) -> None:
+            choice = {"index": 0, "delta": delta, "finish_reason": finish_reason}
+            _send(self._chunk(completion_id, model, choices=[choice]))
+
+        _delta({"role": "assistant", "content": ""})
+        tokens = _tokens(reply["content"]) if reply.get("content") else []
+        for token in tokens:
+            _delta({"content": token})
+            time.sleep(self.server.token_delay)
+        tool_calls = _tool_calls(reply)
+        for index, call in enumerate(tool_calls):
+            for position, fragment in enumerate(_fragments(call["function"]["arguments"])):
+                function = {"arguments": fragment}
+                delta: dict[str, Any] = {"index": index, "function": function}
+                if position == 0:
+                    delta.update(id=call["id"], type="function")
+                    function["name"] = call["function"]["name"]
+                _delta({"tool_calls": [delta]})
+        _delta({}, "tool_calls" if tool_calls else "stop")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            _send(self._chunk(completion_id, model, usage=_usage(request, max(len(tokens), 1))))
+        _send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering chat completions from ``responder``."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        responder: Responder = default_responder,
+        first_token_delay: float = 0.0,
+        token_delay: float = 0.0,
+    ) -> None:
+        super().__init__((host, port), _Handler)
+        self.responder = responder
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.requests: list[dict] = []
+        self.lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8390)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--script", choices=sorted(RESPONDERS), default="default")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        args.host,
+        args.port,
+        responder=RESPONDERS[args.script],
+        first_token_delay=args.first_token_ms / 1000,
+        token_delay=args.token_ms / 1000,
+    )
+    print(f"fake openai listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
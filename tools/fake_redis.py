@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""In-memory Redis-protocol (RESP2) server and client for local testing.
+
+Only the commands used by ``core.state_backends.RedisStateBackend`` are
+implemented. Start a server shared by several worker processes with:
+
+    python -m tools.fake_redis --port 6390
+"""
+
+from __future__ import annotations
+
+import argparse
+import socket
+import socketserver
+import threading
+from typing import Any
+
+
+class _Store:
+    def __init__(self) -> None:
+        self.data: dict[bytes, dict[bytes, bytes]] = {}
+        self.lock = threading.Lock()
+
+    def execute(self, command: list[bytes]) -> Any:
+        name, args = command[0].upper(), command[1:]
+        with self.lock:
+            if name == b"PING":
+                return SimpleString(b"PONG")
+            if name == b"HSET":
+                fields = self.data.setdefault(args[0], {})
+                pairs = list(zip(args[1::2], args[2::2]))
+                added = sum(1 for field, _ in pairs if field not in fields)
+                fields.update(pairs)
+                return added
+            if name == b"HGETALL":
+                fields = self.data.get(args[0], {})
+                return [item for pair in fields.items() for item in pair]
+            if name == b"HKEYS":
+                return list(self.data.get(args[0], {}))
+            if name == b"HDEL":
+                fields = self.data.get(args[0], {})
+                removed = sum(1 for field in args[1:] if fields.pop(field, None) is not None)
+                if not fields:
+                    self.data.pop(args[0], None)
+                return removed
+            if name == b"DEL":
+                return sum(1 for key in args if self.data.pop(key, None) is not None)
+            if name == b"FLUSHALL":
+                self.data.clear()
+                return SimpleString(b"OK")
+        return Error(b"ERR unknown command '" + name + b"'")
+
+
+class SimpleString(bytes):
+    pass
+
+
+class Error(bytes):
+    pass
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, Error):
+        return b"-" + value + b"\r\n"
+    if isinstance(value, SimpleString):
+        return b"+" + value + b"\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, (bytes, str)):
+        raw = value.encode() if isinstance(value, str) else value
+        return b"$%d\r\n%s\r\n" % (len(raw), raw)
+    return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+
+
+def _read_reply(stream: Any) -> Any:
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return SimpleString(body)
+    if kind == b"-":
+        raise RuntimeError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        return [_read_reply(stream) for _ in range(int(body))]
+    raise ValueError(f"unexpected RESP line {line!r}")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        store: _Store = self.server.store  # type: ignore[attr-defined]
+        while True:
+            try:
+                command = _read_reply(self.rfile)
+            except ConnectionError:
+                return
+            self.wfile.write(_encode(store.execute(command)))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded TCP server speaking enough RESP for the state backend."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _Handler)
+        self.store = _Store()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "FakeRedisServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class RespClient:
+    """Blocking client exposing the subset of the ``redis.Redis`` API we use."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379) -> None:
+        self._sock = socket.create_connection((host, port))
+        self._stream = self._sock.makefile("rb")
+        self._lock = threading.Lock()
+
+    def execute_command(self, *args: Any) -> Any:
+        parts = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in args]
+        with self._lock:
+            self._sock.sendall(_encode(parts))
+            return _read_reply(self._stream)
+
+    def ping(self) -> bool:
+        return self.execute_command("PING") == b"PONG"
+
+    def hset(self, name: str, mapping: dict) -> int:
+        args = [item for pair in mapping.items() for item in pair]
+        return self.execute_command("HSET", name, *args)
+
+    def hgetall(self, name: str) -> dict[bytes, bytes]:
+        flat = self.execute_command("HGETALL", name)
+        return dict(zip(flat[::2], flat[1::2]))
+
+    def hkeys(self, name: str) -> list[bytes]:
+        return self.execute_command("HKEYS", name)
+
+    def hdel(self, name: str, *keys: str) -> int:
+        return self.execute_command("HDEL", name, *keys)
+
+    def delete(self, *names: str) -> int:
+        return self.execute_command("DEL", *names)
+
+    def flushall(self) -> bool:
+        return self.execute_command("FLUSHALL") == b"OK"
+
+    def close(self) -> None:
+        self._stream.close()
+        self._sock.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    server = FakeRedisServer(args.host, args.port)
+    print(f"fake redis listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Print or refresh the golden copy of the generated LLM tool schemas.
+
+    python -m tools.tool_schemas            # print to stdout
+    python -m tools.tool_schemas --write    # update tests/golden/tool_schemas.json
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from core.tool_schema import TOOL_SCHEMAS_JSON
+
+GOLDEN_PATH = Path("tests/golden/tool_schemas.json")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--write", action="store_true", help=f"write {GOLDEN_PATH}")
+    args = parser.parse_args()
+    if args.write:
+        GOLDEN_PATH.write_text(TOOL_SCHEMAS_JSON, encoding="utf-8")
+        print(f"wrote {GOLDEN_PATH}")
+    else:
+        print(TOOL_SCHEMAS_JSON, end="")
+
+
+if __name__ == "__main__":
+    main()
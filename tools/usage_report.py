@@ -0,0 +1,609 @@
+#!/usr/bin/env python3
+"""Aggregate LLM usage logs into token, cost and latency reports.
+
+Streams ``logs/llm_usage.log`` and its rotated ``.gz`` segments line by line
+and prints a Markdown report; segments (and large plain files, in chunks)
+are aggregated in parallel worker processes:
+
+    python -m tools.usage_report report --since 2025-05-01 --json reports/usage.json
+    python -m tools.usage_report bench --lines 10000000 --segments 10
+
+Latency percentiles come from log-scale histograms (about 1% relative
+error), so memory grows with the number of models and days, not with the
+number of lines. Conversations get counters, mean and max latency but no
+percentiles, and only the ``--max-conversations`` most expensive are kept:
+the rest are folded into one "other" group, so memory stays bounded however
+many conversations the log holds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import heapq
+import json
+import math
+import os
+import random
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from core.usage_log import log_segments
+
+DEFAULT_LOG_PATH = Path("logs/llm_usage.log")
+# USD per 1M tokens; override with --prices prices.json in the same shape.
+DEFAULT_PRICES: dict[str, dict[str, float]] = {
+    "gpt-5-mini": {"input": 0.25, "output": 2.00},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+}
+CHUNK_BYTES = 64 * 1024 * 1024
+MAX_CONVERSATIONS = 10_000
+_LOG_BASE = math.log(1.02)
+_PERCENTILES = (50, 95, 99)
+_decode = json.JSONDecoder().decode
+
+
+class _Group:
+    """Counters for one model, day or conversation."""
+
+    __slots__ = (
+        "requests",
+        "errors",
+        "cache_hits",
+        "unpriced",
+        "prompt_tokens",
+        "completion_tokens",
+        "total_tokens",
+        "cost",
+        "latency_count",
+        "latency_sum",
+        "latency_max",
+        "histogram",
+    )
+
+    def __init__(self, histogram: bool = True) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.unpriced = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+        self.cost = 0.0
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.histogram: dict[int, int] | None = {} if histogram else None
+
+    def add(
+        self,
+        failed: bool,
+        cache_hit: bool,
+        tokens: tuple[int, int, int],
+        cost: float | None,
+        latency: float | None,
+        bucket: int,
+    ) -> None:
+        self.requests += 1
+        if failed:
+            self.errors += 1
+        if cache_hit:
+            self.cache_hits += 1
+        self.prompt_tokens += tokens[0]
+        self.completion_tokens += tokens[1]
+        self.total_tokens += tokens[2]
+        if cost is None:
+            self.unpriced += 1
+        else:
+            self.cost += cost
+        if latency is not None:
+            self.latency_count += 1
+            self.latency_sum += latency
+            if latency > self.latency_max:
+                self.latency_max = latency
+            histogram = self.histogram
+            if histogram is not None:
+                histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def merge(self, other: "_Group") -> None:
+        for name in self.__slots__[:10]:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.latency_max = max(self.latency_max, other.latency_max)
+        if self.histogram is not None and other.histogram is not None:
+            for bucket, count in other.histogram.items():
+                self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+
+    def percentile(self, percent: float) -> float | None:
+        if not self.histogram:
+            return None
+        rank = max(1, math.ceil(percent / 100 * self.latency_count))
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= rank:
+                # Midpoint of the bucket, clamped to the largest sample seen.
+                return min(math.expm1((bucket + 0.5) * _LOG_BASE), self.latency_max)
+        return self.latency_max
+
+    def to_dict(self) -> dict:
+        result: dict[str, Any] = {
+            "requests": self.requests,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(self.cost, 6),
+            "unpriced_requests": self.unpriced,
+            "latency_mean_ms": (
+                round(self.latency_sum / self.latency_count, 1) if self.latency_count else None
+            ),
+            "latency_max_ms": round(self.latency_max, 1) if self.latency_count else None,
+        }
+        if self.histogram is not None:
+            for percent in _PERCENTILES:
+                value = self.percentile(percent)
+                result[f"latency_p{percent}_ms"] = None if value is None else round(value, 1)
+        return result
+
+
+class UsageAggregate:
+    """Totals plus per-model, per-day and per-conversation groups.
+
+    Conversations are pruned to the ``max_conversations`` most expensive
+    whenever twice that many are tracked; pruned groups are merged into
+    ``other_conversations``. A conversation that was pruned and shows up
+    again starts from zero, so kept conversations are exact only while
+    they stay above the pruning threshold.
+    """
+
+    def __init__(self, max_conversations: int = MAX_CONVERSATIONS) -> None:
+        if max_conversations < 1:
+            raise ValueError("max_conversations must be positive")
+        self.lines = 0
+        self.bad_lines = 0
+        self.max_conversations = max_conversations
+        self.totals = _Group()
+        self.models: dict[str, _Group] = {}
+        self.days: dict[str, _Group] = {}
+        self.conversations: dict[str, _Group] = {}
+        self.other_conversations = _Group(histogram=False)
+        self.pruned_conversations = 0
+
+    def add(
+        self,
+        record: dict,
+        prices: dict[str, dict[str, float]],
+        since: str | None = None,
+        until: str | None = None,
+    ) -> None:
+        day = str(record.get("timestamp") or "")[:10] or "unknown"
+        if (since and day < since) or (until and day > until):
+            return
+        model = str(record.get("model") or "unknown")
+        tokens = (
+            record.get("prompt_tokens") or 0,
+            record.get("completion_tokens") or 0,
+            record.get("total_tokens") or 0,
+        )
+        price = prices.get(model)
+        cost = None
+        if price is not None:
+            cost = (tokens[0] * price.get("input", 0.0) + tokens[1] * price.get("output", 0.0)) / 1_000_000
+        elif not tokens[2]:
+            cost = 0.0  # errors and cache hits cost nothing even without a price
+        latency = record.get("latency_ms")
+        latency = float(latency) if isinstance(latency, (int, float)) else None
+        # Extracted once; the same values feed every group the record belongs to.
+        values = (
+            bool(record.get("error")),
+            bool(record.get("cache_hit")),
+            tokens,
+            cost,
+            latency,
+            int(math.log1p(latency) / _LOG_BASE) if latency is not None and latency >= 0 else 0,
+        )
+        self.totals.add(*values)
+        _group(self.models, model).add(*values)
+        _group(self.days, day).add(*values)
+        conversation = record.get("conversation_id")
+        if conversation:
+            _group(self.conversations, conversation, histogram=False).add(*values)
+            if len(self.conversations) > 2 * self.max_conversations:
+                self.prune_conversations()
+
+    def merge(self, other: "UsageAggregate") -> None:
+        self.lines += other.lines
+        self.bad_lines += other.bad_lines
+        self.totals.merge(other.totals)
+        for mine, theirs, histogram in (
+            (self.models, other.models, True),
+            (self.days, other.days, True),
+            (self.conversations, other.conversations, False),
+        ):
+            for key, group in theirs.items():
+                _group(mine, key, histogram=histogram).merge(group)
+        self.other_conversations.merge(other.other_conversations)
+        self.pruned_conversations += other.pruned_conversations
+        if len(self.conversations) > 2 * self.max_conversations:
+            self.prune_conversations()
+
+    def prune_conversations(self) -> None:
+        """Keep the ``max_conversations`` most expensive conversations."""
+
+        if len(self.conversations) <= self.max_conversations:
+            return
+        kept = heapq.nlargest(
+            self.max_conversations,
+            self.conversations.items(),
+            key=lambda item: (item[1].cost, item[1].total_tokens, item[0]),
+        )
+        for key in self.conversations.keys() - {key for key, _ in kept}:
+            self.other_conversations.merge(self.conversations[key])
+            self.pruned_conversations += 1
+        self.conversations = dict(kept)
+
+    def to_dict(self) -> dict:
+        return {
+            "lines": self.lines,
+            "bad_lines": self.bad_lines,
+            "totals": self.totals.to_dict(),
+            "models": {key: group.to_dict() for key, group in sorted(self.models.items())},
+            "days": {key: group.to_dict() for key, group in sorted(self.days.items())},
+            "conversations": {
+                key: group.to_dict() for key, group in sorted(self.conversations.items())
+            },
+            "other_conversations": self.other_conversations.to_dict(),
+            "pruned_conversations": self.pruned_conversations,
+        }
+
+
+def _group(groups: dict[str, _Group], key: str, histogram: bool = True) -> _Group:
+    group = groups.get(key)
+    if group is None:
+        group = groups[key] = _Group(histogram)
+    return group
+
+
+# ----------------------------------------------------------------------
+# Streaming over segments
+# ----------------------------------------------------------------------
+Unit = tuple[str, int, int]  # (path, start byte, end byte); gzip segments use (path, 0, -1)
+
+
+def work_units(paths: Iterable[Path], chunk_bytes: int = CHUNK_BYTES) -> list[Unit]:
+    """Split plain files into byte ranges; gzip segments are read whole."""
+
+    units: list[Unit] = []
+    for path in paths:
+        if path.suffix == ".gz":
+            units.append((str(path), 0, -1))
+            continue
+        size = path.stat().st_size
+        for start in range(0, max(size, 1), chunk_bytes):
+            units.append((str(path), start, min(start + chunk_bytes, size)))
+    return units
+
+
+def _unit_lines(unit: Unit) -> Iterator[bytes]:
+    path, start, end = unit
+    if end < 0:
+        with gzip.open(path, "rb") as fh:
+            yield from fh
+        return
+    with open(path, "rb") as fh:
+        # A line belongs to the range it starts in.
+        position = start
+        if start:
+            fh.seek(start - 1)
+            position = start - 1 + len(fh.readline())
+        while position < end:
+            line = fh.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line
+
+
+def aggregate_unit(
+    unit: Unit,
+    prices: dict[str, dict[str, float]],
+    since: str | None = None,
+    until: str | None = None,
+    max_conversations: int = MAX_CONVERSATIONS,
+) -> UsageAggregate:
+    aggregate = UsageAggregate(max_conversations)
+    for line in _unit_lines(unit):
+        if not line.strip():
+            continue
+        aggregate.lines += 1
+        try:
+            record = _decode(line.decode("utf-8"))
+        except ValueError:
+            aggregate.bad_lines += 1
+            continue
+        if isinstance(record, dict):
+            aggregate.add(record, prices, since, until)
+        else:
+            aggregate.bad_lines += 1
+    return aggregate
+
+
+def aggregate_logs(
+    paths: Iterable[Path],
+    prices: dict[str, dict[str, float]] | None = None,
+    *,
+    since: str | None = None,
+    until: str | None = None,
+    workers: int | None = None,
+    chunk_bytes: int = CHUNK_BYTES,
+    max_conversations: int = MAX_CONVERSATIONS,
+) -> UsageAggregate:
+    """Aggregate ``paths``, fanning work units out to ``workers`` processes."""
+
+    prices = DEFAULT_PRICES if prices is None else prices
+    units = work_units(paths, chunk_bytes)
+    workers = min(workers or os.cpu_count() or 1, max(len(units), 1))
+    result = UsageAggregate(max_conversations)
+    if workers <= 1:
+        for unit in units:
+            result.merge(aggregate_unit(unit, prices, since, until, max_conversations))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(aggregate_unit, unit, prices, since, until, max_conversations)
+                for unit in units
+            ]
+            for future in as_completed(futures):
+                result.merge(future.result())
+    result.prune_conversations()
+    return result
+
+
+# ----------------------------------------------------------------------
+# Output
+# ----------------------------------------------------------------------
+def _table(headers: list[str], rows: list[list[str]]) -> list[str]:
+    lines = ["| " + " | ".join(headers) + " |", "|" + "|".join("---" for _ in headers) + "|"]
+    lines.extend("| " + " | ".join(row) + " |" for row in rows)
+    return lines
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def _group_rows(groups: dict[str, dict]) -> list[list[str]]:
+    return [
+        [
+            key,
+            str(group["requests"]),
+            str(group["errors"]),
+            str(group["cache_hits"]),
+            f"{group['prompt_tokens']:,}",
+            f"{group['completion_tokens']:,}",
+            f"{group['total_tokens']:,}",
+            f"{group['cost_usd']:.4f}" + ("*" if group["unpriced_requests"] else ""),
+            _ms(group["latency_p50_ms"]),
+            _ms(group["latency_p95_ms"]),
+            _ms(group["latency_p99_ms"]),
+        ]
+        for key, group in groups.items()
+    ]
+
+
+def render_markdown(report: dict, top: int = 20) -> str:
+    headers = [
+        "",
+        "requests",
+        "errors",
+        "cache hits",
+        "prompt",
+        "completion",
+        "total tokens",
+        "cost USD",
+        "p50 ms",
+        "p95 ms",
+        "p99 ms",
+    ]
+    lines = ["# LLM usage report", ""]
+    lines.append(f"- lines: {report['lines']:,} (unparsable: {report['bad_lines']:,})")
+    if report.get("period"):
+        lines.append(f"- period: {report['period']}")
+    lines.append("")
+    lines.extend(["## Total", ""])
+    lines.extend(_table(["total", *headers[1:]], _group_rows({"all": report["totals"]})))
+    lines.extend(["", "## By model", ""])
+    lines.extend(_table(["model", *headers[1:]], _group_rows(report["models"])))
+    lines.extend(["", "## By day", ""])
+    lines.extend(_table(["day", *headers[1:]], _group_rows(report["days"])))
+    conversations = sorted(
+        report["conversations"].items(), key=lambda item: item[1]["cost_usd"], reverse=True
+    )[:top]
+    lines.extend(["", f"## Top {len(conversations)} conversations by cost", ""])
+    lines.extend(
+        _table(
+            ["conversation", "requests", "errors", "total tokens", "cost USD", "mean ms", "max ms"],
+            [
+                [
+                    key,
+                    str(group["requests"]),
+                    str(group["errors"]),
+                    f"{group['total_tokens']:,}",
+                    f"{group['cost_usd']:.4f}",
+                    _ms(group["latency_mean_ms"]),
+                    _ms(group["latency_max_ms"]),
+                ]
+                for key, group in conversations
+            ],
+        )
+    )
+    if report.get("pruned_conversations"):
+        other = report["other_conversations"]
+        lines.extend(
+            [
+                "",
+                f"비용 상위 대화만 집계했습니다: 나머지 {report['pruned_conversations']:,}개 대화 분량"
+                f"({other['requests']:,}건, {other['cost_usd']:.4f} USD)은 기타로 합쳤습니다"
+                " (`--max-conversations`).",
+            ]
+        )
+    if any(group["unpriced_requests"] for group in report["models"].values()):
+        lines.extend(["", "\\* 단가표에 없는 모델의 요청은 비용에서 빠졌습니다 (`--prices`)."])
+    return "\n".join(lines) + "\n"
+
+
+def build_report(
+    log_path: Path,
+    prices: dict[str, dict[str, float]],
+    *,
+    since: str | None = None,
+    until: str | None = None,
+    workers: int | None = None,
+    max_conversations: int = MAX_CONVERSATIONS,
+) -> dict:
+    segments = log_segments(log_path)
+    report = aggregate_logs(
+        segments,
+        prices,
+        since=since,
+        until=until,
+        workers=workers,
+        max_conversations=max_conversations,
+    ).to_dict()
+    report["segments"] = [str(path) for path in segments]
+    report["period"] = f"{since or '…'} ~ {until or '…'}" if since or until else None
+    report["prices_per_1m_tokens"] = prices
+    return report
+
+
+# ----------------------------------------------------------------------
+# Synthetic benchmark
+# ----------------------------------------------------------------------
+_BENCH_MODELS = ("gpt-5-mini", "gpt-4o-mini")
+
+
+def _write_synthetic_segment(path: str, lines: int, seed: int) -> None:
+    rng = random.Random(seed)
+    opener: Any = gzip.open if path.endswith(".gz") else open
+    kwargs = {"compresslevel": 1} if path.endswith(".gz") else {}
+    with opener(path, "wt", encoding="utf-8", **kwargs) as fh:
+        batch: list[str] = []
+        for index in range(lines):
+            prompt = rng.randint(200, 4000)
+            completion = rng.randint(20, 800)
+            cached = index % 20 == 0
+            failed = index % 200 == 7
+            if cached or failed:
+                prompt = completion = 0
+            error = '"APITimeoutError: Request timed out."' if failed else "null"
+            batch.append(
+                f'{{"timestamp": "2025-05-{1 + (seed + index // 50_000) % 28:02d}T12:00:00", '
+                f'"model": "{_BENCH_MODELS[index % 2]}", "prompt_tokens": {prompt}, '
+                f'"completion_tokens": {completion}, "total_tokens": {prompt + completion}, '
+                f'"latency_ms": {rng.lognormvariate(6.5, 0.6):.1f}, "error": {error}, '
+                f'"conversation_id": "conv_{seed}_{index // 12}", "task": "goal_planning", '
+                f'"route": "primary", "attempts": 1, "cache_hit": {"true" if cached else "false"}}}\n'
+            )
+            if len(batch) >= 10_000:
+                fh.write("".join(batch))
+                batch.clear()
+        fh.write("".join(batch))
+
+
+def _write_synthetic_log(log_path: Path, lines: int, segments: int, workers: int) -> None:
+    """Rotated gzip segments plus a plain current file, like a long-running install."""
+
+    per_segment = lines // segments
+    jobs = []
+    for index in range(segments):
+        count = per_segment + (lines % segments if index == segments - 1 else 0)
+        name = str(log_path) if index == segments - 1 else f"{log_path}.2025-05-{index + 1:02d}.1.gz"
+        jobs.append((name, count, index))
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        for future in [pool.submit(_write_synthetic_segment, *job) for job in jobs]:
+            future.result()
+
+
+def bench(lines: int, segments: int, workers: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = Path(tmp_dir) / "llm_usage.log"
+        started = time.perf_counter()
+        _write_synthetic_log(log_path, lines, segments, workers)
+        generated = time.perf_counter() - started
+        size_mib = sum(path.stat().st_size for path in log_segments(log_path)) / 1024 / 1024
+        print(f"generated {lines:,} lines in {segments} segments ({size_mib:.0f} MiB) in {generated:.1f}s")
+        print()
+        rows = []
+        for count in sorted({1, workers}):
+            started = time.perf_counter()
+            aggregate = aggregate_logs(log_segments(log_path), DEFAULT_PRICES, workers=count)
+            seconds = time.perf_counter() - started
+            usage = resource.getrusage(resource.RUSAGE_SELF if count == 1 else resource.RUSAGE_CHILDREN)
+            assert aggregate.lines == lines and aggregate.bad_lines == 0
+            rows.append(
+                [
+                    str(count),
+                    f"{aggregate.lines:,}",
+                    f"{seconds:.1f}",
+                    f"{aggregate.lines / seconds:,.0f}",
+                    f"{usage.ru_maxrss / 1024:.0f}",
+                ]
+            )
+        print("\n".join(_table(["workers", "lines", "seconds", "lines/s", "peak RSS MiB"], rows)))
+
+
+def _load_prices(path: str | None) -> dict[str, dict[str, float]]:
+    if path is None:
+        return DEFAULT_PRICES
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    report = subparsers.add_parser("report", help="aggregate the usage log and its rotated segments")
+    report.add_argument("--log", type=Path, default=DEFAULT_LOG_PATH)
+    report.add_argument("--since", help="first day to include (YYYY-MM-DD)")
+    report.add_argument("--until", help="last day to include (YYYY-MM-DD)")
+    report.add_argument("--prices", help="JSON file: {model: {input, output}} in USD per 1M tokens")
+    report.add_argument("--workers", type=int, default=None)
+    report.add_argument("--top", type=int, default=20, help="conversations shown in Markdown")
+    report.add_argument(
+        "--max-conversations",
+        type=int,
+        default=MAX_CONVERSATIONS,
+        help="most expensive conversations kept; the rest are folded into one group",
+    )
+    report.add_argument("--json", dest="json_path", type=Path, help="also write the full report as JSON")
+
+    synthetic = subparsers.add_parser("bench", help="aggregate a synthetic log")
+    synthetic.add_argument("--lines", type=int, default=10_000_000)
+    synthetic.add_argument("--segments", type=int, default=10)
+    synthetic.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    args = parser.parse_args()
+    if args.command == "report":
+        result = build_report(
+            args.log,
+            _load_prices(args.prices),
+            since=args.since,
+            until=args.until,
+            workers=args.workers,
+            max_conversations=args.max_conversations,
+        )
+        print(render_markdown(result, args.top), end="")
+        if args.json_path:
+            args.json_path.parent.mkdir(parents=True, exist_ok=True)
+            args.json_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    elif args.command == "bench":
+        bench(args.lines, args.segments, args.workers)
+
+
+if __name__ == "__main__":
+    main()